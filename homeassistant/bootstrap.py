@@ -7,7 +7,7 @@ import sys
 from time import time
 from collections import OrderedDict
 
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Set
 
 import voluptuous as vol
 
@@ -16,12 +16,12 @@ from homeassistant.components import persistent_notification
 import homeassistant.config as conf_util
 import homeassistant.core as core
 from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
-from homeassistant.setup import async_setup_component
+from homeassistant.setup import async_setup_component, DATA_SETUP
 import homeassistant.loader as loader
 from homeassistant.util.logging import AsyncHandler
 from homeassistant.util.yaml import clear_secret_cache
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import event_decorators, service
+from homeassistant.helpers import event_decorators, service, timeline
 from homeassistant.helpers.signal import async_register_signal_handling
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +30,11 @@ ERROR_LOG_FILENAME = 'home-assistant.log'
 FIRST_INIT_COMPONENT = set((
     'recorder', 'mqtt', 'mqtt_eventstream', 'logger', 'introduction'))
 
+# Seconds startup waits for the setup of a component
+DEFAULT_SETUP_TIMEOUT = 60
+# Key in the setup_timeout core config to change the default
+CONF_DEFAULT_SETUP_TIMEOUT = 'default'
+
 
 def from_config_dict(config: Dict[str, Any],
                      hass: Optional[core.HomeAssistant]=None,
@@ -75,6 +80,7 @@ def async_from_config_dict(config: Dict[str, Any],
     This method is a coroutine.
     """
     start = time()
+    tline = hass.data[timeline.DATA_TIMELINE] = timeline.Timeline()
     hass.async_track_tasks()
 
     core_config = config.get(core.DOMAIN, {})
@@ -132,28 +138,97 @@ def async_from_config_dict(config: Dict[str, Any],
     service.HASS = hass
 
     # stage 1
-    for component in components:
-        if component not in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
+    stragglers = yield from _async_setup_waves(
+        hass, config, components & FIRST_INIT_COMPONENT)
 
-    yield from hass.async_block_till_done()
+    if not stragglers:
+        yield from hass.async_block_till_done()
 
     # stage 2
-    for component in components:
-        if component in FIRST_INIT_COMPONENT:
-            continue
-        hass.async_add_job(async_setup_component(hass, component, config))
+    stragglers |= yield from _async_setup_waves(
+        hass, config, components - FIRST_INIT_COMPONENT)
+
+    if stragglers:
+        _LOGGER.warning('Starting without waiting for the setup of: %s',
+                        ', '.join(sorted(stragglers)))
+        setup_tasks = hass.data[DATA_SETUP]
+        hass.async_untrack_tasks([setup_tasks[domain] for domain in stragglers
+                                  if domain in setup_tasks])
 
-    yield from hass.async_stop_track_tasks()
+    # Don't wait for work started by stragglers longer than for the setups
+    yield from hass.async_stop_track_tasks(
+        _async_setup_timeout(hass, None) if stragglers else None)
 
     stop = time()
     _LOGGER.info('Home Assistant initialized in %ss', round(stop-start, 2))
 
+    tline.finish()
+    _LOGGER.info('Critical path of the startup: %s',
+                 ' > '.join(tline.critical_path()))
+    yield from hass.loop.run_in_executor(
+        None, tline.save, hass.config.path(timeline.TIMELINE_FILE))
+
     async_register_signal_handling(hass)
     return hass
 
 
+@asyncio.coroutine
+def _async_setup_waves(hass: core.HomeAssistant, config: Dict[str, Any],
+                       components: Set[str]) -> Set[str]:
+    """Set up components and their dependencies in dependency order.
+
+    The setups are started wave by wave, so the setup of a dependency is
+    running before its dependents look for it. Dependents wait for their
+    own dependencies only, not for the rest of the previous wave. A
+    component that doesn't finish its setup within its timeout is left to
+    finish in the background.
+
+    Returns the components that are still being set up.
+    This method is a coroutine.
+    """
+    tasks = OrderedDict()
+
+    for wave in loader.component_setup_waves(components):
+        for domain in wave:
+            # Already set up as a dependency of an earlier stage
+            if domain in hass.config.components:
+                continue
+
+            # Not tracked, setup tasks are tracked by async_setup_component
+            tasks[domain] = hass.loop.create_task(
+                async_setup_component(hass, domain, config))
+
+    if tasks:
+        yield from asyncio.wait([
+            _async_wait_setup(hass, domain, task)
+            for domain, task in tasks.items()], loop=hass.loop)
+
+    return set(domain for domain, task in tasks.items() if not task.done())
+
+
+@asyncio.coroutine
+def _async_wait_setup(hass: core.HomeAssistant, domain: str, task) -> None:
+    """Wait for the setup of a component until its timeout.
+
+    This method is a coroutine.
+    """
+    timeout = _async_setup_timeout(hass, domain)
+    done, _ = yield from asyncio.wait([task], loop=hass.loop, timeout=timeout)
+
+    if not done:
+        _LOGGER.warning('Setup of %s did not finish within %s seconds, '
+                        'continuing startup', domain, timeout)
+
+
+def _async_setup_timeout(hass: core.HomeAssistant,
+                         domain: Optional[str]) -> float:
+    """Return seconds to wait for the setup of a component."""
+    timeouts = hass.config.setup_timeouts
+
+    return timeouts.get(domain, timeouts.get(
+        CONF_DEFAULT_SETUP_TIMEOUT, DEFAULT_SETUP_TIMEOUT))
+
+
 def from_config_file(config_path: str,
                      hass: Optional[core.HomeAssistant]=None,
                      verbose: bool=False,
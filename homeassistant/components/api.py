@@ -5,6 +5,7 @@ For more details about the RESTful API, please refer to the documentation at
 https://home-assistant.io/developers/api/
 """
 import asyncio
+from collections import deque
 import json
 import logging
 
@@ -15,16 +16,18 @@ import homeassistant.core as ha
 import homeassistant.remote as rem
 from homeassistant.bootstrap import ERROR_LOG_FILENAME
 from homeassistant.const import (
-    EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED,
+    ATTR_ENTITY_ID, EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED,
     HTTP_BAD_REQUEST, HTTP_CREATED, HTTP_NOT_FOUND,
-    HTTP_UNPROCESSABLE_ENTITY, MATCH_ALL, URL_API, URL_API_COMPONENTS,
-    URL_API_CONFIG, URL_API_DISCOVERY_INFO, URL_API_ERROR_LOG,
-    URL_API_EVENT_FORWARD, URL_API_EVENTS, URL_API_SERVICES,
-    URL_API_STATES, URL_API_STATES_ENTITY, URL_API_STREAM, URL_API_TEMPLATE,
-    __version__)
+    HTTP_UNPROCESSABLE_ENTITY, MATCH_ALL, URL_API, URL_API_BOOTSTRAP_TIMELINE,
+    URL_API_COMPONENTS, URL_API_CONFIG, URL_API_DISCOVERY_INFO,
+    URL_API_DISPATCHER_STATS, URL_API_ERROR_LOG,
+    URL_API_EVENT_FORWARD, URL_API_EVENT_FORWARD_BULK, URL_API_EVENTS,
+    URL_API_SERVICES, URL_API_STATES, URL_API_STATES_ENTITY, URL_API_STREAM,
+    URL_API_TEMPLATE, __version__)
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers.state import AsyncTrackStates
-from homeassistant.helpers import template
+from homeassistant.helpers import template, timeline
+from homeassistant.helpers.dispatcher import async_dispatcher_stats
 from homeassistant.components.http import HomeAssistantView
 
 DOMAIN = 'api'
@@ -32,6 +35,11 @@ DEPENDENCIES = ['http']
 
 STREAM_PING_PAYLOAD = "ping"
 STREAM_PING_INTERVAL = 50  # seconds
+# Maximum number of payloads queued per client, oldest are dropped first
+STREAM_QUEUE_SIZE = 1000
+STREAM_STOP = object()
+
+DATA_EVENT_STREAM = 'api_event_stream'
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -49,9 +57,12 @@ def setup(hass, config):
     hass.http.register_view(APIServicesView)
     hass.http.register_view(APIDomainServicesView)
     hass.http.register_view(APIEventForwardingView)
+    hass.http.register_view(APIEventForwardingBulkView)
     hass.http.register_view(APIComponentsView)
     hass.http.register_view(APIErrorLogView)
     hass.http.register_view(APITemplateView)
+    hass.http.register_view(APIBootstrapTimelineView)
+    hass.http.register_view(APIDispatcherStatsView)
 
     return True
 
@@ -79,66 +90,163 @@ class APIEventStream(HomeAssistantView):
         """Provide a streaming interface for the event bus."""
         # pylint: disable=no-self-use
         hass = request.app['hass']
-        stop_obj = object()
-        to_write = asyncio.Queue(loop=hass.loop)
-
-        restrict = request.GET.get('restrict')
-        if restrict:
-            restrict = restrict.split(',') + [EVENT_HOMEASSISTANT_STOP]
 
-        @asyncio.coroutine
-        def forward_events(event):
-            """Forward events to the open request."""
-            if event.event_type == EVENT_TIME_CHANGED:
-                return
+        if DATA_EVENT_STREAM not in hass.data:
+            hass.data[DATA_EVENT_STREAM] = EventStream(hass)
 
-            if restrict and event.event_type not in restrict:
-                return
+        event_stream = hass.data[DATA_EVENT_STREAM]
 
-            _LOGGER.debug('STREAM %s FORWARDING %s', id(stop_obj), event)
+        # An empty filter means no filter
+        restrict = request.GET.get('restrict')
+        restrict = set(restrict.split(',')) if restrict else None
 
-            if event.event_type == EVENT_HOMEASSISTANT_STOP:
-                data = stop_obj
-            else:
-                data = json.dumps(event, cls=rem.JSONEncoder)
+        entity_ids = request.GET.get('entity_id')
+        entity_ids = set(entity_ids.lower().split(',')) if entity_ids else None
 
-            yield from to_write.put(data)
+        client = EventStreamClient(hass.loop, restrict, entity_ids)
 
         response = web.StreamResponse()
         response.content_type = 'text/event-stream'
         yield from response.prepare(request)
 
-        unsub_stream = hass.bus.async_listen(MATCH_ALL, forward_events)
+        event_stream.async_add_client(client)
 
         try:
-            _LOGGER.debug('STREAM %s ATTACHED', id(stop_obj))
+            _LOGGER.debug('STREAM %s ATTACHED', id(client))
 
             # Fire off one message so browsers fire open event right away
-            yield from to_write.put(STREAM_PING_PAYLOAD)
+            client.async_put(STREAM_PING_PAYLOAD)
 
             while True:
                 try:
                     with async_timeout.timeout(STREAM_PING_INTERVAL,
                                                loop=hass.loop):
-                        payload = yield from to_write.get()
+                        payload = yield from client.async_get()
 
-                    if payload is stop_obj:
+                    if payload is STREAM_STOP:
                         break
 
                     msg = "data: {}\n\n".format(payload)
-                    _LOGGER.debug('STREAM %s WRITING %s', id(stop_obj),
+                    _LOGGER.debug('STREAM %s WRITING %s', id(client),
                                   msg.strip())
                     response.write(msg.encode("UTF-8"))
                     yield from response.drain()
                 except asyncio.TimeoutError:
-                    yield from to_write.put(STREAM_PING_PAYLOAD)
+                    client.async_put(STREAM_PING_PAYLOAD)
 
         except asyncio.CancelledError:
-            _LOGGER.debug('STREAM %s ABORT', id(stop_obj))
+            _LOGGER.debug('STREAM %s ABORT', id(client))
 
         finally:
-            _LOGGER.debug('STREAM %s RESPONSE CLOSED', id(stop_obj))
-            unsub_stream()
+            _LOGGER.debug('STREAM %s RESPONSE CLOSED', id(client))
+            event_stream.async_remove_client(client)
+
+
+class EventStream(object):
+    """Forward events from the bus to the event stream clients.
+
+    Each event is serialized only once, no matter how many clients
+    receive it.
+    """
+
+    def __init__(self, hass):
+        """Initialize the event stream."""
+        self.hass = hass
+        self._clients = set()
+        self._unsub_listener = None
+
+    @ha.callback
+    def async_add_client(self, client):
+        """Start forwarding events to a client."""
+        if self._unsub_listener is None:
+            self._unsub_listener = self.hass.bus.async_listen(
+                MATCH_ALL, self._async_forward_event)
+
+        self._clients.add(client)
+
+    @ha.callback
+    def async_remove_client(self, client):
+        """Stop forwarding events to a client."""
+        self._clients.discard(client)
+
+        if not self._clients and self._unsub_listener is not None:
+            self._unsub_listener()
+            self._unsub_listener = None
+
+    @ha.callback
+    def _async_forward_event(self, event):
+        """Forward an event to the clients that want it."""
+        if event.event_type == EVENT_TIME_CHANGED:
+            return
+
+        if event.event_type == EVENT_HOMEASSISTANT_STOP:
+            for client in self._clients:
+                client.async_put(STREAM_STOP)
+            return
+
+        payload = None
+
+        for client in self._clients:
+            if not client.matches(event):
+                continue
+
+            if payload is None:
+                payload = json.dumps(event, cls=rem.JSONEncoder)
+
+            _LOGGER.debug('STREAM %s FORWARDING %s', id(client), event)
+            client.async_put(payload)
+
+
+class EventStreamClient(object):
+    """Hold the filters and the queued payloads of an event stream client."""
+
+    def __init__(self, loop, event_types=None, entity_ids=None):
+        """Initialize the client.
+
+        Event types and entity ids are sets to filter on or None to not
+        filter on them.
+        """
+        self.event_types = event_types
+        self.entity_ids = entity_ids
+        self.dropped = 0
+        self._queue = deque(maxlen=STREAM_QUEUE_SIZE)
+        self._has_payload = asyncio.Event(loop=loop)
+
+    def matches(self, event):
+        """Return if the client wants to receive the event."""
+        if self.event_types is not None and \
+                event.event_type not in self.event_types:
+            return False
+
+        if self.entity_ids is None:
+            return True
+
+        entity_id = event.data.get(ATTR_ENTITY_ID)
+
+        # Service calls can target a list of entities
+        if isinstance(entity_id, (list, tuple)):
+            return any(isinstance(item, str) and item in self.entity_ids
+                       for item in entity_id)
+
+        return isinstance(entity_id, str) and entity_id in self.entity_ids
+
+    @ha.callback
+    def async_put(self, payload):
+        """Queue a payload, dropping the oldest if the queue is full."""
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+
+        self._queue.append(payload)
+        self._has_payload.set()
+
+    @asyncio.coroutine
+    def async_get(self):
+        """Return the oldest queued payload, wait for one if needed."""
+        while not self._queue:
+            self._has_payload.clear()
+            yield from self._has_payload.wait()
+
+        return self._queue.popleft()
 
 
 class APIConfigView(HomeAssistantView):
@@ -150,7 +258,12 @@ class APIConfigView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get current configuration."""
-        return self.json(request.app['hass'].config.as_dict())
+        config = request.app['hass'].config
+        generation = (
+            len(config.components), config.latitude, config.longitude,
+            config.elevation, config.location_name, config.time_zone,
+            config.units.name)
+        return self.json_cached(request, generation, config.as_dict)
 
 
 class APIDiscoveryView(HomeAssistantView):
@@ -182,7 +295,38 @@ class APIStatesView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get current states."""
-        return self.json(request.app['hass'].states.async_all())
+        states = request.app['hass'].states
+        return self.json_cached(
+            request, states.generation, states.async_all)
+
+    @asyncio.coroutine
+    def post(self, request):
+        """Update the states of many entities.
+
+        Returns a list of the written states.
+        """
+        hass = request.app['hass']
+        try:
+            data = yield from request.json()
+        except ValueError:
+            return self.json_message('Invalid JSON specified',
+                                     HTTP_BAD_REQUEST)
+
+        if not isinstance(data, list) or \
+                not all(isinstance(item, dict) and
+                        isinstance(item.get('entity_id'), str) and
+                        'state' in item for item in data):
+            return self.json_message(
+                'States should be a list with entity_id and state',
+                HTTP_BAD_REQUEST)
+
+        for item in data:
+            hass.states.async_set(
+                item['entity_id'], item['state'], item.get('attributes'),
+                item.get('force_update', False))
+
+        return self.json([hass.states.get(item['entity_id'])
+                          for item in data])
 
 
 class APIEntityStateView(HomeAssistantView):
@@ -268,17 +412,7 @@ class APIEventView(HomeAssistantView):
             return self.json_message('Event data should be a JSON object',
                                      HTTP_BAD_REQUEST)
 
-        # Special case handling for event STATE_CHANGED
-        # We will try to convert state dicts back to State objects
-        if event_type == ha.EVENT_STATE_CHANGED and event_data:
-            for key in ('old_state', 'new_state'):
-                state = ha.State.from_dict(event_data.get(key))
-
-                if state:
-                    event_data[key] = state
-
-        request.app['hass'].bus.async_fire(event_type, event_data,
-                                           ha.EventOrigin.remote)
+        async_fire_remote_event(request.app['hass'], event_type, event_data)
 
         return self.json_message("Event {} fired.".format(event_type))
 
@@ -292,7 +426,39 @@ class APIServicesView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get registered services."""
-        return self.json(async_services_json(request.app['hass']))
+        hass = request.app['hass']
+        return self.json_cached(
+            request, hass.services.generation,
+            lambda: async_services_json(hass))
+
+    @asyncio.coroutine
+    def post(self, request):
+        """Call many services at once.
+
+        Returns a list of changed states.
+        """
+        hass = request.app['hass']
+        try:
+            data = yield from request.json()
+        except ValueError:
+            return self.json_message('Invalid JSON specified',
+                                     HTTP_BAD_REQUEST)
+
+        if not isinstance(data, list) or \
+                not all(isinstance(item, dict) and item.get('domain') and
+                        item.get('service') for item in data):
+            return self.json_message(
+                'Service calls should be a list with domain and service',
+                HTTP_BAD_REQUEST)
+
+        with AsyncTrackStates(hass) as changed_states:
+            yield from asyncio.gather(*[
+                hass.services.async_call(
+                    item['domain'], item['service'], item.get('service_data'),
+                    True)
+                for item in data], loop=hass.loop)
+
+        return self.json(changed_states)
 
 
 class APIDomainServicesView(HomeAssistantView):
@@ -388,6 +554,36 @@ class APIEventForwardingView(HomeAssistantView):
         return self.json_message("Event forwarding cancelled.")
 
 
+class APIEventForwardingBulkView(HomeAssistantView):
+    """View to receive a batch of forwarded events."""
+
+    url = URL_API_EVENT_FORWARD_BULK
+    name = "api:event-forward-bulk"
+
+    @asyncio.coroutine
+    def post(self, request):
+        """Fire a list of events."""
+        hass = request.app['hass']
+        try:
+            events = yield from request.json()
+        except ValueError:
+            return self.json_message('Invalid JSON specified',
+                                     HTTP_BAD_REQUEST)
+
+        if not isinstance(events, list) or \
+                not all(isinstance(event, dict) and 'event_type' in event and
+                        isinstance(event.get('data') or {}, dict)
+                        for event in events):
+            return self.json_message('Events should be a list of events',
+                                     HTTP_BAD_REQUEST)
+
+        for event in events:
+            async_fire_remote_event(
+                hass, event['event_type'], event.get('data'))
+
+        return self.json_message("{} events fired.".format(len(events)))
+
+
 class APIComponentsView(HomeAssistantView):
     """View to handle Components requests."""
 
@@ -397,7 +593,10 @@ class APIComponentsView(HomeAssistantView):
     @ha.callback
     def get(self, request):
         """Get current loaded components."""
-        return self.json(request.app['hass'].config.components)
+        components = request.app['hass'].config.components
+        # Components are only ever added
+        return self.json_cached(
+            request, len(components), lambda: components)
 
 
 class APIErrorLogView(HomeAssistantView):
@@ -432,6 +631,51 @@ class APITemplateView(HomeAssistantView):
                                      HTTP_BAD_REQUEST)
 
 
+class APIBootstrapTimelineView(HomeAssistantView):
+    """View to handle startup timeline requests."""
+
+    url = URL_API_BOOTSTRAP_TIMELINE
+    name = "api:bootstrap-timeline"
+
+    @ha.callback
+    def get(self, request):
+        """Get the time spent setting up components and platforms."""
+        tline = request.app['hass'].data.get(timeline.DATA_TIMELINE)
+
+        if tline is None:
+            return self.json_message('No startup timeline recorded.',
+                                     HTTP_NOT_FOUND)
+
+        return self.json(tline.as_dict())
+
+
+class APIDispatcherStatsView(HomeAssistantView):
+    """View to handle dispatcher statistics requests."""
+
+    url = URL_API_DISPATCHER_STATS
+    name = "api:dispatcher-stats"
+
+    @ha.callback
+    def get(self, request):
+        """Get the connected targets and sends per dispatcher signal."""
+        return self.json(async_dispatcher_stats(request.app['hass']))
+
+
+@ha.callback
+def async_fire_remote_event(hass, event_type, event_data):
+    """Fire an event that was received from a remote instance."""
+    # Special case handling for event STATE_CHANGED
+    # We will try to convert state dicts back to State objects
+    if event_type == ha.EVENT_STATE_CHANGED and event_data:
+        for key in ('old_state', 'new_state'):
+            state = ha.State.from_dict(event_data.get(key))
+
+            if state:
+                event_data[key] = state
+
+    hass.bus.async_fire(event_type, event_data, ha.EventOrigin.remote)
+
+
 def async_services_json(hass):
     """Generate services data to JSONify."""
     return [{"domain": key, "services": value}
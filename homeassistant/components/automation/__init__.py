@@ -12,6 +12,7 @@ import os
 import voluptuous as vol
 
 from homeassistant.setup import async_prepare_setup_platform
+from homeassistant.core import callback
 from homeassistant import config as conf_util
 from homeassistant.const import (
     ATTR_ENTITY_ID, CONF_PLATFORM, STATE_ON, SERVICE_TURN_ON, SERVICE_TURN_OFF,
@@ -49,6 +50,9 @@ DEFAULT_HIDE_ENTITY = False
 DEFAULT_INITIAL_STATE = True
 
 ATTR_LAST_TRIGGERED = 'last_triggered'
+ATTR_RUN_COUNT = 'run_count'
+ATTR_RUNS = 'runs'
+ATTR_LAST_RUN_DURATION = 'last_run_duration'
 ATTR_VARIABLES = 'variables'
 SERVICE_TRIGGER = 'trigger'
 
@@ -87,7 +91,7 @@ PLATFORM_SCHEMA = vol.Schema({
     vol.Required(CONF_TRIGGER): _TRIGGER_SCHEMA,
     vol.Optional(CONF_CONDITION): _CONDITION_SCHEMA,
     vol.Required(CONF_ACTION): cv.SCRIPT_SCHEMA,
-})
+}).extend(script.SCRIPT_MODE_SCHEMA)
 
 SERVICE_SCHEMA = vol.Schema({
     vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
@@ -224,15 +228,18 @@ class AutomationEntity(ToggleEntity):
     """Entity to show status of entity."""
 
     def __init__(self, name, async_attach_triggers, cond_func, async_action,
-                 hidden, initial_state):
+                 hidden, initial_state, script_obj=None):
         """Initialize an automation entity."""
         self._name = name
+        self._script = script_obj
         self._async_attach_triggers = async_attach_triggers
         self._async_detach_triggers = None
         self._cond_func = cond_func
         self._async_action = async_action
         self._enabled = False
         self._last_triggered = None
+        # Number of triggers that will update the state when done
+        self._triggering = 0
         self._hidden = hidden
         self._initial_state = initial_state
 
@@ -249,10 +256,20 @@ class AutomationEntity(ToggleEntity):
     @property
     def state_attributes(self):
         """Return the entity state attributes."""
-        return {
+        attrs = {
             ATTR_LAST_TRIGGERED: self._last_triggered
         }
 
+        if self._script is not None:
+            attrs[ATTR_RUN_COUNT] = self._script.run_count
+            if self._script.mode != script.MODE_LEGACY:
+                attrs[ATTR_RUNS] = self._script.runs
+            if self._script.last_run_duration is not None:
+                attrs[ATTR_LAST_RUN_DURATION] = round(
+                    self._script.last_run_duration, 3)
+
+        return attrs
+
     @property
     def hidden(self) -> bool:
         """Return True if the automation entity should be hidden from UIs."""
@@ -263,9 +280,32 @@ class AutomationEntity(ToggleEntity):
         """Return True if entity is on."""
         return self._enabled
 
+    @callback
+    def async_script_changed(self):
+        """Update the state if a run changed it after it was triggered.
+
+        Changes made while the automation is triggered are already part of
+        the state update at the end of async_trigger.
+        """
+        if self._triggering:
+            return
+
+        state = self.hass.states.get(self.entity_id)
+
+        if state is not None and all(
+                state.attributes.get(key) == value
+                for key, value in self.state_attributes.items()):
+            return
+
+        self.hass.async_add_job(self.async_update_ha_state())
+
     @asyncio.coroutine
     def async_added_to_hass(self) -> None:
         """Startup with initial state or previous state."""
+        if self._script is not None:
+            # Show runs that end after a delay or wait without a new trigger
+            self._script.change_listener = self.async_script_changed
+
         state = yield from async_get_last_state(self.hass, self.entity_id)
         if state is None:
             if self._initial_state:
@@ -302,7 +342,11 @@ class AutomationEntity(ToggleEntity):
         This method is a coroutine.
         """
         if skip_condition or self._cond_func(variables):
-            yield from self._async_action(self.entity_id, variables)
+            self._triggering += 1
+            try:
+                yield from self._async_action(self.entity_id, variables)
+            finally:
+                self._triggering -= 1
             self._last_triggered = utcnow()
             yield from self.async_update_ha_state()
 
@@ -344,8 +388,11 @@ def _async_process_config(hass, config, component):
             hidden = config_block[CONF_HIDE_ENTITY]
             initial_state = config_block[CONF_INITIAL_STATE]
 
-            action = _async_get_action(hass, config_block.get(CONF_ACTION, {}),
-                                       name)
+            script_obj = script.Script(
+                hass, config_block.get(CONF_ACTION, {}), name,
+                mode=config_block[script.CONF_MODE],
+                max_runs=config_block[script.CONF_MAX])
+            action = _async_get_action(hass, script_obj, name)
 
             if CONF_CONDITION in config_block:
                 cond_func = _async_process_if(hass, config, config_block)
@@ -363,7 +410,7 @@ def _async_process_config(hass, config, component):
             )
             entity = AutomationEntity(
                 name, async_attach_triggers, cond_func, action, hidden,
-                initial_state)
+                initial_state, script_obj)
 
             entities.append(entity)
 
@@ -373,10 +420,8 @@ def _async_process_config(hass, config, component):
     return len(entities) > 0
 
 
-def _async_get_action(hass, config, name):
-    """Return an action based on a configuration."""
-    script_obj = script.Script(hass, config, name)
-
+def _async_get_action(hass, script_obj, name):
+    """Return an action running the script of an automation."""
     @asyncio.coroutine
     def action(entity_id, variables):
         """Action to be executed."""
@@ -393,7 +438,7 @@ def _async_process_if(hass, config, p_config):
     if_configs = p_config.get(CONF_CONDITION)
 
     checks = []
-    for if_config in if_configs:
+    for if_config in condition.sort_by_cost(if_configs):
         try:
             checks.append(condition.async_from_config(if_config, False))
         except HomeAssistantError as ex:
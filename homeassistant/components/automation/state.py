@@ -11,7 +11,7 @@ from homeassistant.core import callback
 import homeassistant.util.dt as dt_util
 from homeassistant.const import MATCH_ALL, CONF_PLATFORM
 from homeassistant.helpers.event import (
-    async_track_state_change, async_track_point_in_utc_time)
+    async_track_entity_state_change, async_track_point_in_utc_time)
 import homeassistant.helpers.config_validation as cv
 
 CONF_ENTITY_ID = "entity_id"
@@ -100,10 +100,10 @@ def async_trigger(hass, config, action):
         async_remove_state_for_listener = async_track_point_in_utc_time(
             hass, state_for_listener, dt_util.utcnow() + time_delta)
 
-        async_remove_state_for_cancel = async_track_state_change(
+        async_remove_state_for_cancel = async_track_entity_state_change(
             hass, entity, state_for_cancel_listener)
 
-    unsub = async_track_state_change(
+    unsub = async_track_entity_state_change(
         hass, entity_id, state_automation_listener, from_state, to_state)
 
     @callback
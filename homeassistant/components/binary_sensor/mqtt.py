@@ -40,13 +40,21 @@ PLATFORM_SCHEMA = mqtt.MQTT_RO_PLATFORM_SCHEMA.extend({
 def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Set up the MQTT binary sensor."""
     if discovery_info is not None:
-        config = PLATFORM_SCHEMA(discovery_info)
+        configs = mqtt.validate_discovery_info(
+            discovery_info, PLATFORM_SCHEMA)
+    else:
+        configs = [config]
 
+    async_add_devices([_create_binary_sensor(hass, conf) for conf in configs])
+
+
+def _create_binary_sensor(hass, config):
+    """Create a binary sensor from a validated config."""
     value_template = config.get(CONF_VALUE_TEMPLATE)
     if value_template is not None:
         value_template.hass = hass
 
-    async_add_devices([MqttBinarySensor(
+    return MqttBinarySensor(
         config.get(CONF_NAME),
         config.get(CONF_STATE_TOPIC),
         get_deprecated(config, CONF_DEVICE_CLASS, CONF_SENSOR_CLASS),
@@ -54,7 +62,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
         config.get(CONF_PAYLOAD_ON),
         config.get(CONF_PAYLOAD_OFF),
         value_template
-    )])
+    )
 
 
 class MqttBinarySensor(BinarySensorDevice):
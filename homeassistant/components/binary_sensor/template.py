@@ -21,7 +21,9 @@ from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.deprecation import get_deprecated
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_render_info, async_track_state_change)
+from homeassistant.helpers.template import RenderInfo
 from homeassistant.helpers.restore_state import async_get_last_state
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,8 +48,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
 
     for device, device_config in config[CONF_SENSORS].items():
         value_template = device_config[CONF_VALUE_TEMPLATE]
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      value_template.extract_entities())
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         device_class = get_deprecated(
             device_config, CONF_DEVICE_CLASS, CONF_SENSOR_CLASS)
@@ -86,6 +87,7 @@ class BinarySensorTemplate(BinarySensorDevice):
         self._template = value_template
         self._state = None
         self._entities = entity_ids
+        self._render_info = RenderInfo()
 
     @asyncio.coroutine
     def async_added_to_hass(self):
@@ -102,8 +104,13 @@ class BinarySensorTemplate(BinarySensorDevice):
         @callback
         def template_bsensor_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_bsensor_state_listener)
+            if self._entities is None:
+                # Follow the states the templates used in the last update
+                async_track_render_info(self.hass, self._render_info,
+                                        template_bsensor_state_listener)
+            else:
+                async_track_state_change(
+                    self.hass, self._entities, template_bsensor_state_listener)
 
             self.hass.async_add_job(self.async_update_ha_state(True))
 
@@ -133,8 +140,11 @@ class BinarySensorTemplate(BinarySensorDevice):
     @asyncio.coroutine
     def async_update(self):
         """Update the state from the template."""
+        self._render_info.clear()
+
         try:
-            self._state = self._template.async_render().lower() == 'true'
+            self._state = self._template.async_render_tracked(
+                self._render_info).lower() == 'true'
         except TemplateError as ex:
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
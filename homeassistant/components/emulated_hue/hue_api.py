@@ -69,17 +69,26 @@ class HueAllLightsStateView(HomeAssistantView):
     def get(self, request, username):
         """Process a request to get the list of available lights."""
         hass = request.app['hass']
-        json_response = {}
+        # Reported states also depend on the states cached for Alexa
+        generation = (hass.states.generation,
+                      frozenset(self.config.cached_states.items()))
 
-        for entity in hass.states.async_all():
-            if self.config.is_entity_exposed(entity):
-                state, brightness = get_entity_state(self.config, entity)
+        def create_result():
+            """Convert all exposed entities to Hue lights."""
+            json_response = {}
 
-                number = self.config.entity_id_to_number(entity.entity_id)
-                json_response[number] = entity_to_json(
-                    entity, state, brightness)
+            for entity in hass.states.async_all():
+                if self.config.is_entity_exposed(entity):
+                    state, brightness = get_entity_state(self.config, entity)
 
-        return self.json(json_response)
+                    number = self.config.entity_id_to_number(
+                        entity.entity_id)
+                    json_response[number] = entity_to_json(
+                        entity, state, brightness)
+
+            return json_response
+
+        return self.json_cached(request, generation, create_result)
 
 
 class HueOneLightStateView(HomeAssistantView):
@@ -5,15 +5,18 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/http/
 """
 import asyncio
+from collections import defaultdict
+import hashlib
 import json
 import logging
 import ssl
 from ipaddress import ip_network
 from pathlib import Path
+from time import monotonic
 
 import os
 import voluptuous as vol
-from aiohttp import web
+from aiohttp import hdrs, web
 from aiohttp.web_exceptions import HTTPUnauthorized, HTTPMovedPermanently
 
 import homeassistant.helpers.config_validation as cv
@@ -22,7 +25,7 @@ import homeassistant.util as hass_util
 from homeassistant.const import (
     SERVER_PORT, CONTENT_TYPE_JSON, ALLOWED_CORS_HEADERS,
     EVENT_HOMEASSISTANT_STOP, EVENT_HOMEASSISTANT_START)
-from homeassistant.core import is_callback
+from homeassistant.core import callback, is_callback
 from homeassistant.util.logging import HideSensitiveDataFilter
 
 from .auth import auth_middleware
@@ -30,9 +33,9 @@ from .ban import ban_middleware
 from .const import (
     KEY_USE_X_FORWARDED_FOR, KEY_TRUSTED_NETWORKS,
     KEY_BANS_ENABLED, KEY_LOGIN_THRESHOLD,
-    KEY_DEVELOPMENT, KEY_AUTHENTICATED)
+    KEY_DEVELOPMENT, KEY_AUTHENTICATED, KEY_REQUEST_STATS)
 from .static import FILE_SENDER, CACHING_FILE_SENDER, staticresource_middleware
-from .util import get_real_ip
+from .util import get_real_ip, LatencyHistogram, TrustedNetworks
 
 DOMAIN = 'http'
 REQUIREMENTS = ('aiohttp_cors==0.5.0',)
@@ -154,6 +157,7 @@ def async_setup(hass, config):
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_START, start_server)
 
     hass.http = server
+    server.register_view(HTTPStatsView)
 
     host = conf.get(CONF_BASE_URL)
 
@@ -190,10 +194,11 @@ class HomeAssistantWSGI(object):
         self.app = web.Application(middlewares=middlewares, loop=hass.loop)
         self.app['hass'] = hass
         self.app[KEY_USE_X_FORWARDED_FOR] = use_x_forwarded_for
-        self.app[KEY_TRUSTED_NETWORKS] = trusted_networks
+        self.app[KEY_TRUSTED_NETWORKS] = TrustedNetworks(trusted_networks)
         self.app[KEY_BANS_ENABLED] = is_ban_enabled
         self.app[KEY_LOGIN_THRESHOLD] = login_threshold
         self.app[KEY_DEVELOPMENT] = development
+        self.app[KEY_REQUEST_STATS] = defaultdict(LatencyHistogram)
 
         self.hass = hass
         self.development = development
@@ -360,6 +365,31 @@ class HomeAssistantView(object):
         """Return a JSON message response."""
         return self.json({'message': error}, status_code)
 
+    def json_cached(self, request, generation, create_result):
+        """Return a JSON response that supports conditional GET requests.
+
+        The encoded body is kept until generation changes; create_result is
+        only called to build a new body. Clients that send the current ETag
+        in If-None-Match get a 304 without a body.
+        """
+        cached = getattr(self, '_json_cache', None)
+
+        if cached is None or cached[0] != generation:
+            body = json.dumps(
+                create_result(), sort_keys=True,
+                cls=rem.JSONEncoder).encode('UTF-8')
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+            cached = self._json_cache = (generation, body, etag)
+
+        _, body, etag = cached
+        headers = {hdrs.ETAG: etag, hdrs.CACHE_CONTROL: 'no-cache'}
+
+        if etag_matches(request.headers.get(hdrs.IF_NONE_MATCH), etag):
+            return web.Response(status=304, headers=headers)
+
+        return web.Response(
+            body=body, content_type=CONTENT_TYPE_JSON, headers=headers)
+
     @asyncio.coroutine
     # pylint: disable=no-self-use
     def file(self, request, fil):
@@ -391,25 +421,71 @@ class HomeAssistantView(object):
         #     self.app.router.add_route('*', url, self)
 
 
+class HTTPStatsView(HomeAssistantView):
+    """View to serve the request latency histograms per view."""
+
+    url = '/api/http_stats'
+    name = 'api:http-stats'
+
+    @callback
+    def get(self, request):
+        """Return the request latency histograms."""
+        return self.json({
+            name: histogram.as_dict() for name, histogram
+            in request.app[KEY_REQUEST_STATS].items()})
+
+
+def etag_matches(if_none_match, etag):
+    """Test if an If-None-Match header value matches an ETag."""
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+
+        if candidate in ('*', etag):
+            return True
+
+    return False
+
+
 def request_handler_factory(view, handler):
     """Factory to wrap our handler classes."""
     assert asyncio.iscoroutinefunction(handler) or is_callback(handler), \
         "Handler should be a coroutine or a callback."
 
+    name = getattr(view, 'name', None)
+
     @asyncio.coroutine
     def handle(request):
         """Handle incoming request."""
+        start = monotonic()
+
+        try:
+            return (yield from _async_handle(request))
+        finally:
+            stats = request.app.get(KEY_REQUEST_STATS)
+
+            if stats is not None:
+                stats[name].add(monotonic() - start)
+
+    @asyncio.coroutine
+    def _async_handle(request):
+        """Call the handler and convert its result into a response."""
         if not request.app['hass'].is_running:
             return web.Response(status=503)
 
-        remote_addr = get_real_ip(request)
         authenticated = request.get(KEY_AUTHENTICATED, False)
 
         if view.requires_auth and not authenticated:
             raise HTTPUnauthorized()
 
-        _LOGGER.info('Serving %s to %s (auth: %s)',
-                     request.path, remote_addr, authenticated)
+        if _LOGGER.isEnabledFor(logging.INFO):
+            _LOGGER.info('Serving %s to %s (auth: %s)',
+                         request.path, get_real_ip(request), authenticated)
 
         result = handler(request, **request.match_info)
 
@@ -40,18 +40,15 @@ def ban_middleware(app, handler):
 
     if KEY_BANNED_IPS not in app:
         hass = app['hass']
-        app[KEY_BANNED_IPS] = yield from hass.loop.run_in_executor(
+        ip_bans = yield from hass.loop.run_in_executor(
             None, load_ip_bans_config, hass.config.path(IP_BANS_FILE))
+        app[KEY_BANNED_IPS] = {ip_ban.ip_address: ip_ban
+                               for ip_ban in ip_bans}
 
     @asyncio.coroutine
     def ban_middleware_handler(request):
         """Verify if IP is not banned."""
-        ip_address_ = get_real_ip(request)
-
-        is_banned = any(ip_ban.ip_address == ip_address_
-                        for ip_ban in request.app[KEY_BANNED_IPS])
-
-        if is_banned:
+        if get_real_ip(request) in request.app[KEY_BANNED_IPS]:
             raise HTTPForbidden()
 
         try:
@@ -87,7 +84,7 @@ def process_wrong_login(request):
     if (request.app[KEY_FAILED_LOGIN_ATTEMPTS][remote_addr] >
             request.app[KEY_LOGIN_THRESHOLD]):
         new_ban = IpBan(remote_addr)
-        request.app[KEY_BANNED_IPS].append(new_ban)
+        request.app[KEY_BANNED_IPS][new_ban.ip_address] = new_ban
 
         hass = request.app['hass']
         yield from hass.loop.run_in_executor(
@@ -8,5 +8,6 @@ KEY_BANNED_IPS = 'ha_banned_ips'
 KEY_FAILED_LOGIN_ATTEMPTS = 'ha_failed_login_attempts'
 KEY_LOGIN_THRESHOLD = 'ha_login_treshold'
 KEY_DEVELOPMENT = 'ha_development'
+KEY_REQUEST_STATS = 'ha_request_stats'
 
 HTTP_HEADER_X_FORWARDED_FOR = 'X-Forwarded-For'
@@ -1,37 +1,185 @@
 """Static file handling for HTTP component."""
 import asyncio
+from collections import OrderedDict, namedtuple
+import gzip
+import mimetypes
 import re
 
 from aiohttp import hdrs
 from aiohttp.file_sender import FileSender
+from aiohttp.web import Response
+from aiohttp.web_exceptions import HTTPNotModified
 from aiohttp.web_urldispatcher import StaticResource
 from .const import KEY_DEVELOPMENT
 
 _FINGERPRINT = re.compile(r'^(.+)-[a-z0-9]{32}\.(\w+)$', re.IGNORECASE)
+_COMPRESSIBLE = re.compile(
+    r'^(text/.+|application/(javascript|json|xml)|image/svg\+xml)$')
+
+CACHE_TIME = 31 * 86400  # = 1 month
+
+# Total size in bytes of all cached files and their compressed versions
+STATIC_CACHE_SIZE = 8 * 1024 * 1024
+# Files bigger than this are sent from disk using sendfile
+STATIC_CACHE_MAX_FILE_SIZE = 512 * 1024
+# Files smaller than this are not worth compressing
+GZIP_MIN_SIZE = 256
+# Compression only happens once per file so use the best ratio
+GZIP_LEVEL = 9
+
+CachedFile = namedtuple(
+    'CachedFile', 'mtime, size, content_type, body, gzip_body')
+
+
+class StaticFileCache(object):
+    """Bounded LRU cache of file contents."""
+
+    def __init__(self, max_size=STATIC_CACHE_SIZE):
+        """Initialize the cache."""
+        self.max_size = max_size
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """Return the number of cached files."""
+        return len(self._entries)
+
+    def get(self, key, stat):
+        """Return cached file if it is still up to date with stat."""
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        if entry.mtime != stat.st_mtime or entry.size != stat.st_size:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        """Add a file, evicting the least recently used files if full."""
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = entry
+        self.size += _entry_size(entry)
+
+        while self.size > self.max_size:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def _remove(self, key):
+        """Remove a file from the cache."""
+        self.size -= _entry_size(self._entries.pop(key))
+
+
+def _entry_size(entry):
+    """Return the memory used by a cache entry."""
+    return len(entry.body) + len(entry.gzip_body or b'')
+
+
+def load_file(filepath, stat):
+    """Read a file and compress it if that is worthwhile.
+
+    Will use a pre-compressed file next to it if that is up to date.
+    This method does I/O and should run in the executor.
+    """
+    content_type, encoding = mimetypes.guess_type(str(filepath))
+    body = filepath.read_bytes()
+    gzip_body = None
+
+    if encoding is None and len(body) >= GZIP_MIN_SIZE and \
+            _COMPRESSIBLE.match(content_type or ''):
+        gzip_path = filepath.with_name(filepath.name + '.gz')
+
+        if gzip_path.is_file() and gzip_path.stat().st_mtime >= stat.st_mtime:
+            gzip_body = gzip_path.read_bytes()
+        else:
+            gzip_body = gzip.compress(body, GZIP_LEVEL)
+
+        if len(gzip_body) >= len(body):
+            gzip_body = None
+
+    return CachedFile(stat.st_mtime, stat.st_size,
+                      content_type or 'application/octet-stream',
+                      body, gzip_body)
+
+
+def add_cache_headers(request, resp):
+    """Allow browsers to cache the response if not in dev mode."""
+    if not request.app[KEY_DEVELOPMENT]:
+        resp.headers[hdrs.CACHE_CONTROL] = "public, max-age={}".format(
+            CACHE_TIME)
 
 
 class CachingFileSender(FileSender):
-    """FileSender class that caches output if not in dev mode."""
+    """FileSender class that caches output if not in dev mode.
+
+    Small files are kept in memory together with a gzip compressed version,
+    big files, encoded files and range requests are served from disk.
+    """
 
     def __init__(self, *args, **kwargs):
         """Initialize the hass file sender."""
         super().__init__(*args, **kwargs)
+        self.cache = StaticFileCache()
 
         orig_sendfile = self._sendfile
 
         @asyncio.coroutine
         def sendfile(request, resp, fobj, count):
             """Sendfile that includes a cache header."""
-            if not request.app[KEY_DEVELOPMENT]:
-                cache_time = 31 * 86400  # = 1 month
-                resp.headers[hdrs.CACHE_CONTROL] = "public, max-age={}".format(
-                    cache_time)
+            add_cache_headers(request, resp)
 
             yield from orig_sendfile(request, resp, fobj, count)
 
         # Overwriting like this because __init__ can change implementation.
         self._sendfile = sendfile
 
+    @asyncio.coroutine
+    def send(self, request, filepath):
+        """Send filepath to client using request."""
+        stat = filepath.stat()
+
+        # Files like .js.gz are sent with their Content-Encoding by FileSender
+        if stat.st_size > STATIC_CACHE_MAX_FILE_SIZE or \
+                hdrs.RANGE in request.headers or \
+                mimetypes.guess_type(str(filepath))[1] is not None:
+            resp = yield from super().send(request, filepath)
+            return resp
+
+        # HTTP dates have a resolution of a second
+        modsince = request.if_modified_since
+        if modsince is not None and \
+                int(stat.st_mtime) <= modsince.timestamp():
+            raise HTTPNotModified()
+
+        key = str(filepath)
+        entry = self.cache.get(key, stat)
+
+        if entry is None:
+            entry = yield from request.app['hass'].loop.run_in_executor(
+                None, load_file, filepath, stat)
+            self.cache.put(key, entry)
+
+        body = entry.body
+        headers = {}
+
+        if entry.gzip_body is not None:
+            headers[hdrs.VARY] = hdrs.ACCEPT_ENCODING
+
+            if 'gzip' in request.headers.get(hdrs.ACCEPT_ENCODING, ''):
+                body = entry.gzip_body
+                headers[hdrs.CONTENT_ENCODING] = 'gzip'
+
+        resp = Response(
+            body=body, content_type=entry.content_type, headers=headers)
+        resp.last_modified = stat.st_mtime
+        add_cache_headers(request, resp)
+        return resp
+
 
 FILE_SENDER = FileSender()
 CACHING_FILE_SENDER = CachingFileSender()
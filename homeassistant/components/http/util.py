@@ -1,5 +1,6 @@
 """HTTP utilities."""
-from ipaddress import ip_address
+from bisect import bisect_left
+from ipaddress import ip_address, ip_network
 
 from .const import (
     KEY_REAL_IP, KEY_USE_X_FORWARDED_FOR, HTTP_HEADER_X_FORWARDED_FOR)
@@ -23,3 +24,86 @@ def get_real_ip(request):
             request[KEY_REAL_IP] = None
 
     return request[KEY_REAL_IP]
+
+
+class TrustedNetworks(object):
+    """Collection of networks that can quickly test if it holds an address.
+
+    The networks are stored as integers per IP version and prefix length.
+    Testing an address costs one set lookup per distinct prefix length
+    instead of a comparison with every network.
+    """
+
+    def __init__(self, networks=()):
+        """Initialize the collection."""
+        # IP version -> prefix length -> (netmask, network addresses)
+        self._networks = {4: {}, 6: {}}
+
+        for network in networks:
+            self.add(network)
+
+    def add(self, network):
+        """Add a network."""
+        network = ip_network(network)
+        prefixes = self._networks[network.version]
+
+        if network.prefixlen not in prefixes:
+            prefixes[network.prefixlen] = (int(network.netmask), set())
+
+        prefixes[network.prefixlen][1].add(int(network.network_address))
+
+    def __contains__(self, address):
+        """Test if an address is part of one of the networks."""
+        if address is None:
+            return False
+
+        value = int(address)
+
+        return any(value & netmask in addresses for netmask, addresses
+                   in self._networks[address.version].values())
+
+    def __bool__(self):
+        """Return if there are any networks."""
+        return bool(self._networks[4] or self._networks[6])
+
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10)
+
+
+class LatencyHistogram(object):
+    """Histogram of request latencies."""
+
+    __slots__ = ['buckets', 'count', 'total']
+
+    def __init__(self):
+        """Initialize the histogram."""
+        # The last bucket holds everything above the highest bound
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, duration):
+        """Record the duration of a request in seconds."""
+        self.buckets[bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+
+    def as_dict(self):
+        """Return a dict representation of the histogram.
+
+        Bucket counts are cumulative, like Prometheus histograms.
+        """
+        buckets = {}
+        cumulative = 0
+
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), self.buckets):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'buckets': buckets,
+        }
@@ -94,12 +94,20 @@ PLATFORM_SCHEMA = mqtt.MQTT_RW_PLATFORM_SCHEMA.extend({
 def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Add MQTT Light."""
     if discovery_info is not None:
-        config = PLATFORM_SCHEMA(discovery_info)
+        configs = mqtt.validate_discovery_info(
+            discovery_info, PLATFORM_SCHEMA)
+    else:
+        configs = [config]
 
+    async_add_devices([_create_light(conf) for conf in configs])
+
+
+def _create_light(config):
+    """Create a light from a validated config."""
     config.setdefault(
         CONF_STATE_VALUE_TEMPLATE, config.get(CONF_VALUE_TEMPLATE))
 
-    async_add_devices([MqttLight(
+    return MqttLight(
         config.get(CONF_NAME),
         config.get(CONF_EFFECT_LIST),
         {
@@ -138,7 +146,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
         config.get(CONF_OPTIMISTIC),
         config.get(CONF_BRIGHTNESS_SCALE),
         config.get(CONF_WHITE_VALUE_SCALE),
-    )])
+    )
 
 
 class MqttLight(Light):
@@ -73,8 +73,17 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
 def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Setup a MQTT JSON Light."""
     if discovery_info is not None:
-        config = PLATFORM_SCHEMA(discovery_info)
-    async_add_devices([MqttJson(
+        configs = mqtt.validate_discovery_info(
+            discovery_info, PLATFORM_SCHEMA)
+    else:
+        configs = [config]
+
+    async_add_devices([_create_light(conf) for conf in configs])
+
+
+def _create_light(config):
+    """Create a light from a validated config."""
+    return MqttJson(
         config.get(CONF_NAME),
         config.get(CONF_EFFECT_LIST),
         {
@@ -98,7 +107,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
                 CONF_FLASH_TIME_LONG
             )
         }
-    )])
+    )
 
 
 class MqttJson(Light):
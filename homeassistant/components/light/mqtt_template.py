@@ -67,9 +67,17 @@ PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
 def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Setup a MQTT Template light."""
     if discovery_info is not None:
-        config = PLATFORM_SCHEMA(discovery_info)
+        configs = mqtt.validate_discovery_info(
+            discovery_info, PLATFORM_SCHEMA)
+    else:
+        configs = [config]
 
-    async_add_devices([MqttTemplate(
+    async_add_devices([_create_light(hass, conf) for conf in configs])
+
+
+def _create_light(hass, config):
+    """Create a light from a validated config."""
+    return MqttTemplate(
         hass,
         config.get(CONF_NAME),
         config.get(CONF_EFFECT_LIST),
@@ -96,7 +104,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
         config.get(CONF_OPTIMISTIC),
         config.get(CONF_QOS),
         config.get(CONF_RETAIN)
-    )])
+    )
 
 
 class MqttTemplate(Light):
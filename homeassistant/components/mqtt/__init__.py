@@ -8,7 +8,6 @@ import asyncio
 import logging
 import os
 import socket
-import time
 import requests.certs
 
 import voluptuous as vol
@@ -19,19 +18,21 @@ from homeassistant.config import load_yaml_config_file
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import template, config_validation as cv
 from homeassistant.helpers.dispatcher import (
-    async_dispatcher_connect, dispatcher_send)
+    async_dispatcher_connect, async_dispatcher_send, dispatcher_send)
 from homeassistant.util.async import (
     run_coroutine_threadsafe, run_callback_threadsafe)
 from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP, CONF_VALUE_TEMPLATE, CONF_USERNAME,
     CONF_PASSWORD, CONF_PORT, CONF_PROTOCOL, CONF_PAYLOAD)
-from homeassistant.components.mqtt.server import HBMQTT_CONFIG_SCHEMA
+from homeassistant.components.mqtt.server import (
+    DATA_EMBEDDED_BROKER, HBMQTT_CONFIG_SCHEMA)
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = 'mqtt'
 
 DATA_MQTT = 'mqtt'
+DATA_MQTT_ROUTER = 'mqtt_router'
 
 SERVICE_PUBLISH = 'publish'
 SIGNAL_MQTT_MESSAGE_RECEIVED = 'mqtt_message_received'
@@ -76,6 +77,15 @@ ATTR_RETAIN = CONF_RETAIN
 
 MAX_RECONNECT_WAIT = 300  # seconds
 
+# Maximum number of topics in a single SUBSCRIBE packet
+SUBSCRIBE_BATCH_SIZE = 100
+# Granted QoS in a SUBACK for a refused subscription
+SUBACK_FAILURE = 128
+# hbmqtt broker attributes used to talk to the embedded broker in-process
+EMBEDDED_BROKER_ATTRIBUTES = (
+    '_broadcast_message', '_retained_messages', 'internal_message_broadcast',
+    'retain_message')
+
 
 def valid_subscribe_topic(value, invalid_chars='\0'):
     """Validate that we can subscribe using this MQTT topic."""
@@ -197,16 +207,21 @@ def publish_template(hass, topic, payload_template, qos=None, retain=None):
 @asyncio.coroutine
 def async_subscribe(hass, topic, msg_callback, qos=DEFAULT_QOS):
     """Subscribe to an MQTT topic."""
-    @callback
-    def async_mqtt_topic_subscriber(dp_topic, dp_payload, dp_qos):
-        """Match subscribed MQTT topic."""
-        if not _match_topic(topic, dp_topic):
-            return
+    router = hass.data.get(DATA_MQTT_ROUTER)
+
+    if router is None:
+        router = hass.data[DATA_MQTT_ROUTER] = TopicRouter()
 
-        hass.async_run_job(msg_callback, dp_topic, dp_payload, dp_qos)
+        @callback
+        def async_route_message(dp_topic, dp_payload, dp_qos):
+            """Pass a received message to the matching subscriptions."""
+            for target in router.match(dp_topic):
+                hass.async_run_job(target, dp_topic, dp_payload, dp_qos)
 
-    async_remove = async_dispatcher_connect(
-        hass, SIGNAL_MQTT_MESSAGE_RECEIVED, async_mqtt_topic_subscriber)
+        async_dispatcher_connect(
+            hass, SIGNAL_MQTT_MESSAGE_RECEIVED, async_route_message)
+
+    async_remove = router.add(topic, msg_callback)
 
     yield from hass.data[DATA_MQTT].async_subscribe(topic, qos)
     return async_remove
@@ -226,10 +241,30 @@ def subscribe(hass, topic, msg_callback, qos=DEFAULT_QOS):
     return remove
 
 
+def validate_discovery_info(discovery_info, schema):
+    """Validate the device configs found by MQTT discovery.
+
+    Invalid configs are logged and left out so they don't prevent the other
+    devices of the same batch from being set up.
+    """
+    configs = []
+
+    for info in discovery_info:
+        try:
+            configs.append(schema(info))
+        except vol.Invalid as err:
+            _LOGGER.error("Invalid discovered config %s: %s", info, err)
+
+    return configs
+
+
 @asyncio.coroutine
 def _async_setup_server(hass, config):
     """Try to start embedded MQTT broker.
 
+    Returns if it started and the config to connect to it over the network
+    if it was generated.
+
     This method is a coroutine.
     """
     conf = config.get(DOMAIN, {})
@@ -239,12 +274,11 @@ def _async_setup_server(hass, config):
 
     if server is None:
         _LOGGER.error("Unable to load embedded server")
-        return None
+        return False, None
 
-    success, broker_config = \
-        yield from server.async_start(hass, conf.get(CONF_EMBEDDED))
+    result = yield from server.async_start(hass, conf.get(CONF_EMBEDDED))
 
-    return success and broker_config
+    return result
 
 
 @asyncio.coroutine
@@ -268,42 +302,19 @@ def _async_setup_discovery(hass, config):
     return success
 
 
-@asyncio.coroutine
-def async_setup(hass, config):
-    """Start the MQTT protocol service."""
-    conf = config.get(DOMAIN, {})
-
+def _create_client(hass, conf, will_message, birth_message):
+    """Create the client for the broker in the config."""
     client_id = conf.get(CONF_CLIENT_ID)
     keepalive = conf.get(CONF_KEEPALIVE)
-
-    # Only setup if embedded config passed in or no broker specified
-    if CONF_EMBEDDED not in conf and CONF_BROKER in conf:
-        broker_config = None
-    else:
-        broker_config = yield from _async_setup_server(hass, config)
-
-    if CONF_BROKER in conf:
-        broker = conf[CONF_BROKER]
-        port = conf[CONF_PORT]
-        username = conf.get(CONF_USERNAME)
-        password = conf.get(CONF_PASSWORD)
-        certificate = conf.get(CONF_CERTIFICATE)
-        client_key = conf.get(CONF_CLIENT_KEY)
-        client_cert = conf.get(CONF_CLIENT_CERT)
-        tls_insecure = conf.get(CONF_TLS_INSECURE)
-        protocol = conf[CONF_PROTOCOL]
-    elif broker_config:
-        # If no broker passed in, auto config to internal server
-        broker, port, username, password, certificate, protocol = broker_config
-        # Embedded broker doesn't have some ssl variables
-        client_key, client_cert, tls_insecure = None, None, None
-    else:
-        err = "Unable to start MQTT broker."
-        if conf.get(CONF_EMBEDDED) is not None:
-            # Explicit embedded config, requires explicit broker config
-            err += " (Broker configuration required.)"
-        _LOGGER.error(err)
-        return False
+    broker = conf[CONF_BROKER]
+    port = conf[CONF_PORT]
+    username = conf.get(CONF_USERNAME)
+    password = conf.get(CONF_PASSWORD)
+    certificate = conf.get(CONF_CERTIFICATE)
+    client_key = conf.get(CONF_CLIENT_KEY)
+    client_cert = conf.get(CONF_CLIENT_CERT)
+    tls_insecure = conf.get(CONF_TLS_INSECURE)
+    protocol = conf[CONF_PROTOCOL]
 
     # For cloudmqtt.com, secured connection, auto fill in certificate
     if certificate is None and 19999 < port < 30000 and \
@@ -315,17 +326,58 @@ def async_setup(hass, config):
     if certificate is None and port == 8883:
         certificate = requests.certs.where()
 
+    return MQTT(
+        hass, broker, port, client_id, keepalive, username, password,
+        certificate, client_key, client_cert, tls_insecure, protocol,
+        will_message, birth_message)
+
+
+@asyncio.coroutine
+def async_setup(hass, config):
+    """Start the MQTT protocol service."""
+    conf = config.get(DOMAIN, {})
+
+    # Only setup if embedded config passed in or no broker specified
+    if CONF_EMBEDDED not in conf and CONF_BROKER in conf:
+        embedded, client_config = False, None
+    else:
+        embedded, client_config = yield from _async_setup_server(hass, config)
+
     will_message = conf.get(CONF_WILL_MESSAGE)
     birth_message = conf.get(CONF_BIRTH_MESSAGE)
 
-    try:
-        hass.data[DATA_MQTT] = MQTT(
-            hass, broker, port, client_id, keepalive, username, password,
-            certificate, client_key, client_cert, tls_insecure, protocol,
-            will_message, birth_message)
-    except socket.error:
-        _LOGGER.exception("Can't connect to the broker. "
-                          "Please check your settings and the broker itself")
+    if embedded and CONF_BROKER not in conf and \
+            not _embedded_broker_supported(hass.data[DATA_EMBEDDED_BROKER]):
+        if client_config is None:
+            _LOGGER.error("Unable to use the embedded MQTT broker in-process "
+                          "(Broker configuration required.)")
+            return False
+
+        _LOGGER.warning("Unable to use the embedded MQTT broker in-process, "
+                        "connecting to it over the network")
+        broker, port, username, password, certificate, protocol = \
+            client_config
+        conf = dict(conf, **{
+            CONF_BROKER: broker, CONF_PORT: port, CONF_USERNAME: username,
+            CONF_PASSWORD: password, CONF_CERTIFICATE: certificate,
+            CONF_PROTOCOL: protocol,
+            CONF_KEEPALIVE: conf.get(CONF_KEEPALIVE, DEFAULT_KEEPALIVE)})
+
+    if CONF_BROKER in conf:
+        try:
+            hass.data[DATA_MQTT] = _create_client(
+                hass, conf, will_message, birth_message)
+        except socket.error:
+            _LOGGER.exception("Can't connect to the broker. "
+                              "Please check your settings and the broker "
+                              "itself")
+            return False
+    elif embedded:
+        # If no broker passed in, talk to the internal server in-process
+        hass.data[DATA_MQTT] = EmbeddedMQTT(
+            hass, hass.data[DATA_EMBEDDED_BROKER], birth_message)
+    else:
+        _LOGGER.error("Unable to start MQTT broker.")
         return False
 
     @asyncio.coroutine
@@ -339,7 +391,7 @@ def async_setup(hass, config):
     if not success:
         return False
 
-    @asyncio.coroutine
+    @callback
     def async_publish_service(call):
         """Handle MQTT publish service calls."""
         msg_topic = call.data[ATTR_TOPIC]
@@ -358,8 +410,8 @@ def async_setup(hass, config):
                 msg_topic, payload_template, exc)
             return
 
-        yield from hass.data[DATA_MQTT].async_publish(
-            msg_topic, payload, qos, retain)
+        # Sent in the background, no need to wait for it
+        hass.data[DATA_MQTT].async_publish(msg_topic, payload, qos, retain)
 
     descriptions = yield from hass.loop.run_in_executor(
         None, load_yaml_config_file, os.path.join(
@@ -388,11 +440,24 @@ class MQTT(object):
         self.broker = broker
         self.port = port
         self.keepalive = keepalive
+        # Wanted subscriptions and the QoS they were requested with
         self.topics = {}
+        # Topics of subscribe and unsubscribe requests by message id
         self.progress = {}
+        self.connected = False
         self.birth_message = birth_message
+        # Futures of published messages by message id
+        self._pending_publishes = {}
+        # Subscriptions made with the broker in the current session
+        self._subscribed = {}
+        # Topics left to a covering wildcard when resubscribing
+        self._covered = set()
+        # Topics that got their retained messages from a SUBSCRIBE once
+        self._received_retained = set()
+        self._flush_future = None
+        self._reconnect_task = None
+        self._stopped = False
         self._mqttc = None
-        self._paho_lock = asyncio.Lock(loop=hass.loop)
 
         if protocol == PROTOCOL_31:
             proto = mqtt.MQTTv31
@@ -414,6 +479,7 @@ class MQTT(object):
         if tls_insecure is not None:
             self._mqttc.tls_insecure_set(tls_insecure)
 
+        self._mqttc.on_publish = self._mqtt_on_publish
         self._mqttc.on_subscribe = self._mqtt_on_subscribe
         self._mqttc.on_unsubscribe = self._mqtt_on_unsubscribe
         self._mqttc.on_connect = self._mqtt_on_connect
@@ -426,15 +492,59 @@ class MQTT(object):
                                  will_message.get(ATTR_QOS),
                                  will_message.get(ATTR_RETAIN))
 
-    @asyncio.coroutine
+    @callback
     def async_publish(self, topic, payload, qos, retain):
         """Publish a MQTT message.
 
-        This method must be run in the event loop and returns a coroutine.
+        Paho only queues the message, its network thread sends it. Returns
+        a future that is done when a QoS 0 message is sent or when the
+        broker acknowledged a message with a higher QoS. Its result is
+        False if the message was dropped.
+
+        This method must be run in the event loop.
         """
-        with (yield from self._paho_lock):
-            yield from self.hass.loop.run_in_executor(
-                None, self._mqttc.publish, topic, payload, qos, retain)
+        future = asyncio.Future(loop=self.hass.loop)
+        result, mid = self._mqttc.publish(topic, payload, qos, retain)
+
+        # Paho keeps messages with a higher QoS to send them on reconnect
+        if result != 0 and qos == 0:
+            import paho.mqtt.client as mqtt
+            _LOGGER.warning("Unable to publish to %s: %s",
+                            topic, mqtt.error_string(result))
+            future.set_result(False)
+        else:
+            self._pending_publishes[mid] = (qos, future)
+
+        return future
+
+    @property
+    def publish_stats(self):
+        """Return the number of messages waiting to be sent or acked."""
+        queued = sum(1 for qos, _ in self._pending_publishes.values()
+                     if qos == 0)
+        return {
+            'queued': queued,
+            'in_flight': len(self._pending_publishes) - queued,
+        }
+
+    @callback
+    def _async_publish_done(self, mid):
+        """Resolve the future of a sent or acknowledged message."""
+        _, future = self._pending_publishes.pop(mid, (None, None))
+
+        if future is not None and not future.done():
+            future.set_result(True)
+
+    @callback
+    def _async_drop_publishes(self, max_qos):
+        """Resolve the futures of messages that will not be sent."""
+        for mid, (qos, future) in list(self._pending_publishes.items()):
+            if qos > max_qos:
+                continue
+
+            self._pending_publishes.pop(mid)
+            if not future.done():
+                future.set_result(False)
 
     @asyncio.coroutine
     def async_connect(self):
@@ -463,27 +573,35 @@ class MQTT(object):
             self._mqttc.disconnect()
             self._mqttc.loop_stop()
 
+        self._stopped = True
+
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+
+        self._async_drop_publishes(2)
         return self.hass.loop.run_in_executor(None, stop)
 
     @asyncio.coroutine
     def async_subscribe(self, topic, qos):
         """Subscribe to a topic.
 
+        Subscriptions made in the same loop iteration are sent together.
+        While disconnected they are made when the connection is up again.
+
         This method is a coroutine.
         """
         if not isinstance(topic, str):
             raise HomeAssistantError("topic need to be a string!")
 
-        with (yield from self._paho_lock):
-            if topic in self.topics:
-                return
+        if topic in self.topics and self.topics[topic] >= qos:
+            return
 
-            result, mid = yield from self.hass.loop.run_in_executor(
-                None, self._mqttc.subscribe, topic, qos)
+        self.topics[topic] = qos
+        # Subscribing again replaces the QoS of the subscription
+        self._subscribed.pop(topic, None)
+        self._covered.discard(topic)
 
-            _raise_on_error(result)
-            self.progress[mid] = topic
-            self.topics[topic] = None
+        yield from self._async_schedule_flush()
 
     @asyncio.coroutine
     def async_unsubscribe(self, topic):
@@ -491,11 +609,82 @@ class MQTT(object):
 
         This method is a coroutine.
         """
-        result, mid = yield from self.hass.loop.run_in_executor(
-            None, self._mqttc.unsubscribe, topic)
+        self.topics.pop(topic, None)
+        self._received_retained.discard(topic)
+        self._covered.discard(topic)
 
-        _raise_on_error(result)
-        self.progress[mid] = topic
+        if topic not in self._subscribed:
+            return
+
+        self._subscribed.pop(topic)
+
+        if '+' in topic or '#' in topic:
+            # Topics it covered now need a subscription of their own
+            self._covered.clear()
+
+        if self.connected:
+            result, mid = self._mqttc.unsubscribe(topic)
+            _raise_on_error(result)
+            self.progress[mid] = [topic]
+
+        yield from self._async_schedule_flush()
+
+    @callback
+    def _async_schedule_flush(self):
+        """Send missing subscriptions at the end of this loop iteration.
+
+        Returns a future that is done once they are sent.
+        """
+        if self._flush_future is None:
+            self._flush_future = asyncio.Future(loop=self.hass.loop)
+            self.hass.loop.call_soon(self._async_flush_subscriptions)
+
+        return self._flush_future
+
+    @callback
+    def _async_flush_subscriptions(self):
+        """Send all missing subscriptions and resolve their future."""
+        future, self._flush_future = self._flush_future, None
+
+        try:
+            if self.connected:
+                self._async_subscribe_missing()
+        except HomeAssistantError as err:
+            future.set_exception(err)
+        else:
+            future.set_result(None)
+
+    @callback
+    def _async_subscribe_missing(self, resubscribe=False):
+        """Subscribe to all wanted topics the broker does not know yet.
+
+        The broker only sends retained messages in reply to a SUBSCRIBE, so
+        new topics are always subscribed to. When resubscribing after a
+        reconnect, topics that received their retained messages before and
+        are covered by a wildcard with at least the same QoS are skipped.
+        The rest is sent in as few packets as possible.
+        """
+        if resubscribe:
+            wildcards = [(topic, qos) for topic, qos in self.topics.items()
+                         if '+' in topic or '#' in topic]
+
+            self._covered = set(
+                topic for topic, qos in self.topics.items()
+                if topic in self._received_retained and any(
+                    other != topic and other_qos >= qos and
+                    _filter_covers(other, topic)
+                    for other, other_qos in wildcards))
+
+        missing = [
+            (topic, qos) for topic, qos in self.topics.items()
+            if topic not in self._subscribed and topic not in self._covered]
+
+        for index in range(0, len(missing), SUBSCRIBE_BATCH_SIZE):
+            batch = missing[index:index + SUBSCRIBE_BATCH_SIZE]
+            result, mid = self._mqttc.subscribe(batch)
+            _raise_on_error(result)
+            self.progress[mid] = [topic for topic, _ in batch]
+            self._subscribed.update(batch)
 
     def _mqtt_on_connect(self, _mqttc, _userdata, _flags, result_code):
         """On connect callback.
@@ -511,87 +700,330 @@ class MQTT(object):
             self._mqttc.disconnect()
             return
 
-        old_topics = self.topics
+        self.hass.loop.call_soon_threadsafe(self._async_connected)
 
-        self.topics = {key: value for key, value in self.topics.items()
-                       if value is None}
+    @callback
+    def _async_connected(self):
+        """Restore the session after the connection is made."""
+        self.connected = True
+        self._subscribed = {}
+        self.progress = {}
 
-        for topic, qos in old_topics.items():
-            # qos is None if we were in process of subscribing
-            if qos is not None:
-                self.hass.add_job(self.async_subscribe, topic, qos)
+        try:
+            self._async_subscribe_missing(resubscribe=True)
+        except HomeAssistantError as err:
+            _LOGGER.error("Unable to restore subscriptions: %s", err)
 
         if self.birth_message:
-            self.hass.add_job(self.async_publish(
+            self.async_publish(
                 self.birth_message.get(ATTR_TOPIC),
                 self.birth_message.get(ATTR_PAYLOAD),
                 self.birth_message.get(ATTR_QOS),
-                self.birth_message.get(ATTR_RETAIN)))
+                self.birth_message.get(ATTR_RETAIN))
+
+    def _mqtt_on_publish(self, _mqttc, _userdata, mid):
+        """Message sent or acknowledged callback."""
+        self.hass.loop.call_soon_threadsafe(self._async_publish_done, mid)
 
     def _mqtt_on_subscribe(self, _mqttc, _userdata, mid, granted_qos):
         """Subscribe successful callback."""
-        topic = self.progress.pop(mid, None)
-        if topic is None:
+        self.hass.loop.call_soon_threadsafe(
+            self._async_subscribed, mid, granted_qos)
+
+    @callback
+    def _async_subscribed(self, mid, granted_qos):
+        """Store the QoS the broker granted for each topic."""
+        topics = self.progress.pop(mid, None)
+        if topics is None:
             return
-        self.topics[topic] = granted_qos[0]
+
+        for topic, qos in zip(topics, granted_qos):
+            if topic not in self._subscribed:
+                continue
+
+            if qos == SUBACK_FAILURE:
+                _LOGGER.error("Broker refused subscription to %s", topic)
+                self.topics.pop(topic, None)
+                self._subscribed.pop(topic)
+                self._received_retained.discard(topic)
+                # Topics it covered now need a subscription of their own
+                self._covered.clear()
+                self._async_schedule_flush()
+            else:
+                self._subscribed[topic] = qos
+                self._received_retained.add(topic)
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg):
         """Message received callback."""
-        try:
-            payload = msg.payload.decode('utf-8')
-        except (AttributeError, UnicodeDecodeError):
-            _LOGGER.error("Illegal utf-8 unicode payload from "
-                          "MQTT topic: %s, Payload: %s", msg.topic,
-                          msg.payload)
-        else:
-            _LOGGER.info("Received message on %s: %s", msg.topic, payload)
+        payload = _decode_payload(msg.topic, msg.payload)
+
+        if payload is not None:
             dispatcher_send(
                 self.hass, SIGNAL_MQTT_MESSAGE_RECEIVED, msg.topic, payload,
                 msg.qos
             )
 
-    def _mqtt_on_unsubscribe(self, _mqttc, _userdata, mid, granted_qos):
+    def _mqtt_on_unsubscribe(self, _mqttc, _userdata, mid):
         """Unsubscribe successful callback."""
-        topic = self.progress.pop(mid, None)
-        if topic is None:
-            return
-        self.topics.pop(topic, None)
+        self.hass.loop.call_soon_threadsafe(self.progress.pop, mid, None)
 
     def _mqtt_on_disconnect(self, _mqttc, _userdata, result_code):
         """Disconnected callback."""
+        self.hass.loop.call_soon_threadsafe(
+            self._async_disconnected, result_code)
+
+    @callback
+    def _async_disconnected(self, result_code):
+        """Forget the session and start reconnecting if needed."""
+        self.connected = False
+        self._subscribed = {}
+        self._covered = set()
         self.progress = {}
-        self.topics = {key: value for key, value in self.topics.items()
-                       if value is not None}
 
-        # Remove None values from topic list
-        for key in list(self.topics):
-            if self.topics[key] is None:
-                self.topics.pop(key)
+        # Unsent QoS 0 messages are lost, others are sent on reconnect
+        self._async_drop_publishes(0)
 
         # When disconnected because of calling disconnect()
-        if result_code == 0:
+        if result_code == 0 or self._stopped:
             return
 
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = self.hass.loop.create_task(
+                self._async_reconnect(result_code))
+
+    @asyncio.coroutine
+    def _async_reconnect(self, result_code):
+        """Reconnect to the broker, waiting longer after each failure.
+
+        The network thread of paho reconnects every second on its own, it is
+        stopped until reconnected so only this task reconnects.
+        """
+        yield from self.hass.loop.run_in_executor(None, self._mqttc.loop_stop)
         tries = 0
-        wait_time = 0
 
-        while True:
+        while not self._stopped:
             try:
-                if self._mqttc.reconnect() == 0:
-                    _LOGGER.info("Successfully reconnected to the MQTT server")
-                    break
+                result = yield from self.hass.loop.run_in_executor(
+                    None, self._mqttc.reconnect)
             except socket.error:
-                pass
+                result = None
+
+            if result == 0:
+                self._mqttc.loop_start()
+                _LOGGER.info("Successfully reconnected to the MQTT server")
+                return
 
             wait_time = min(2**tries, MAX_RECONNECT_WAIT)
             _LOGGER.warning(
                 "Disconnected from MQTT (%s). Trying to reconnect in %s s",
                 result_code, wait_time)
-            # It is ok to sleep here as we are in the MQTT thread.
-            time.sleep(wait_time)
+            yield from asyncio.sleep(wait_time, loop=self.hass.loop)
             tries += 1
 
 
+def _embedded_broker_supported(broker):
+    """Return if the broker has all that the in-process client uses.
+
+    Some of them are private to hbmqtt and can change with its version.
+    """
+    return all(hasattr(broker, attr) for attr in EMBEDDED_BROKER_ATTRIBUTES)
+
+
+class EmbeddedMQTT(object):
+    """Home Assistant client for the embedded MQTT broker.
+
+    Runs in the same event loop as the broker. Messages are handed to the
+    broker directly and messages the broker routes are passed to the
+    subscriptions without a network connection, a network thread or
+    encoding and decoding of MQTT packets. Clients connected over the
+    network see the same messages as with a connected client.
+    """
+
+    # pylint: disable=protected-access
+    def __init__(self, hass, broker, birth_message):
+        """Initialize the client for an embedded hbmqtt broker."""
+        self.hass = hass
+        self.birth_message = birth_message
+        # Wanted subscriptions and the QoS they were requested with
+        self.topics = {}
+        self.connected = False
+        self._broker = broker
+        self._broker_broadcast = broker._broadcast_message
+        self._pending_publishes = 0
+
+    @callback
+    def async_publish(self, topic, payload, qos, retain):
+        """Publish a MQTT message.
+
+        Returns a future that is done when the broker queued the message.
+
+        This method must be run in the event loop.
+        """
+        data = _encode_payload(payload)
+
+        if retain:
+            self._broker.retain_message(None, topic, data, qos)
+
+        self._pending_publishes += 1
+        return self.hass.async_add_job(self._async_broadcast(topic, data))
+
+    @asyncio.coroutine
+    def _async_broadcast(self, topic, data):
+        """Pass a message to the broker to send it to the subscribers."""
+        try:
+            yield from self._broker.internal_message_broadcast(topic, data)
+        finally:
+            self._pending_publishes -= 1
+
+        return True
+
+    @property
+    def publish_stats(self):
+        """Return the number of messages waiting to be sent or acked."""
+        return {
+            'queued': self._pending_publishes,
+            'in_flight': 0,
+        }
+
+    @asyncio.coroutine
+    def async_connect(self):
+        """Start receiving the messages routed by the broker.
+
+        This method is a coroutine.
+        """
+        # The broker calls this for messages of all clients and its own
+        self._broker._broadcast_message = self._async_broker_broadcast
+        self.connected = True
+
+        if self.birth_message:
+            self.async_publish(
+                self.birth_message.get(ATTR_TOPIC),
+                self.birth_message.get(ATTR_PAYLOAD),
+                self.birth_message.get(ATTR_QOS),
+                self.birth_message.get(ATTR_RETAIN))
+
+        return True
+
+    @asyncio.coroutine
+    def async_disconnect(self):
+        """Stop receiving messages.
+
+        This method is a coroutine.
+        """
+        self._broker._broadcast_message = self._broker_broadcast
+        self.connected = False
+
+    @asyncio.coroutine
+    def async_subscribe(self, topic, qos):
+        """Subscribe to a topic.
+
+        The retained messages matching the topic are received as with a
+        broker connection.
+
+        This method is a coroutine.
+        """
+        if not isinstance(topic, str):
+            raise HomeAssistantError("topic need to be a string!")
+
+        if topic in self.topics and self.topics[topic] >= qos:
+            return
+
+        self.topics[topic] = qos
+        self.hass.loop.call_soon(self._async_send_retained, topic, qos)
+
+    @asyncio.coroutine
+    def async_unsubscribe(self, topic):
+        """Unsubscribe from topic.
+
+        This method is a coroutine.
+        """
+        self.topics.pop(topic, None)
+
+    @callback
+    def _async_send_retained(self, topic_filter, qos):
+        """Pass the retained messages matching a new subscription."""
+        for topic, message in list(self._broker._retained_messages.items()):
+            if _topic_matches(topic_filter, topic):
+                self._async_message_received(
+                    topic, message.data, min(message.qos or 0, qos))
+
+    @asyncio.coroutine
+    def _async_broker_broadcast(self, session, topic, data, force_qos=None):
+        """Receive a message, then let the broker send it to its clients."""
+        if any(_topic_matches(topic_filter, topic)
+               for topic_filter in self.topics):
+            self._async_message_received(topic, data, force_qos or 0)
+
+        yield from self._broker_broadcast(session, topic, data, force_qos)
+
+    @callback
+    def _async_message_received(self, topic, data, qos):
+        """Pass a message to the subscriptions."""
+        payload = _decode_payload(topic, data)
+
+        if payload is not None:
+            async_dispatcher_send(
+                self.hass, SIGNAL_MQTT_MESSAGE_RECEIVED, topic, payload, qos)
+
+
+def _encode_payload(payload):
+    """Convert a payload to bytes the way paho does."""
+    if payload is None:
+        return b''
+
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+
+    return str(payload).encode('utf-8')
+
+
+def _decode_payload(topic, payload):
+    """Decode a received payload, None if it isn't valid UTF-8."""
+    try:
+        # Subscribers share the payload and so its decoded JSON
+        payload = template.JsonValue(payload.decode('utf-8'))
+    except (AttributeError, UnicodeDecodeError):
+        _LOGGER.error("Illegal utf-8 unicode payload from "
+                      "MQTT topic: %s, Payload: %s", topic, payload)
+        return None
+
+    _LOGGER.info("Received message on %s: %s", topic, payload)
+    return payload
+
+
+def _topic_matches(topic_filter, topic):
+    """Test if a topic matches a subscription."""
+    # [MQTT-4.7.2-1] Wildcards at the start do not match $ topics
+    if topic.startswith('$') and topic_filter[:1] in ('+', '#'):
+        return False
+
+    return _filter_covers(topic_filter, topic)
+
+
+def _filter_covers(wide, narrow):
+    """Test if all topics matching the narrow filter match the wide one."""
+    # Wildcards in the first level don't match topics starting with $
+    if narrow.startswith('$') and wide[:1] in ('+', '#'):
+        return False
+
+    wide_levels = wide.split('/')
+    narrow_levels = narrow.split('/')
+
+    for index, level in enumerate(wide_levels):
+        if level == '#':
+            return True
+
+        if index >= len(narrow_levels):
+            return False
+
+        narrow_level = narrow_levels[index]
+
+        if narrow_level == '#' or level not in ('+', narrow_level):
+            return False
+
+    return len(wide_levels) == len(narrow_levels)
+
+
 def _raise_on_error(result):
     """Raise error if error result."""
     if result != 0:
@@ -601,14 +1033,111 @@ def _raise_on_error(result):
             'Error talking to MQTT: {}'.format(mqtt.error_string(result)))
 
 
-def _match_topic(subscription, topic):
-    """Test if topic matches subscription."""
-    if subscription.endswith('#'):
-        return (subscription[:-2] == topic or
-                topic.startswith(subscription[:-1]))
+class _TopicNode(object):
+    """A level in the subscription trie."""
+
+    __slots__ = ['children', 'targets']
+
+    def __init__(self):
+        """Initialize the node."""
+        self.children = {}
+        self.targets = []
+
+
+class TopicRouter(object):
+    """Match topics to subscriptions using a trie of topic levels.
+
+    Each message is matched once, the cost depends on the number of topic
+    levels and wildcards instead of on the number of subscriptions.
+    """
+
+    def __init__(self):
+        """Initialize the router."""
+        self._root = _TopicNode()
+        self.subscriptions = 0
+
+    def add(self, subscription, target):
+        """Add a target for a subscription.
+
+        Returns a callback that removes it again.
+        """
+        levels = subscription.split('/')
+        node = self._root
+
+        for level in levels:
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TopicNode()
+            node = child
+
+        node.targets.append(target)
+        self.subscriptions += 1
+
+        @callback
+        def async_remove():
+            """Remove the target from the router."""
+            self._remove(levels, target)
+
+        return async_remove
+
+    def _remove(self, levels, target):
+        """Remove a registration and prune empty nodes."""
+        path = [self._root]
+
+        for level in levels:
+            node = path[-1].children.get(level)
+            if node is None:
+                return
+            path.append(node)
+
+        try:
+            path[-1].targets.remove(target)
+        except ValueError:
+            return
+
+        self.subscriptions -= 1
+
+        for index in range(len(levels), 0, -1):
+            node = path[index]
+            if node.targets or node.children:
+                break
+            path[index - 1].children.pop(levels[index - 1])
+
+    def match(self, topic):
+        """Return the targets of all subscriptions matching topic."""
+        result = []
+        nodes = [self._root]
+
+        for level in topic.split('/'):
+            next_nodes = []
+
+            for node in nodes:
+                children = node.children
+
+                # Multi-level wildcard matches all remaining levels
+                child = children.get('#')
+                if child is not None:
+                    result.extend(child.targets)
+
+                child = children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+
+                child = children.get('+')
+                if child is not None:
+                    next_nodes.append(child)
+
+            if not next_nodes:
+                return result
+
+            nodes = next_nodes
+
+        for node in nodes:
+            result.extend(node.targets)
 
-    sub_parts = subscription.split('/')
-    topic_parts = topic.split('/')
+            # Multi-level wildcard also matches the parent level
+            child = node.children.get('#')
+            if child is not None:
+                result.extend(child.targets)
 
-    return (len(sub_parts) == len(topic_parts) and
-            all(a == b for a, b in zip(sub_parts, topic_parts) if a != '+'))
+        return result
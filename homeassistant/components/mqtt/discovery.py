@@ -5,11 +5,13 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/mqtt/#discovery
 """
 import asyncio
+from collections import OrderedDict
 import json
 import logging
 import re
 
 import homeassistant.components.mqtt as mqtt
+from homeassistant.core import callback
 from homeassistant.helpers.discovery import async_load_platform
 from homeassistant.const import CONF_PLATFORM
 from homeassistant.components.mqtt import CONF_STATE_TOPIC
@@ -27,12 +29,42 @@ ALLOWED_PLATFORMS = {
     'sensor': ['mqtt']
 }
 
+# Time in seconds to collect config messages before loading the platforms
+DISCOVERY_WINDOW = 0.5
+
 
 @asyncio.coroutine
 def async_start(hass, discovery_topic, hass_config):
-    """Initialization of MQTT Discovery."""
-    # pylint: disable=unused-variable
+    """Initialization of MQTT Discovery.
+
+    Config messages are collected for DISCOVERY_WINDOW seconds and then
+    every platform is loaded once with the configs of all devices found for
+    it, so a broker replaying hundreds of retained configs adds the entities
+    in a handful of batches. Configs identical to one that was already
+    processed are ignored.
+    """
+    # Hash of the last processed config per (component, object_id)
+    discovered = {}
+    # Configs per (component, platform) waiting for the window to close
+    pending = OrderedDict()
+
     @asyncio.coroutine
+    def async_load_pending():
+        """Load the platforms with the configs of the last window."""
+        yield from asyncio.sleep(DISCOVERY_WINDOW, loop=hass.loop)
+
+        batches = list(pending.items())
+        pending.clear()
+
+        for (component, platform), configs in batches:
+            _LOGGER.debug("Discovered %d %s.%s devices",
+                          len(configs), component, platform)
+            yield from async_load_platform(
+                hass, component, platform, list(configs.values()),
+                hass_config)
+
+    # pylint: disable=unused-variable
+    @callback
     def async_device_message_received(topic, payload, qos):
         """Process the received message."""
         match = TOPIC_MATCHER.match(topic)
@@ -41,6 +73,10 @@ def async_start(hass, discovery_topic, hass_config):
             return
 
         prefix_topic, component, object_id = match.groups()
+        payload_hash = hash(payload)
+
+        if discovered.get((component, object_id)) == payload_hash:
+            return
 
         try:
             payload = json.loads(payload)
@@ -64,8 +100,14 @@ def async_start(hass, discovery_topic, hass_config):
             payload[CONF_STATE_TOPIC] = '{}/{}/{}/state'.format(
                 discovery_topic, component, object_id)
 
-        yield from async_load_platform(
-            hass, component, platform, payload, hass_config)
+        discovered[component, object_id] = payload_hash
+
+        if not pending:
+            hass.async_add_job(async_load_pending())
+
+        # A newer config for the same device within a window replaces it
+        configs = pending.setdefault((component, platform), OrderedDict())
+        configs[object_id] = payload
 
     yield from mqtt.async_subscribe(
         hass, discovery_topic + '/#', async_device_message_received, 0)
@@ -16,6 +16,8 @@ import homeassistant.helpers.config_validation as cv
 REQUIREMENTS = ['hbmqtt==0.8']
 DEPENDENCIES = ['http']
 
+DATA_EMBEDDED_BROKER = 'mqtt_embedded_broker'
+
 # None allows custom config to be created through generate_config
 HBMQTT_CONFIG_SCHEMA = vol.Any(None, vol.Schema({
     vol.Optional('auth'): vol.Schema({
@@ -52,9 +54,12 @@ def async_start(hass, server_config):
     finally:
         passwd.close()
 
+    hass.data[DATA_EMBEDDED_BROKER] = broker
+
     @asyncio.coroutine
     def async_shutdown_mqtt_server(event):
         """Shut down the MQTT server."""
+        hass.data.pop(DATA_EMBEDDED_BROKER, None)
         yield from broker.shutdown()
 
     hass.bus.async_listen_once(
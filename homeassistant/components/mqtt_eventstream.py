@@ -5,7 +5,9 @@ For more details about this component, please refer to the documentation at
 https://home-assistant.io/components/mqtt_eventstream/
 """
 import asyncio
+from datetime import timedelta
 import json
+import logging
 
 import voluptuous as vol
 
@@ -14,18 +16,32 @@ import homeassistant.loader as loader
 from homeassistant.components.mqtt import (
     valid_publish_topic, valid_subscribe_topic)
 from homeassistant.const import (
-    ATTR_SERVICE_DATA, EVENT_CALL_SERVICE, EVENT_SERVICE_EXECUTED,
-    EVENT_STATE_CHANGED, EVENT_TIME_CHANGED, MATCH_ALL)
+    ATTR_ENTITY_ID, ATTR_SERVICE_DATA, EVENT_CALL_SERVICE,
+    EVENT_HOMEASSISTANT_STOP, EVENT_SERVICE_EXECUTED, EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED, MATCH_ALL)
 from homeassistant.core import EventOrigin, State
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.remote import JSONEncoder
+import homeassistant.util.dt as dt_util
 
 DOMAIN = "mqtt_eventstream"
 DEPENDENCIES = ['mqtt']
 
+_LOGGER = logging.getLogger(__name__)
+
 CONF_PUBLISH_TOPIC = 'publish_topic'
 CONF_SUBSCRIBE_TOPIC = 'subscribe_topic'
 CONF_PUBLISH_EVENTSTREAM_RECEIVED = 'publish_eventstream_received'
+CONF_INCLUDE_EVENTS = 'include_events'
+CONF_EXCLUDE_EVENTS = 'exclude_events'
+CONF_BATCH_INTERVAL = 'batch_interval'
+
+ATTR_EVENTS = 'events'
+ATTR_EVENT_TYPE = 'event_type'
+ATTR_EVENT_DATA = 'event_data'
+ATTR_NEW_STATE = 'new_state'
+ATTR_OLD_STATE = 'old_state'
 
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({
@@ -33,17 +49,42 @@ CONFIG_SCHEMA = vol.Schema({
         vol.Optional(CONF_SUBSCRIBE_TOPIC): valid_subscribe_topic,
         vol.Optional(CONF_PUBLISH_EVENTSTREAM_RECEIVED, default=False):
             cv.boolean,
+        vol.Optional(CONF_INCLUDE_EVENTS, default=[]):
+            vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_EXCLUDE_EVENTS, default=[]):
+            vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(CONF_BATCH_INTERVAL, default=timedelta(0)):
+            cv.time_period,
     }),
 }, extra=vol.ALLOW_EXTRA)
 
 
 @asyncio.coroutine
 def async_setup(hass, config):
-    """Setup the MQTT eventstream component."""
+    """Setup the MQTT eventstream component.
+
+    State changes are sent without their old state, the receiving side
+    restores it from the previous state it received for that entity. With a
+    batch interval the events of that interval are sent as one message.
+    """
     mqtt = loader.get_component('mqtt')
     conf = config.get(DOMAIN, {})
     pub_topic = conf.get(CONF_PUBLISH_TOPIC)
     sub_topic = conf.get(CONF_SUBSCRIBE_TOPIC)
+    include_events = set(conf.get(CONF_INCLUDE_EVENTS, []))
+    exclude_events = set(conf.get(CONF_EXCLUDE_EVENTS, []))
+    batch_interval = conf.get(CONF_BATCH_INTERVAL, timedelta(0))
+    pending = []
+
+    @callback
+    def _async_publish_pending(now=None):
+        """Publish the events collected since the last batch."""
+        if not pending:
+            return
+
+        msg = json.dumps({ATTR_EVENTS: pending}, cls=JSONEncoder)
+        pending.clear()
+        mqtt.async_publish(hass, pub_topic, msg)
 
     @callback
     def _event_publisher(event):
@@ -52,6 +93,10 @@ def async_setup(hass, config):
             return
         if event.event_type == EVENT_TIME_CHANGED:
             return
+        if include_events and event.event_type not in include_events:
+            return
+        if event.event_type in exclude_events:
+            return
 
         # Filter out the events that were triggered by publishing
         # to the MQTT topic, or you will end up in an infinite loop.
@@ -73,32 +118,67 @@ def async_setup(hass, config):
         if event.event_type == EVENT_SERVICE_EXECUTED:
             return
 
-        event_info = {'event_type': event.event_type, 'event_data': event.data}
-        msg = json.dumps(event_info, cls=JSONEncoder)
-        mqtt.async_publish(hass, pub_topic, msg)
+        event_data = event.data
+
+        # The receiver knows the old state from the previous change
+        if event.event_type == EVENT_STATE_CHANGED:
+            event_data = {key: value for key, value in event_data.items()
+                          if key != ATTR_OLD_STATE}
+
+        event_info = {
+            ATTR_EVENT_TYPE: event.event_type,
+            ATTR_EVENT_DATA: event_data,
+        }
+
+        if not batch_interval:
+            mqtt.async_publish(
+                hass, pub_topic, json.dumps(event_info, cls=JSONEncoder))
+            return
+
+        if not pending:
+            async_track_point_in_utc_time(
+                hass, _async_publish_pending,
+                dt_util.utcnow() + batch_interval)
+
+        pending.append(event_info)
 
     # Only listen for local events if you are going to publish them.
     if pub_topic:
         hass.bus.async_listen(MATCH_ALL, _event_publisher)
 
-    # Process events from a remote server that are received on a queue.
+        if batch_interval:
+            hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_STOP, _async_publish_pending)
+
+    # Last state received per entity, used as old state of the next change
+    remote_states = {}
+
     @callback
-    def _event_receiver(topic, payload, qos):
-        """Receive events published by and fire them on this hass instance."""
-        event = json.loads(payload)
-        event_type = event.get('event_type')
-        event_data = event.get('event_data')
+    def _async_fire_remote_event(event):
+        """Fire an event received from the remote instance."""
+        event_type = event.get(ATTR_EVENT_TYPE)
+        event_data = event.get(ATTR_EVENT_DATA)
 
         # Special case handling for event STATE_CHANGED
         # We will try to convert state dicts back to State objects
         # Copied over from the _handle_api_post_events_event method
         # of the api component.
         if event_type == EVENT_STATE_CHANGED and event_data:
-            for key in ('old_state', 'new_state'):
-                state = State.from_dict(event_data.get(key))
+            entity_id = event_data.get(ATTR_ENTITY_ID)
+            new_state = State.from_dict(event_data.get(ATTR_NEW_STATE))
+
+            if ATTR_OLD_STATE in event_data:
+                old_state = State.from_dict(event_data[ATTR_OLD_STATE])
+            else:
+                old_state = remote_states.get(entity_id)
+
+            event_data[ATTR_OLD_STATE] = old_state
+            event_data[ATTR_NEW_STATE] = new_state
 
-                if state:
-                    event_data[key] = state
+            if new_state is None:
+                remote_states.pop(entity_id, None)
+            else:
+                remote_states[entity_id] = new_state
 
         hass.bus.async_fire(
             event_type,
@@ -106,6 +186,20 @@ def async_setup(hass, config):
             origin=EventOrigin.remote
         )
 
+    # Process events from a remote server that are received on a queue.
+    @callback
+    def _event_receiver(topic, payload, qos):
+        """Receive events published by and fire them on this hass instance."""
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            _LOGGER.error("Unable to parse event stream message: %s", payload)
+            return
+
+        # A batch is handled completely within this one callback
+        for event in msg.get(ATTR_EVENTS, (msg,)):
+            _async_fire_remote_event(event)
+
     # Only subscribe if you specified a topic.
     if sub_topic:
         yield from mqtt.async_subscribe(hass, sub_topic, _event_receiver)
@@ -20,7 +20,9 @@ from homeassistant.helpers.entity import ToggleEntity
 from homeassistant.helpers.entity_component import EntityComponent
 import homeassistant.helpers.config_validation as cv
 
-from homeassistant.helpers.script import Script
+from homeassistant.helpers.script import (
+    Script, SCRIPT_MODE_SCHEMA, CONF_MODE, CONF_MAX, DEFAULT_MAX_RUNS,
+    MODE_LEGACY)
 
 DOMAIN = "script"
 ENTITY_ID_FORMAT = DOMAIN + '.{}'
@@ -32,13 +34,16 @@ ATTR_VARIABLES = 'variables'
 ATTR_LAST_ACTION = 'last_action'
 ATTR_LAST_TRIGGERED = 'last_triggered'
 ATTR_CAN_CANCEL = 'can_cancel'
+ATTR_RUN_COUNT = 'run_count'
+ATTR_RUNS = 'runs'
+ATTR_LAST_RUN_DURATION = 'last_run_duration'
 
 _LOGGER = logging.getLogger(__name__)
 
 _SCRIPT_ENTRY_SCHEMA = vol.Schema({
     CONF_ALIAS: cv.string,
     vol.Required(CONF_SEQUENCE): cv.SCRIPT_SCHEMA,
-})
+}).extend(SCRIPT_MODE_SCHEMA)
 
 CONFIG_SCHEMA = vol.Schema({
     DOMAIN: vol.Schema({cv.slug: _SCRIPT_ENTRY_SCHEMA})
@@ -139,7 +144,7 @@ def _async_process_config(hass, config, component):
         """Execute a service call to script.<script name>."""
         entity_id = ENTITY_ID_FORMAT.format(service.service)
         script = component.entities.get(entity_id)
-        if script.is_on:
+        if script.is_on and script.script.mode == MODE_LEGACY:
             _LOGGER.warning("Script %s already running.", entity_id)
             return
         yield from script.async_turn_on(variables=service.data)
@@ -148,7 +153,8 @@ def _async_process_config(hass, config, component):
 
     for object_id, cfg in config[DOMAIN].items():
         alias = cfg.get(CONF_ALIAS, object_id)
-        script = ScriptEntity(hass, object_id, alias, cfg[CONF_SEQUENCE])
+        script = ScriptEntity(hass, object_id, alias, cfg[CONF_SEQUENCE],
+                              cfg[CONF_MODE], cfg[CONF_MAX])
         scripts.append(script)
         hass.services.async_register(
             DOMAIN, object_id, service_handler, schema=SCRIPT_SERVICE_SCHEMA)
@@ -159,11 +165,13 @@ def _async_process_config(hass, config, component):
 class ScriptEntity(ToggleEntity):
     """Representation of a script entity."""
 
-    def __init__(self, hass, object_id, name, sequence):
+    def __init__(self, hass, object_id, name, sequence, mode=MODE_LEGACY,
+                 max_runs=DEFAULT_MAX_RUNS):
         """Initialize the script."""
         self.object_id = object_id
         self.entity_id = ENTITY_ID_FORMAT.format(object_id)
-        self.script = Script(hass, sequence, name, self.async_update_ha_state)
+        self.script = Script(hass, sequence, name, self.async_update_ha_state,
+                             mode, max_runs)
 
     @property
     def should_poll(self):
@@ -184,6 +192,12 @@ class ScriptEntity(ToggleEntity):
             attrs[ATTR_CAN_CANCEL] = self.script.can_cancel
         if self.script.last_action:
             attrs[ATTR_LAST_ACTION] = self.script.last_action
+        attrs[ATTR_RUN_COUNT] = self.script.run_count
+        if self.script.mode != MODE_LEGACY:
+            attrs[ATTR_RUNS] = self.script.runs
+        if self.script.last_run_duration is not None:
+            attrs[ATTR_LAST_RUN_DURATION] = round(
+                self.script.last_run_duration, 3)
         return attrs
 
     @property
@@ -32,19 +32,27 @@ PLATFORM_SCHEMA = mqtt.MQTT_RO_PLATFORM_SCHEMA.extend({
 def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     """Set up MQTT Sensor."""
     if discovery_info is not None:
-        config = PLATFORM_SCHEMA(discovery_info)
+        configs = mqtt.validate_discovery_info(
+            discovery_info, PLATFORM_SCHEMA)
+    else:
+        configs = [config]
 
+    async_add_devices([_create_sensor(hass, conf) for conf in configs])
+
+
+def _create_sensor(hass, config):
+    """Create a sensor from a validated config."""
     value_template = config.get(CONF_VALUE_TEMPLATE)
     if value_template is not None:
         value_template.hass = hass
 
-    async_add_devices([MqttSensor(
+    return MqttSensor(
         config.get(CONF_NAME),
         config.get(CONF_STATE_TOPIC),
         config.get(CONF_QOS),
         config.get(CONF_UNIT_OF_MEASUREMENT),
         value_template,
-    )])
+    )
 
 
 class MqttSensor(Entity):
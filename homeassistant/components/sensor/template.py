@@ -17,7 +17,9 @@ from homeassistant.const import (
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import Entity, async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_render_info, async_track_state_change)
+from homeassistant.helpers.template import RenderInfo
 from homeassistant.helpers.restore_state import async_get_last_state
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,8 +48,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
     for device, device_config in config[CONF_SENSORS].items():
         state_template = device_config[CONF_VALUE_TEMPLATE]
         icon_template = device_config.get(CONF_ICON_TEMPLATE)
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      state_template.extract_entities())
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
         friendly_name = device_config.get(ATTR_FRIENDLY_NAME, device)
         unit_of_measurement = device_config.get(ATTR_UNIT_OF_MEASUREMENT)
 
@@ -90,6 +91,7 @@ class SensorTemplate(Entity):
         self._icon_template = icon_template
         self._icon = None
         self._entities = entity_ids
+        self._render_info = RenderInfo()
 
     @asyncio.coroutine
     def async_added_to_hass(self):
@@ -106,8 +108,13 @@ class SensorTemplate(Entity):
         @callback
         def template_sensor_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_sensor_state_listener)
+            if self._entities is None:
+                # Follow the states the templates used in the last update
+                async_track_render_info(self.hass, self._render_info,
+                                        template_sensor_state_listener)
+            else:
+                async_track_state_change(
+                    self.hass, self._entities, template_sensor_state_listener)
 
             self.hass.async_add_job(self.async_update_ha_state(True))
 
@@ -142,8 +149,11 @@ class SensorTemplate(Entity):
     @asyncio.coroutine
     def async_update(self):
         """Update the state from the template."""
+        self._render_info.clear()
+
         try:
-            self._state = self._template.async_render()
+            self._state = self._template.async_render_tracked(
+                self._render_info)
         except TemplateError as ex:
             if ex.args and ex.args[0].startswith(
                     "UndefinedError: 'None' has no attribute"):
@@ -156,7 +166,8 @@ class SensorTemplate(Entity):
 
         if self._icon_template is not None:
             try:
-                self._icon = self._icon_template.async_render()
+                self._icon = self._icon_template.async_render_tracked(
+                    self._render_info)
             except TemplateError as ex:
                 if ex.args and ex.args[0].startswith(
                         "UndefinedError: 'None' has no attribute"):
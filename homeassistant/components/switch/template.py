@@ -18,7 +18,9 @@ from homeassistant.const import (
 from homeassistant.exceptions import TemplateError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.entity import async_generate_entity_id
-from homeassistant.helpers.event import async_track_state_change
+from homeassistant.helpers.event import (
+    async_track_render_info, async_track_state_change)
+from homeassistant.helpers.template import RenderInfo
 from homeassistant.helpers.restore_state import async_get_last_state
 from homeassistant.helpers.script import Script
 
@@ -52,8 +54,7 @@ def async_setup_platform(hass, config, async_add_devices, discovery_info=None):
         state_template = device_config[CONF_VALUE_TEMPLATE]
         on_action = device_config[ON_ACTION]
         off_action = device_config[OFF_ACTION]
-        entity_ids = (device_config.get(ATTR_ENTITY_ID) or
-                      state_template.extract_entities())
+        entity_ids = device_config.get(ATTR_ENTITY_ID)
 
         state_template.hass = hass
 
@@ -90,6 +91,7 @@ class SwitchTemplate(SwitchDevice):
         self._off_script = Script(hass, off_action)
         self._state = False
         self._entities = entity_ids
+        self._render_info = RenderInfo()
 
     @asyncio.coroutine
     def async_added_to_hass(self):
@@ -106,8 +108,13 @@ class SwitchTemplate(SwitchDevice):
         @callback
         def template_switch_startup(event):
             """Update template on startup."""
-            async_track_state_change(
-                self.hass, self._entities, template_switch_state_listener)
+            if self._entities is None:
+                # Follow the states the templates used in the last update
+                async_track_render_info(self.hass, self._render_info,
+                                        template_switch_state_listener)
+            else:
+                async_track_state_change(
+                    self.hass, self._entities, template_switch_state_listener)
 
             self.hass.async_add_job(self.async_update_ha_state(True))
 
@@ -145,8 +152,11 @@ class SwitchTemplate(SwitchDevice):
     @asyncio.coroutine
     def async_update(self):
         """Update the state from the template."""
+        self._render_info.clear()
+
         try:
-            state = self._template.async_render().lower()
+            state = self._template.async_render_tracked(
+                self._render_info).lower()
 
             if state in _VALID_STATES:
                 self._state = state in ('true', STATE_ON)
@@ -10,7 +10,7 @@ from voluptuous.humanize import humanize_error
 
 from homeassistant.const import (
     MATCH_ALL, EVENT_TIME_CHANGED, EVENT_HOMEASSISTANT_STOP,
-    __version__)
+    URL_API_WEBSOCKET, __version__)
 from homeassistant.components import frontend
 from homeassistant.core import callback
 from homeassistant.remote import JSONEncoder
@@ -22,7 +22,7 @@ from homeassistant.components.http.ban import process_wrong_login
 
 DOMAIN = 'websocket_api'
 
-URL = "/api/websocket"
+URL = URL_API_WEBSOCKET
 DEPENDENCIES = 'http',
 
 ERR_ID_REUSE = 1
@@ -39,6 +39,7 @@ TYPE_GET_CONFIG = 'get_config'
 TYPE_GET_PANELS = 'get_panels'
 TYPE_GET_SERVICES = 'get_services'
 TYPE_GET_STATES = 'get_states'
+TYPE_GET_STATE_CHANGES = 'get_state_changes'
 TYPE_PING = 'ping'
 TYPE_PONG = 'pong'
 TYPE_RESULT = 'result'
@@ -79,6 +80,12 @@ GET_STATES_MESSAGE_SCHEMA = vol.Schema({
     vol.Required('type'): TYPE_GET_STATES,
 })
 
+GET_STATE_CHANGES_MESSAGE_SCHEMA = vol.Schema({
+    vol.Required('id'): cv.positive_int,
+    vol.Required('type'): TYPE_GET_STATE_CHANGES,
+    vol.Required('since'): cv.datetime,
+})
+
 GET_SERVICES_MESSAGE_SCHEMA = vol.Schema({
     vol.Required('id'): cv.positive_int,
     vol.Required('type'): TYPE_GET_SERVICES,
@@ -105,6 +112,7 @@ BASE_COMMAND_MESSAGE_SCHEMA = vol.Schema({
                                   TYPE_SUBSCRIBE_EVENTS,
                                   TYPE_UNSUBSCRIBE_EVENTS,
                                   TYPE_GET_STATES,
+                                  TYPE_GET_STATE_CHANGES,
                                   TYPE_GET_SERVICES,
                                   TYPE_GET_CONFIG,
                                   TYPE_GET_PANELS,
@@ -398,6 +406,23 @@ class ActiveConnection:
         self.send_message(result_message(msg['id'],
                                          self.hass.states.async_all()))
 
+    def handle_get_state_changes(self, msg):
+        """Handle get state changes command.
+
+        Returns the states that were updated after the given time and the
+        entity ids of all current states, so a client that lost its
+        connection can catch up without downloading all states again.
+        """
+        msg = GET_STATE_CHANGES_MESSAGE_SCHEMA(msg)
+        since = msg['since']
+        states = self.hass.states.async_all()
+
+        self.send_message(result_message(msg['id'], {
+            'states': [state for state in states
+                       if state.last_updated > since],
+            'entity_ids': [state.entity_id for state in states],
+        }))
+
     def handle_get_services(self, msg):
         """Handle get services command."""
         msg = GET_SERVICES_MESSAGE_SCHEMA(msg)
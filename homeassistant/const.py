@@ -137,6 +137,7 @@ CONF_SCAN_INTERVAL = 'scan_interval'
 CONF_SENDER = 'sender'
 CONF_SENSOR_CLASS = 'sensor_class'
 CONF_SENSORS = 'sensors'
+CONF_SETUP_TIMEOUT = 'setup_timeout'
 CONF_SSL = 'ssl'
 CONF_STATE = 'state'
 CONF_STRUCTURE = 'structure'
@@ -361,10 +362,14 @@ URL_API_EVENTS_EVENT = '/api/events/{}'
 URL_API_SERVICES = '/api/services'
 URL_API_SERVICES_SERVICE = '/api/services/{}/{}'
 URL_API_EVENT_FORWARD = '/api/event_forwarding'
+URL_API_EVENT_FORWARD_BULK = '/api/event_forwarding/bulk'
 URL_API_COMPONENTS = '/api/components'
 URL_API_ERROR_LOG = '/api/error_log'
 URL_API_LOG_OUT = '/api/log_out'
 URL_API_TEMPLATE = '/api/template'
+URL_API_BOOTSTRAP_TIMELINE = '/api/bootstrap_timeline'
+URL_API_DISPATCHER_STATS = '/api/dispatcher_stats'
+URL_API_WEBSOCKET = '/api/websocket'
 
 HTTP_OK = 200
 HTTP_CREATED = 201
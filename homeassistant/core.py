@@ -16,7 +16,7 @@ import threading
 from time import monotonic
 
 from types import MappingProxyType
-from typing import Optional, Any, Callable, List  # NOQA
+from typing import Optional, Any, Callable, List, Dict  # NOQA
 
 import voluptuous as vol
 from voluptuous.humanize import humanize_error
@@ -211,11 +211,27 @@ class HomeAssistant(object):
         self._track_task = True
 
     @asyncio.coroutine
-    def async_stop_track_tasks(self):
-        """Track tasks so you can wait for all tasks to be done."""
-        yield from self.async_block_till_done()
+    def async_stop_track_tasks(self, timeout=None):
+        """Stop tracking tasks once all tracked tasks are done.
+
+        Stops waiting for the tracked tasks after timeout seconds if given.
+        """
+        if timeout is None:
+            yield from self.async_block_till_done()
+        else:
+            task = self.loop.create_task(self.async_block_till_done())
+            yield from asyncio.wait([task], loop=self.loop, timeout=timeout)
+            # Only stops the waiting, not the tasks it waits for
+            task.cancel()
+
         self._track_task = False
 
+    @callback
+    def async_untrack_tasks(self, tasks):
+        """Stop waiting for tasks when blocking till pending work is done."""
+        self._pending_tasks[:] = [task for task in self._pending_tasks
+                                  if task not in tasks]
+
     @callback
     def async_run_job(self, target: Callable[..., None], *args: Any) -> None:
         """Run a job from within the event loop.
@@ -595,8 +611,14 @@ class StateMachine(object):
     def __init__(self, bus, loop):
         """Initialize state machine."""
         self._states = {}
+        # States by domain and entity id
+        self._domains = {}
+        # Sorted entity ids per domain, dropped when entities come or go
+        self._domain_entity_ids = {}
         self._bus = bus
         self._loop = loop
+        # Incremented on every change, allows callers to cache derived data
+        self.generation = 0
 
     def entity_ids(self, domain_filter=None):
         """List of entity ids that are being tracked."""
@@ -614,22 +636,85 @@ class StateMachine(object):
         if domain_filter is None:
             return list(self._states.keys())
 
-        domain_filter = domain_filter.lower()
+        return list(self._async_domain_entity_ids(domain_filter.lower()))
 
-        return [state.entity_id for state in self._states.values()
-                if state.domain == domain_filter]
-
-    def all(self):
+    def all(self, domain_filter=None):
         """Create a list of all states."""
-        return run_callback_threadsafe(self._loop, self.async_all).result()
+        return run_callback_threadsafe(
+            self._loop, self.async_all, domain_filter).result()
 
     @callback
-    def async_all(self):
+    def async_all(self, domain_filter=None):
         """Create a list of all states.
 
+        The states of a domain are sorted by entity id.
+
         This method must be run in the event loop.
         """
-        return list(self._states.values())
+        if domain_filter is None:
+            return list(self._states.values())
+
+        domain_filter = domain_filter.lower()
+        domain_states = self._domains.get(domain_filter)
+
+        if domain_states is None:
+            return []
+
+        return [domain_states[entity_id] for entity_id
+                in self._async_domain_entity_ids(domain_filter)]
+
+    def _async_domain_entity_ids(self, domain):
+        """Return the sorted entity ids of a domain."""
+        entity_ids = self._domain_entity_ids.get(domain)
+
+        if entity_ids is None:
+            entity_ids = self._domain_entity_ids[domain] = \
+                sorted(self._domains.get(domain, ()))
+
+        return entity_ids
+
+    def _store(self, state):
+        """Store the new state of an entity.
+
+        Returns the previous state of the entity.
+        """
+        entity_id = state.entity_id
+        old_state = self._states.get(entity_id)
+        self._states[entity_id] = state
+
+        if old_state is None:
+            self._domain_entity_ids.pop(state.domain, None)
+
+        self._domains.setdefault(state.domain, {})[entity_id] = state
+        self.generation += 1
+        return old_state
+
+    def _discard(self, entity_id):
+        """Remove the state of an entity.
+
+        Returns the removed state, None if the entity had no state.
+        """
+        old_state = self._states.pop(entity_id, None)
+
+        if old_state is None:
+            return None
+
+        domain_states = self._domains[old_state.domain]
+        domain_states.pop(entity_id)
+        if not domain_states:
+            self._domains.pop(old_state.domain)
+        self._domain_entity_ids.pop(old_state.domain, None)
+        self.generation += 1
+        return old_state
+
+    def _replace(self, states):
+        """Replace all states without firing events."""
+        self._states = {}
+        self._domains = {}
+        self._domain_entity_ids = {}
+
+        for state in states:
+            self._store(state)
 
     def get(self, entity_id):
         """Retrieve state of entity_id or None if not found.
@@ -671,7 +756,7 @@ class StateMachine(object):
         This method must be run in the event loop.
         """
         entity_id = entity_id.lower()
-        old_state = self._states.pop(entity_id, None)
+        old_state = self._discard(entity_id)
 
         if old_state is None:
             return False
@@ -722,7 +807,7 @@ class StateMachine(object):
 
         last_changed = old_state.last_changed if same_state else None
         state = State(entity_id, new_state, attributes, last_changed)
-        self._states[entity_id] = state
+        self._store(state)
         self._bus.async_fire(EVENT_STATE_CHANGED, {
             'entity_id': entity_id,
             'old_state': old_state,
@@ -782,6 +867,8 @@ class ServiceRegistry(object):
         self._services = {}
         self._hass = hass
         self._async_unsub_call_event = None
+        # Incremented on every (un)registration of a service
+        self.generation = 0
 
         def _gen_unique_id():
             cur_id = 1
@@ -856,6 +943,8 @@ class ServiceRegistry(object):
         else:
             self._services[domain] = {service: service_obj}
 
+        self.generation += 1
+
         if self._async_unsub_call_event is None:
             self._async_unsub_call_event = self._hass.bus.async_listen(
                 EVENT_CALL_SERVICE, self._event_to_service_call)
@@ -885,6 +974,7 @@ class ServiceRegistry(object):
             return
 
         self._services[domain].pop(service)
+        self.generation += 1
 
         self._hass.bus.async_fire(
             EVENT_SERVICE_REMOVED,
@@ -1036,6 +1126,9 @@ class Config(object):
         # List of loaded components
         self.components = set()
 
+        # Seconds startup waits for the setup of a component, by domain
+        self.setup_timeouts = {}  # type: Dict[str, float]
+
         # Remote.API object pointing at local API
         self.api = None
 
@@ -23,6 +23,23 @@ from homeassistant.util.async import run_callback_threadsafe
 FROM_CONFIG_FORMAT = '{}_from_config'
 ASYNC_FROM_CONFIG_FORMAT = 'async_{}_from_config'
 
+DATA_CONDITION_CACHE = 'condition_cache'
+
+# Relative cost to evaluate conditions, cheap conditions are tested first
+COST_STATE = 0
+COST_TIME = 1
+COST_TEMPLATE = 2
+COST_LOCATION = 3
+
+CONDITION_COSTS = {
+    'numeric_state': COST_STATE,
+    'state': COST_STATE,
+    'time': COST_TIME,
+    'template': COST_TEMPLATE,
+    'sun': COST_LOCATION,
+    'zone': COST_LOCATION,
+}
+
 _LOGGER = logging.getLogger(__name__)
 
 # PyLint does not like the use of _threaded_factory
@@ -64,12 +81,87 @@ def async_from_config(config: ConfigType, config_validation: bool=True):
         raise HomeAssistantError('Invalid condition "{}" specified {}'.format(
             config.get(CONF_CONDITION), config))
 
-    return factory(config, config_validation)
+    check = factory(config, config_validation)
+
+    # Only validated configs give reliable keys
+    key = None if config_validation else _state_key(config)
+
+    if key is None:
+        return check
+
+    def if_memoized(hass, variables=None):
+        """Test condition, once per state change for all equal conditions."""
+        generation, results = hass.data.get(DATA_CONDITION_CACHE, (0, None))
+
+        if results is None or generation != hass.states.generation:
+            results = {}
+            hass.data[DATA_CONDITION_CACHE] = \
+                (hass.states.generation, results)
+
+        result = results.get(key)
+
+        if result is None:
+            result = results[key] = check(hass, variables)
+
+        return result
+
+    return if_memoized
 
 
 from_config = _threaded_factory(async_from_config)
 
 
+def condition_cost(config: ConfigType) -> int:
+    """Return the relative cost to test a validated condition config."""
+    condition_type = config.get(CONF_CONDITION)
+
+    if condition_type in ('and', 'or'):
+        return max((condition_cost(entry) for entry in config['conditions']),
+                   default=COST_STATE)
+
+    if condition_type == 'numeric_state' and \
+            config.get(CONF_VALUE_TEMPLATE) is not None:
+        return COST_TEMPLATE
+
+    return CONDITION_COSTS.get(condition_type, COST_LOCATION)
+
+
+def sort_by_cost(configs):
+    """Return validated condition configs ordered from cheap to expensive.
+
+    Only use this for conditions that are combined with 'AND' or 'OR', the
+    order of conditions with the same cost is kept.
+    """
+    return sorted(configs, key=condition_cost)
+
+
+def _state_key(config):
+    """Return key of a condition that only depends on states, else None.
+
+    Conditions with an equal key have the same result until a state changes.
+    """
+    condition_type = config.get(CONF_CONDITION)
+
+    if condition_type in ('and', 'or'):
+        keys = tuple(_state_key(entry) for entry in config['conditions'])
+
+        if any(key is None for key in keys):
+            return None
+
+        return (condition_type,) + keys
+
+    if condition_type == 'state' and config.get('for') is None:
+        return (condition_type, config[CONF_ENTITY_ID], config[CONF_STATE])
+
+    # The value template is rendered with the trigger variables
+    if condition_type == 'numeric_state' and \
+            config.get(CONF_VALUE_TEMPLATE) is None:
+        return (condition_type, config[CONF_ENTITY_ID],
+                config.get(CONF_BELOW), config.get(CONF_ABOVE))
+
+    return None
+
+
 def async_and_from_config(config: ConfigType, config_validation: bool=True):
     """Create multi condition matcher using 'AND'."""
     if config_validation:
@@ -83,7 +175,7 @@ def async_and_from_config(config: ConfigType, config_validation: bool=True):
 
         if checks is None:
             checks = [async_from_config(entry, False) for entry
-                      in config['conditions']]
+                      in sort_by_cost(config['conditions'])]
 
         try:
             for check in checks:
@@ -114,7 +206,7 @@ def async_or_from_config(config: ConfigType, config_validation: bool=True):
 
         if checks is None:
             checks = [async_from_config(entry, False) for entry
-                      in config['conditions']]
+                      in sort_by_cost(config['conditions'])]
 
         try:
             for check in checks:
@@ -280,10 +372,17 @@ def template(hass, value_template, variables=None):
     ).result()
 
 
-def async_template(hass, value_template, variables=None):
-    """Test if template condition matches."""
+def async_template(hass, value_template, variables=None, render_info=None):
+    """Test if template condition matches.
+
+    Records the states the template accessed in render_info if passed.
+    """
     try:
-        value = value_template.async_render(variables)
+        if render_info is None:
+            value = value_template.async_render(variables)
+        else:
+            value = value_template.async_render_tracked(
+                render_info, variables)
     except TemplateError as ex:
         _LOGGER.error('Error during template condition: %s', ex)
         return False
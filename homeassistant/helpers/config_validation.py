@@ -530,8 +530,14 @@ _SCRIPT_WAIT_TEMPLATE_SCHEMA = vol.Schema({
     vol.Optional(CONF_TIMEOUT): vol.All(time_period, positive_timedelta),
 })
 
+_SCRIPT_PARALLEL_SCHEMA = vol.Schema({
+    vol.Optional(CONF_ALIAS): string,
+    vol.Required('parallel'): vol.All(ensure_list, [SERVICE_SCHEMA]),
+})
+
 SCRIPT_SCHEMA = vol.All(
     ensure_list,
     [vol.Any(SERVICE_SCHEMA, _SCRIPT_DELAY_SCHEMA,
-             _SCRIPT_WAIT_TEMPLATE_SCHEMA, EVENT_SCHEMA, CONDITION_SCHEMA)],
+             _SCRIPT_WAIT_TEMPLATE_SCHEMA, EVENT_SCHEMA, CONDITION_SCHEMA,
+             _SCRIPT_PARALLEL_SCHEMA)],
 )
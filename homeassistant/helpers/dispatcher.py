@@ -1,12 +1,20 @@
-"""Helpers for hass dispatcher & internal component / platform."""
+"""Helpers for hass dispatcher & internal component / platform.
+
+Signals are plain keys, to address a single entity include its entity id in
+the signal, e.g. SIGNAL_REFRESH_ENTITY_FORMAT.format(entity_id), instead of
+sending to every listener and filtering in the listeners.
+"""
+import asyncio
+from collections import Counter
 import logging
 
-from homeassistant.core import callback
+from homeassistant.core import callback, is_callback
 from homeassistant.util.async import run_callback_threadsafe
 
 
 _LOGGER = logging.getLogger(__name__)
 DATA_DISPATCHER = 'dispatcher'
+DATA_DISPATCHER_SENT = 'dispatcher_sent'
 
 
 def dispatcher_connect(hass, signal, target):
@@ -39,12 +47,19 @@ def async_dispatcher_connect(hass, signal, target):
     def async_remove_dispatcher():
         """Remove signal listener."""
         try:
-            hass.data[DATA_DISPATCHER][signal].remove(target)
+            target_list = hass.data[DATA_DISPATCHER][signal]
+            target_list.remove(target)
         except (KeyError, ValueError):
             # KeyError is key target listener did not exist
             # ValueError if listener did not exist within signal
             _LOGGER.warning(
                 "Unable to remove unknown dispatcher %s", target)
+            return
+
+        # Signals per entity would otherwise pile up
+        if not target_list:
+            hass.data[DATA_DISPATCHER].pop(signal)
+            hass.data.get(DATA_DISPATCHER_SENT, {}).pop(signal, None)
 
     return async_remove_dispatcher
 
@@ -58,9 +73,65 @@ def dispatcher_send(hass, signal, *args):
 def async_dispatcher_send(hass, signal, *args):
     """Send signal and data.
 
+    Callbacks are called right away, functions are called one after
+    another in a single executor job and coroutines are scheduled as tasks.
+
+    This method must be run in the event loop.
+    """
+    target_list = hass.data.get(DATA_DISPATCHER, {}).get(signal)
+
+    if not target_list:
+        return
+
+    # Only signals with targets are counted, so the counts stay bounded
+    if DATA_DISPATCHER_SENT not in hass.data:
+        hass.data[DATA_DISPATCHER_SENT] = Counter()
+
+    hass.data[DATA_DISPATCHER_SENT][signal] += 1
+
+    functions = []
+
+    # Copy as targets can disconnect while being called
+    for target in list(target_list):
+        if is_callback(target):
+            try:
+                target(*args)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(
+                    "Error running dispatcher target %s for %s",
+                    target, signal)
+        elif asyncio.iscoroutinefunction(target):
+            hass.async_add_job(target, *args)
+        else:
+            functions.append(target)
+
+    if len(functions) == 1:
+        hass.async_add_job(functions[0], *args)
+    elif functions:
+        hass.async_add_job(_run_functions, signal, functions, args)
+
+
+def _run_functions(signal, functions, args):
+    """Call all functions listening to a signal in the executor."""
+    for target in functions:
+        try:
+            target(*args)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception(
+                "Error running dispatcher target %s for %s", target, signal)
+
+
+@callback
+def async_dispatcher_stats(hass):
+    """Return the number of connected targets and sends per signal.
+
+    Sends are counted while a signal has targets.
+
     This method must be run in the event loop.
     """
-    target_list = hass.data.get(DATA_DISPATCHER, {}).get(signal, [])
+    targets = hass.data.get(DATA_DISPATCHER, {})
+    sent = hass.data.get(DATA_DISPATCHER_SENT, {})
 
-    for target in target_list:
-        hass.async_add_job(target, *args)
+    return {signal: {'connected': len(signal_targets),
+                     'sent': sent.get(signal, 0)}
+            for signal, signal_targets in targets.items()}
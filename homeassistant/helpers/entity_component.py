@@ -10,7 +10,7 @@ from homeassistant.const import (
 from homeassistant.core import callback, valid_entity_id
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.loader import get_component
-from homeassistant.helpers import config_per_platform, discovery
+from homeassistant.helpers import config_per_platform, discovery, timeline
 from homeassistant.helpers.entity import async_generate_entity_id
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.service import extract_entity_ids
@@ -114,6 +114,20 @@ class EntityComponent(object):
                               discovery_info=None):
         """Setup a platform for this component.
 
+        This method must be run in the event loop.
+        """
+        platform_path = '{}.{}'.format(self.domain, platform_type)
+
+        with timeline.span(self.hass, platform_path, timeline.PHASE_TOTAL):
+            yield from self._async_setup_platform_timed(
+                platform_type, platform_path, platform_config,
+                discovery_info)
+
+    @asyncio.coroutine
+    def _async_setup_platform_timed(self, platform_type, platform_path,
+                                    platform_config, discovery_info):
+        """Setup a platform for this component, recording the setup time.
+
         This method must be run in the event loop.
         """
         platform = yield from async_prepare_setup_platform(
@@ -142,21 +156,24 @@ class EntityComponent(object):
             SLOW_SETUP_WARNING)
 
         try:
-            if getattr(platform, 'async_setup_platform', None):
-                yield from platform.async_setup_platform(
-                    self.hass, platform_config,
-                    entity_platform.async_schedule_add_entities, discovery_info
-                )
-            else:
-                yield from self.hass.loop.run_in_executor(
-                    None, platform.setup_platform, self.hass, platform_config,
-                    entity_platform.schedule_add_entities, discovery_info
-                )
+            with timeline.span(self.hass, platform_path, timeline.PHASE_SETUP):
+                if getattr(platform, 'async_setup_platform', None):
+                    yield from platform.async_setup_platform(
+                        self.hass, platform_config,
+                        entity_platform.async_schedule_add_entities,
+                        discovery_info
+                    )
+                else:
+                    yield from self.hass.loop.run_in_executor(
+                        None, timeline.executor_job(
+                            self.hass, platform_path, platform.setup_platform),
+                        self.hass, platform_config,
+                        entity_platform.schedule_add_entities, discovery_info
+                    )
 
-            yield from entity_platform.async_block_entities_done()
+                yield from entity_platform.async_block_entities_done()
 
-            self.hass.config.components.add(
-                '{}.{}'.format(self.domain, platform_type))
+            self.hass.config.components.add(platform_path)
         except Exception:  # pylint: disable=broad-except
             self.logger.exception(
                 'Error while setting up platform %s', platform_type)
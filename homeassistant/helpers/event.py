@@ -8,6 +8,9 @@ from ..const import (
 from ..util import dt as dt_util
 from ..util.async import run_callback_threadsafe
 
+DATA_STATE_CHANGE_INDEX = 'state_change_index'
+DATA_DOMAIN_STATE_CHANGE_INDEX = 'domain_state_change_index'
+
 # PyLint does not like the use of threaded_listener_factory
 # pylint: disable=invalid-name
 
@@ -85,10 +88,241 @@ def async_track_state_change(hass, entity_ids, action, from_state=None,
 track_state_change = threaded_listener_factory(async_track_state_change)
 
 
+@callback
+def async_track_entity_state_change(hass, entity_ids, action,
+                                    from_state=None, to_state=None):
+    """Track specific state changes through a per entity index.
+
+    Works like async_track_state_change, but all listeners share a single
+    state_changed listener that only calls the listeners of the entity that
+    changed. Use this when there can be many listeners, like triggers.
+
+    Returns a function that can be called to remove the listener.
+
+    Must be run within the event loop.
+    """
+    index = hass.data.get(DATA_STATE_CHANGE_INDEX)
+
+    if index is None:
+        index = hass.data[DATA_STATE_CHANGE_INDEX] = _StateChangeIndex(hass)
+
+    if isinstance(entity_ids, str):
+        entity_ids = (entity_ids,)
+
+    return index.async_add(
+        tuple(entity_id.lower() for entity_id in entity_ids),
+        (_process_state_match(from_state), _process_state_match(to_state),
+         action))
+
+
+@callback
+def async_track_domain_state_change(hass, domains, action):
+    """Track state changes of all entities of domains through an index.
+
+    Returns a function that can be called to remove the listener.
+
+    Must be run within the event loop.
+    """
+    index = hass.data.get(DATA_DOMAIN_STATE_CHANGE_INDEX)
+
+    if index is None:
+        index = hass.data[DATA_DOMAIN_STATE_CHANGE_INDEX] = \
+            _StateChangeIndex(hass, by_domain=True)
+
+    if isinstance(domains, str):
+        domains = (domains,)
+
+    return index.async_add(
+        tuple(domain.lower() for domain in domains),
+        (MATCH_ALL, MATCH_ALL, action))
+
+
+class _StateChangeIndex(object):
+    """Listeners for state changes indexed by entity id or domain."""
+
+    def __init__(self, hass, by_domain=False):
+        """Initialize an empty index."""
+        self._hass = hass
+        self._by_domain = by_domain
+        self._listeners = {}
+        self._unsub = None
+
+    @callback
+    def async_add(self, entity_ids, listener):
+        """Add a listener for the entities and return its remover."""
+        if self._unsub is None:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_state_changed)
+
+        for entity_id in entity_ids:
+            self._listeners.setdefault(entity_id, []).append(listener)
+
+        @callback
+        def async_remove():
+            """Remove the listener from the index."""
+            for entity_id in entity_ids:
+                listeners = self._listeners.get(entity_id)
+
+                if listeners is None or listener not in listeners:
+                    continue
+
+                listeners.remove(listener)
+
+                if not listeners:
+                    self._listeners.pop(entity_id)
+
+            if not self._listeners and self._unsub is not None:
+                self._unsub()
+                self._unsub = None
+
+        return async_remove
+
+    @callback
+    def _async_state_changed(self, event):
+        """Call the listeners of the changed entity that match."""
+        entity_id = event.data.get('entity_id')
+
+        if self._by_domain:
+            listeners = self._listeners.get(entity_id.split('.', 1)[0])
+        else:
+            listeners = self._listeners.get(entity_id)
+
+        if listeners is None:
+            return
+
+        old_state = event.data.get('old_state')
+        new_state = event.data.get('new_state')
+        old_value = None if old_state is None else old_state.state
+        new_value = None if new_state is None else new_state.state
+
+        # Copy, listeners can add or remove listeners of this entity
+        for from_state, to_state, action in tuple(listeners):
+            if _matcher(old_value, from_state) and \
+                    _matcher(new_value, to_state):
+                self._hass.async_run_job(
+                    action, entity_id, old_state, new_state)
+
+
+@callback
+def async_track_render_info(hass, render_info, action):
+    """Track state changes of the states a template accessed.
+
+    render_info is filled by Template.async_render_tracked, after each
+    render the tracked states follow what that render accessed. Entities
+    and domains are tracked through the per entity and per domain indexes,
+    only templates that accessed all states listen to every state change.
+
+    Returns a function that can be called to remove the listener.
+
+    Must be run within the event loop.
+    """
+    tracker = _RenderInfoTracker(hass, render_info, action)
+    tracker.async_refresh()
+    return tracker.async_remove
+
+
+class _RenderInfoTracker(object):
+    """Listeners for the states a render info recorded."""
+
+    def __init__(self, hass, render_info, action):
+        """Initialize the tracker without listeners."""
+        self._hass = hass
+        self._render_info = render_info
+        self._action = action
+        self._entities = None
+        self._domains = None
+        self._unsub_entities = None
+        self._unsub_domains = None
+        self._unsub_all = None
+        self._unsub_render = render_info.async_add_listener(
+            self.async_refresh)
+
+    @callback
+    def async_refresh(self):
+        """Listen to the states of the last render."""
+        info = self._render_info
+
+        # Without accessed states a template can depend on anything
+        if info.all_states or not (info.domains or info.entities):
+            self._async_track(set(), set())
+
+            if self._unsub_all is None:
+                self._unsub_all = self._hass.bus.async_listen(
+                    EVENT_STATE_CHANGED, self._async_state_changed)
+            return
+
+        if self._unsub_all is not None:
+            self._unsub_all()
+            self._unsub_all = None
+
+        # Entities of a tracked domain are tracked through their domain
+        self._async_track(
+            set(entity_id for entity_id in info.entities
+                if entity_id.split('.', 1)[0] not in info.domains),
+            set(info.domains))
+
+    @callback
+    def _async_track(self, entities, domains):
+        """Listen to changes of entities and domains if they changed."""
+        if entities != self._entities:
+            if self._unsub_entities is not None:
+                self._unsub_entities()
+                self._unsub_entities = None
+
+            if entities:
+                self._unsub_entities = async_track_entity_state_change(
+                    self._hass, entities, self._action)
+
+            self._entities = entities
+
+        if domains != self._domains:
+            if self._unsub_domains is not None:
+                self._unsub_domains()
+                self._unsub_domains = None
+
+            if domains:
+                self._unsub_domains = async_track_domain_state_change(
+                    self._hass, domains, self._action)
+
+            self._domains = domains
+
+    @callback
+    def _async_state_changed(self, event):
+        """Call the action for any state change."""
+        self._hass.async_run_job(self._action, event.data.get('entity_id'),
+                                 event.data.get('old_state'),
+                                 event.data.get('new_state'))
+
+    @callback
+    def async_remove(self):
+        """Remove all listeners."""
+        self._unsub_render()
+        self._async_track(set(), set())
+
+        if self._unsub_all is not None:
+            self._unsub_all()
+            self._unsub_all = None
+
+
 @callback
 def async_track_template(hass, template, action, variables=None):
-    """Add a listener that track state changes with template condition."""
+    """Add a listener that track state changes with template condition.
+
+    Only changes of the states the template accessed the last time it was
+    rendered can change the result, others don't render it again.
+    """
     from . import condition
+    from .template import RenderInfo
+    from ..exceptions import TemplateError
+
+    render_info = RenderInfo()
+    template.hass = hass
+
+    # Find out what the template accesses
+    try:
+        template.async_render_tracked(render_info, variables)
+    except TemplateError:
+        pass
 
     # Local variable to keep track of if the action has already been triggered
     already_triggered = False
@@ -97,7 +331,9 @@ def async_track_template(hass, template, action, variables=None):
     def template_condition_listener(entity_id, from_s, to_s):
         """Check if condition is correct and run action."""
         nonlocal already_triggered
-        template_result = condition.async_template(hass, template, variables)
+        render_info.clear()
+        template_result = condition.async_template(
+            hass, template, variables, render_info)
 
         # Check to see if template returns true
         if template_result and not already_triggered:
@@ -106,8 +342,8 @@ def async_track_template(hass, template, action, variables=None):
         elif not template_result:
             already_triggered = False
 
-    return async_track_state_change(
-        hass, template.extract_entities(), template_condition_listener)
+    return async_track_render_info(
+        hass, render_info, template_condition_listener)
 
 
 track_template = threaded_listener_factory(async_track_template)
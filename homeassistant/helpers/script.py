@@ -1,13 +1,12 @@
 """Helpers to execute scripts."""
 import asyncio
 import logging
-from itertools import islice
 from typing import Optional, Sequence
 
 import voluptuous as vol
 
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.const import CONF_CONDITION, CONF_TIMEOUT
+from homeassistant.const import ATTR_ENTITY_ID, CONF_CONDITION, CONF_TIMEOUT
 from homeassistant.helpers import (
     service, condition, template, config_validation as cv)
 from homeassistant.helpers.event import (
@@ -27,6 +26,35 @@ CONF_EVENT = "event"
 CONF_EVENT_DATA = "event_data"
 CONF_DELAY = "delay"
 CONF_WAIT_TEMPLATE = "wait_template"
+CONF_PARALLEL = "parallel"
+CONF_MODE = "mode"
+CONF_MAX = "max"
+
+# Run again while running: continue a delay or wait right away
+MODE_LEGACY = 'legacy'
+# Stop the running run and start again
+MODE_RESTART = 'restart'
+# Start when the previous runs are done
+MODE_QUEUED = 'queued'
+# Run alongside the running runs
+MODE_PARALLEL = 'parallel'
+SCRIPT_MODES = [MODE_LEGACY, MODE_RESTART, MODE_QUEUED, MODE_PARALLEL]
+
+# Maximum number of runs running or queued at the same time
+DEFAULT_MAX_RUNS = 10
+
+SCRIPT_MODE_SCHEMA = {
+    vol.Optional(CONF_MODE, default=MODE_LEGACY): vol.In(SCRIPT_MODES),
+    vol.Optional(CONF_MAX, default=DEFAULT_MAX_RUNS):
+        vol.All(vol.Coerce(int), vol.Range(min=1)),
+}
+
+STEP_SERVICE = 'service'
+STEP_CONDITION = 'condition'
+STEP_EVENT = 'event'
+STEP_DELAY = 'delay'
+STEP_WAIT_TEMPLATE = 'wait_template'
+STEP_PARALLEL = 'parallel'
 
 
 def call_from_config(hass: HomeAssistant, config: ConfigType,
@@ -39,26 +67,79 @@ class Script():
     """Representation of a script."""
 
     def __init__(self, hass: HomeAssistant, sequence, name: str=None,
-                 change_listener=None) -> None:
+                 change_listener=None, mode: str=MODE_LEGACY,
+                 max_runs: int=DEFAULT_MAX_RUNS) -> None:
         """Initialize the script."""
         self.hass = hass
         self.sequence = sequence
         template.attach(hass, self.sequence)
         self.name = name
+        self.mode = mode
+        self.max_runs = max_runs
         self._change_listener = change_listener
         self._cur = -1
         self.last_action = None
         self.last_triggered = None
+        self.run_count = 0
+        self.last_run_duration = None
         self.can_cancel = any(CONF_DELAY in action or CONF_WAIT_TEMPLATE
                               in action for action in self.sequence)
         self._async_listener = []
         self._template_cache = {}
         self._config_cache = {}
+        self._run_start = None
+        self._runs = []
+        self._steps = [self._compile_step(index, action)
+                       for index, action in enumerate(self.sequence)]
+
+    def _compile_step(self, index, action):
+        """Return the kind of a step and what it needs to be run."""
+        if CONF_DELAY in action:
+            return STEP_DELAY, action, action[CONF_DELAY]
+
+        elif CONF_WAIT_TEMPLATE in action:
+            return STEP_WAIT_TEMPLATE, action, action[CONF_WAIT_TEMPLATE]
+
+        elif CONF_CONDITION in action:
+            check = self._config_cache[index] = condition.async_from_config(
+                action, False)
+            return STEP_CONDITION, action, check
+
+        elif CONF_EVENT in action:
+            return STEP_EVENT, action, None
+
+        elif CONF_PARALLEL in action:
+            return STEP_PARALLEL, action, [
+                (call, _static_service_call(call))
+                for call in action[CONF_PARALLEL]]
+
+        return STEP_SERVICE, action, _static_service_call(action)
+
+    @property
+    def change_listener(self):
+        """Return the callable called when the state of the script changes."""
+        return self._change_listener
+
+    @change_listener.setter
+    def change_listener(self, change_listener) -> None:
+        """Set the callable called when the state of the script changes."""
+        self._change_listener = change_listener
 
     @property
     def is_running(self) -> bool:
         """Return true if script is on."""
-        return self._cur != -1
+        if self.mode == MODE_LEGACY:
+            return self._cur != -1
+
+        return bool(self._runs)
+
+    @property
+    def runs(self) -> int:
+        """Return the number of runs that are running or queued."""
+        if self.mode == MODE_LEGACY:
+            return int(self._cur != -1)
+
+        return len(self._runs)
 
     def run(self, variables=None):
         """Run script."""
@@ -69,20 +150,77 @@ class Script():
     def async_run(self, variables: Optional[Sequence]=None) -> None:
         """Run script.
 
+        Returns when the run is done, reaches a delay or wait or is queued.
+
+        This method is a coroutine.
+        """
+        if self.mode == MODE_LEGACY:
+            yield from self._async_run_legacy(variables)
+            return
+
+        if self.mode == MODE_RESTART:
+            self._async_cancel_runs()
+
+        elif len(self._runs) >= self.max_runs:
+            _LOGGER.warning(
+                "Script %s: not started, already %s runs %s", self.name,
+                len(self._runs),
+                'queued' if self.mode == MODE_QUEUED else 'running')
+            return
+
+        run = _ScriptRun(self.hass, variables)
+        self._runs.append(run)
+
+        if self.mode != MODE_QUEUED or len(self._runs) == 1:
+            self._async_start_run(run)
+        else:
+            run.async_pause()
+
+        if len(self._runs) == 1 and self._change_listener:
+            self.hass.async_add_job(self._change_listener)
+
+        yield from run.async_wait_paused()
+
+    @asyncio.coroutine
+    def _async_run_legacy(self, variables):
+        """Run or continue the only run of the script.
+
         This method is a coroutine.
         """
         self.last_triggered = date_util.utcnow()
         if self._cur == -1:
             self._log('Running script')
             self._cur = 0
+            self.run_count += 1
+            self._run_start = self.hass.loop.time()
 
         # Unregister callback if we were in a delay or wait but turn on is
         # called again. In that case we just continue execution.
-        self._async_remove_listener()
+        if self._async_listener:
+            self._async_remove_listener()
 
-        for cur, action in islice(enumerate(self.sequence), self._cur, None):
+        steps = self._steps
 
-            if CONF_DELAY in action:
+        for cur in range(self._cur, len(steps)):
+            kind, action, prepared = steps[cur]
+
+            if kind == STEP_SERVICE:
+                yield from self._async_call_service(
+                    action, prepared, variables)
+
+            elif kind == STEP_CONDITION:
+                if not self._async_check_condition(
+                        action, prepared, variables):
+                    break
+
+            elif kind == STEP_EVENT:
+                self._async_fire_event(action)
+
+            elif kind == STEP_PARALLEL:
+                yield from self._async_call_parallel(
+                    action, prepared, variables)
+
+            elif kind == STEP_DELAY:
                 # Call ourselves in the future to continue work
                 unsub = None
 
@@ -93,13 +231,7 @@ class Script():
                     self._async_listener.remove(unsub)
                     self.hass.async_add_job(self.async_run(variables))
 
-                delay = action[CONF_DELAY]
-
-                if isinstance(delay, template.Template):
-                    delay = vol.All(
-                        cv.time_period,
-                        cv.positive_timedelta)(
-                            delay.async_render(variables))
+                delay = self._async_render_delay(prepared, variables)
 
                 unsub = async_track_point_in_utc_time(
                     self.hass, async_script_delay,
@@ -112,10 +244,9 @@ class Script():
                     self.hass.async_add_job(self._change_listener)
                 return
 
-            elif CONF_WAIT_TEMPLATE in action:
+            else:
                 # Call ourselves in the future to continue work
-                wait_template = action[CONF_WAIT_TEMPLATE]
-                wait_template.hass = self.hass
+                wait_template = prepared
 
                 # check if condition allready okay
                 if condition.async_template(
@@ -140,20 +271,169 @@ class Script():
 
                 return
 
-            elif CONF_CONDITION in action:
-                if not self._async_check_condition(action, variables):
+        self._cur = -1
+        self.last_action = None
+        self.last_run_duration = self.hass.loop.time() - self._run_start
+        if self._change_listener:
+            self.hass.async_add_job(self._change_listener)
+
+    @callback
+    def _async_start_run(self, run):
+        """Start executing the steps of a run."""
+        run.task = self.hass.loop.create_task(self._async_execute(run))
+
+        @callback
+        def async_run_done(task):
+            """Forget the finished, failed or cancelled run."""
+            self._runs.remove(run)
+            run.async_pause()
+
+            if not task.cancelled() and task.exception() is not None:
+                _LOGGER.error("Script %s: error while running: %s",
+                              self.name, task.exception())
+
+            if self.mode == MODE_QUEUED and self._runs:
+                self._async_start_run(self._runs[0])
+                self._runs[0].async_resume()
+
+            if self._change_listener:
+                self.hass.async_add_job(self._change_listener)
+
+        run.task.add_done_callback(async_run_done)
+
+    @asyncio.coroutine
+    def _async_execute(self, run):
+        """Run all steps, waiting for delays and waits.
+
+        This method is a coroutine.
+        """
+        variables = run.variables
+        self.last_triggered = date_util.utcnow()
+        self.run_count += 1
+        start = self.hass.loop.time()
+        self._log('Running script')
+
+        for kind, action, prepared in self._steps:
+            if kind == STEP_SERVICE:
+                yield from self._async_call_service(
+                    action, prepared, variables)
+
+            elif kind == STEP_CONDITION:
+                if not self._async_check_condition(
+                        action, prepared, variables):
                     break
 
-            elif CONF_EVENT in action:
+            elif kind == STEP_EVENT:
                 self._async_fire_event(action)
 
-            else:
-                yield from self._async_call_service(action, variables)
+            elif kind == STEP_PARALLEL:
+                yield from self._async_call_parallel(
+                    action, prepared, variables)
+
+            elif kind == STEP_DELAY:
+                self.last_action = action.get(CONF_ALIAS, 'delay')
+                delay = self._async_render_delay(prepared, variables)
+                yield from self._async_wait_until(
+                    run, date_util.utcnow() + delay)
+
+            elif not condition.async_template(
+                    self.hass, prepared, variables):
+                self.last_action = action.get(CONF_ALIAS, 'wait')
+
+                if not (yield from self._async_wait_template(
+                        run, prepared, action.get(CONF_TIMEOUT))):
+                    self._log("Timout reach, abort script.")
+                    break
 
-        self._cur = -1
         self.last_action = None
-        if self._change_listener:
-            self.hass.async_add_job(self._change_listener)
+        self.last_run_duration = self.hass.loop.time() - start
+
+    @asyncio.coroutine
+    def _async_wait_until(self, run, point_in_time):
+        """Wait until a point in time.
+
+        This method is a coroutine.
+        """
+        future = asyncio.Future(loop=self.hass.loop)
+
+        @callback
+        def async_time_reached(now):
+            """Continue the run."""
+            if not future.done():
+                run.async_resume()
+                future.set_result(None)
+
+        unsub = async_track_point_in_utc_time(
+            self.hass, async_time_reached, point_in_time)
+
+        run.async_pause()
+
+        try:
+            yield from future
+        finally:
+            # The listener removes itself once it fired
+            if not future.done() or future.cancelled():
+                unsub()
+
+    @asyncio.coroutine
+    def _async_wait_template(self, run, wait_template, timeout):
+        """Wait until the template renders true, False on timeout.
+
+        This method is a coroutine.
+        """
+        future = asyncio.Future(loop=self.hass.loop)
+
+        @callback
+        def async_template_true(entity_id, from_s, to_s):
+            """Continue the run."""
+            if not future.done():
+                run.async_resume()
+                future.set_result(True)
+
+        @callback
+        def async_timeout(now):
+            """Abort the run."""
+            if not future.done():
+                run.async_resume()
+                future.set_result(False)
+
+        unsub_template = async_track_template(
+            self.hass, wait_template, async_template_true)
+
+        if timeout is not None:
+            unsub_timeout = async_track_point_in_utc_time(
+                self.hass, async_timeout, date_util.utcnow() + timeout)
+
+        run.async_pause()
+
+        try:
+            result = yield from future
+        finally:
+            unsub_template()
+            # The timeout listener removes itself once it fired
+            if timeout is not None and \
+                    (future.cancelled() or future.result()):
+                unsub_timeout()
+
+        return result
+
+    def _async_cancel_runs(self):
+        """Cancel all running and queued runs."""
+        for run in list(self._runs):
+            if run.task is None:
+                self._runs.remove(run)
+            else:
+                run.task.cancel()
+
+    def _async_render_delay(self, delay, variables):
+        """Return the delay of a step as timedelta."""
+        if isinstance(delay, template.Template):
+            delay = vol.All(
+                cv.time_period,
+                cv.positive_timedelta)(
+                    delay.async_render(variables))
+
+        return delay
 
     def stop(self) -> None:
         """Stop running script."""
@@ -161,6 +441,10 @@ class Script():
 
     def async_stop(self) -> None:
         """Stop running script."""
+        if self.mode != MODE_LEGACY:
+            self._async_cancel_runs()
+            return
+
         if self._cur == -1:
             return
 
@@ -170,35 +454,49 @@ class Script():
             self.hass.async_add_job(self._change_listener)
 
     @asyncio.coroutine
-    def _async_call_service(self, action, variables):
+    def _async_call_service(self, action, static_call, variables):
         """Call the service specified in the action.
 
         This method is a coroutine.
         """
         self.last_action = action.get(CONF_ALIAS, 'call service')
-        self._log("Executing step %s" % self.last_action)
-        yield from service.async_call_from_config(
-            self.hass, action, True, variables, validate_config=False)
+        self._log("Executing step %s", self.last_action)
+
+        if static_call is None:
+            yield from service.async_call_from_config(
+                self.hass, action, True, variables, validate_config=False)
+            return
+
+        domain, service_name, service_data = static_call
+        yield from self.hass.services.async_call(
+            domain, service_name, dict(service_data), True)
+
+    @asyncio.coroutine
+    def _async_call_parallel(self, action, calls, variables):
+        """Call the services of a parallel block at the same time.
+
+        This method is a coroutine.
+        """
+        self.last_action = action.get(CONF_ALIAS, 'parallel')
+        self._log("Executing step %s", self.last_action)
+
+        yield from asyncio.gather(*[
+            self._async_call_service(call, static_call, variables)
+            for call, static_call in calls], loop=self.hass.loop)
 
     def _async_fire_event(self, action):
         """Fire an event."""
         self.last_action = action.get(CONF_ALIAS, action[CONF_EVENT])
-        self._log("Executing step %s" % self.last_action)
+        self._log("Executing step %s", self.last_action)
         self.hass.bus.async_fire(action[CONF_EVENT],
                                  action.get(CONF_EVENT_DATA))
 
-    def _async_check_condition(self, action, variables):
+    def _async_check_condition(self, action, check, variables):
         """Test if condition is matching."""
-        config_cache_key = frozenset((k, str(v)) for k, v in action.items())
-        config = self._config_cache.get(config_cache_key)
-        if not config:
-            config = condition.async_from_config(action, False)
-            self._config_cache[config_cache_key] = config
-
         self.last_action = action.get(CONF_ALIAS, action[CONF_CONDITION])
-        check = config(self.hass, variables)
-        self._log("Test condition {}: {}".format(self.last_action, check))
-        return check
+        result = check(self.hass, variables)
+        self._log("Test condition %s: %s", self.last_action, result)
+        return result
 
     def _async_set_timeout(self, action, variables):
         """Schedule a timeout to abort script."""
@@ -224,9 +522,66 @@ class Script():
             unsub()
         self._async_listener.clear()
 
-    def _log(self, msg):
+    def _log(self, msg, *args):
         """Logger helper."""
+        if not _LOGGER.isEnabledFor(logging.INFO):
+            return
+
         if self.name is not None:
-            msg = "Script {}: {}".format(self.name, msg)
+            msg = "Script %s: " + msg
+            args = (self.name,) + args
+
+        _LOGGER.info(msg, *args)
+
+
+class _ScriptRun(object):
+    """A run of a script in the restart, queued or parallel mode.
+
+    Like the legacy mode resuming with a new job after each delay or wait,
+    the run is tracked as a job of hass until it waits or is done.
+    """
+
+    def __init__(self, hass, variables):
+        """Initialize a run that is not started."""
+        self.hass = hass
+        self.variables = variables
+        self.task = None
+        self._paused = asyncio.Future(loop=hass.loop)
+
+    @asyncio.coroutine
+    def async_wait_paused(self):
+        """Wait until the run waits for something or is done.
+
+        This method is a coroutine.
+        """
+        yield from asyncio.wait([self._paused], loop=self.hass.loop)
+
+    @callback
+    def async_pause(self):
+        """Mark that the run waits for something or is done."""
+        if not self._paused.done():
+            self._paused.set_result(None)
+
+    @callback
+    def async_resume(self):
+        """Mark that the run continues."""
+        self._paused = asyncio.Future(loop=self.hass.loop)
+        self.hass.async_add_job(self.async_wait_paused())
+
+
+def _static_service_call(action):
+    """Return domain, service and data of a call without templates.
+
+    Returns None if the service or its data has to be rendered each run.
+    """
+    if CONF_SERVICE not in action or \
+            service.CONF_SERVICE_DATA_TEMPLATE in action:
+        return None
+
+    domain, service_name = action[CONF_SERVICE].split('.', 1)
+    service_data = dict(action.get(CONF_SERVICE_DATA, {}))
+
+    if service.CONF_SERVICE_ENTITY_ID in action:
+        service_data[ATTR_ENTITY_ID] = action[service.CONF_SERVICE_ENTITY_ID]
 
-        _LOGGER.info(msg)
+    return domain, service_name, service_data
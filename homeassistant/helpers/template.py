@@ -1,5 +1,7 @@
 """Template helper methods for rendering strings with HA data."""
+from collections import OrderedDict
 from datetime import datetime
+from fnmatch import fnmatchcase
 import json
 import logging
 import re
@@ -9,7 +11,7 @@ from jinja2.sandbox import ImmutableSandboxedEnvironment
 
 from homeassistant.const import (
     STATE_UNKNOWN, ATTR_LATITUDE, ATTR_LONGITUDE, MATCH_ALL)
-from homeassistant.core import State
+from homeassistant.core import State, callback, split_entity_id
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import location as loc_helper
 from homeassistant.loader import get_component
@@ -25,6 +27,20 @@ _RE_GET_ENTITIES = re.compile(
     r"(?:(?:states\.|(?:is_state|is_state_attr|states)\(.)([\w]+\.[\w]+))",
     re.I | re.M
 )
+# Templates like {{ value_json.a.b }} or {{ value_json['a'] }}
+_RE_JSON_KEYS = re.compile(
+    r"^\{\{\s*value_json((?:\.[a-zA-Z_]\w*|\[(?:'[^']*'|\"[^\"]*\")\])+)"
+    r"\s*\}\}$")
+_RE_JSON_KEY = re.compile(r"\.(\w+)|\['([^']*)'\]|\[\"([^\"]*)\"\]")
+# Templates without these are plain strings that don't need rendering
+_RE_JINJA_DELIMITERS = re.compile(r"\{[{%#]")
+# Templates using these can render differently without any state change
+_RE_VOLATILE = re.compile(r"\b(?:now|utcnow|relative_time|random)\b")
+_RE_GLOB = re.compile(r"[*?[]")
+
+# Maximum number of compiled template strings shared between instances
+COMPILED_CACHE_SIZE = 1000
+_COMPILED_CACHE = OrderedDict()
 
 
 def attach(hass, obj):
@@ -50,6 +66,140 @@ def extract_entities(template):
     return MATCH_ALL
 
 
+class RenderInfo(object):
+    """States that templates accessed while they were rendered."""
+
+    def __init__(self):
+        """Initialize an empty render info."""
+        self.all_states = False
+        self.domains = set()
+        self.entities = set()
+        self._listeners = []
+
+    def clear(self):
+        """Forget what was accessed, before rendering again."""
+        self.all_states = False
+        self.domains.clear()
+        self.entities.clear()
+
+    def matches(self, entity_id):
+        """Return if a change of entity_id can change the rendered result.
+
+        A template that accessed no states at all can depend on anything,
+        like the time, so it matches all entities.
+        """
+        if self.all_states or not (self.domains or self.entities):
+            return True
+
+        return (entity_id in self.entities or
+                split_entity_id(entity_id)[0] in self.domains)
+
+    def add_entity(self, entity_id):
+        """Record that the state of an entity was accessed."""
+        if isinstance(entity_id, str):
+            self.entities.add(entity_id.lower())
+
+    def update(self, other):
+        """Record the states another render info accessed."""
+        self.all_states = self.all_states or other.all_states
+        self.domains.update(other.domains)
+        self.entities.update(other.entities)
+
+    @callback
+    def async_add_listener(self, listener):
+        """Call listener after every tracked render into this render info.
+
+        Returns a function that can be called to remove the listener.
+        """
+        self._listeners.append(listener)
+
+        @callback
+        def async_remove():
+            """Remove the listener."""
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return async_remove
+
+    @callback
+    def async_rendered(self):
+        """Tell the listeners that a render recorded its states."""
+        for listener in tuple(self._listeners):
+            listener()
+
+
+class _RenderMemo(object):
+    """Result of a rendering and the states it depended on."""
+
+    def __init__(self, states, result, render_info):
+        """Remember the result and the current dependency states."""
+        self.result = result
+        self.render_info = render_info
+        self.generation = states.generation
+        self.entities = {entity_id: states.get(entity_id)
+                         for entity_id in render_info.entities}
+        self.domains = {domain: states.async_all(domain)
+                        for domain in render_info.domains}
+
+    def async_is_valid(self, states):
+        """Return if rendering again would give the same result.
+
+        This method must be run in the event loop.
+        """
+        if states.generation == self.generation:
+            return True
+
+        if self.render_info.all_states:
+            return False
+
+        for entity_id, state in self.entities.items():
+            if states.get(entity_id) is not state:
+                return False
+
+        for domain, domain_states in self.domains.items():
+            current = states.async_all(domain)
+
+            if len(current) != len(domain_states) or any(
+                    new is not old
+                    for new, old in zip(current, domain_states)):
+                return False
+
+        # Nothing we depend on changed, skip comparing next time
+        self.generation = states.generation
+        return True
+
+
+class JsonValue(str):
+    """String value that is decoded as JSON at most once.
+
+    Passing the same instance to all templates rendering a value shares the
+    decoded object between them.
+    """
+
+    def json(self):
+        """Return the decoded value, raises ValueError if it is no JSON."""
+        try:
+            decoded = self._json
+        except AttributeError:
+            try:
+                decoded = self._json = json.loads(self)
+            except ValueError:
+                decoded = self._json = _SENTINEL
+
+        if decoded is _SENTINEL:
+            raise ValueError('Value is not valid JSON')
+
+        return decoded
+
+
+def _decode_json(value):
+    """Decode a value as JSON, reusing the result for a JsonValue."""
+    if isinstance(value, JsonValue):
+        return value.json()
+
+    return json.loads(value)
+
+
 class Template(object):
     """Class to hold a template and manage caching and rendering."""
 
@@ -59,13 +209,27 @@ class Template(object):
             raise TypeError('Expected template to be a string')
 
         self.template = template
+        self.is_static = not _RE_JINJA_DELIMITERS.search(template)
         self._compiled_code = None
         self._compiled = None
+        self._states = None
+        self._location_methods = None
+        self._aggregate_methods = None
+        self._json_keys = _SENTINEL
+        self._memo = None
+        self._memoize = not self.is_static and \
+            not _RE_VOLATILE.search(template)
         self.hass = hass
 
     def ensure_valid(self):
         """Return if template is valid."""
+        if self._compiled_code is not None or self.is_static:
+            return
+
+        self._compiled_code = _COMPILED_CACHE.get(self.template)
+
         if self._compiled_code is not None:
+            _COMPILED_CACHE.move_to_end(self.template)
             return
 
         try:
@@ -73,6 +237,11 @@ class Template(object):
         except jinja2.exceptions.TemplateSyntaxError as err:
             raise TemplateError(err)
 
+        _COMPILED_CACHE[self.template] = self._compiled_code
+
+        if len(_COMPILED_CACHE) > COMPILED_CACHE_SIZE:
+            _COMPILED_CACHE.popitem(last=False)
+
     def extract_entities(self):
         """Extract all entities for state_changed listener."""
         return extract_entities(self.template)
@@ -88,18 +257,81 @@ class Template(object):
     def async_render(self, variables=None, **kwargs):
         """Render given template.
 
+        Without variables the result is reused until one of the states the
+        template accessed changes.
+
         This method must be run in the event loop.
         """
+        if self.is_static:
+            return self.template.strip()
+
         self._ensure_compiled()
 
         if variables is not None:
             kwargs.update(variables)
 
+        # pylint: disable=protected-access
+        render_info = self._states._render_info
+
+        if kwargs or not self._memoize:
+            return self._async_render_compiled(kwargs)
+
+        memo = self._memo
+        if memo is None or not memo.async_is_valid(self.hass.states):
+            memo_info = RenderInfo()
+            self._async_set_render_info(memo_info)
+
+            try:
+                result = self._async_render_compiled(kwargs)
+            finally:
+                self._async_set_render_info(render_info)
+                if render_info is not None:
+                    render_info.update(memo_info)
+
+            memo = self._memo = _RenderMemo(
+                self.hass.states, result, memo_info)
+
+        elif render_info is not None:
+            render_info.update(memo.render_info)
+
+        return memo.result
+
+    def async_render_tracked(self, render_info, variables=None, **kwargs):
+        """Render given template, recording the states it accesses.
+
+        The entities and domains are added to render_info, also when the
+        rendering fails.
+
+        This method must be run in the event loop.
+        """
         try:
-            return self._compiled.render(kwargs).strip()
+            if self.is_static:
+                return self.template.strip()
+
+            self._ensure_compiled()
+            self._async_set_render_info(render_info)
+
+            try:
+                return self.async_render(variables, **kwargs)
+            finally:
+                self._async_set_render_info(None)
+        finally:
+            render_info.async_rendered()
+
+    def _async_render_compiled(self, variables):
+        """Render the compiled template."""
+        try:
+            return self._compiled.render(variables).strip()
         except jinja2.TemplateError as err:
             raise TemplateError(err)
 
+    def _async_set_render_info(self, render_info):
+        """Set where the states accessed while rendering are recorded."""
+        # pylint: disable=protected-access
+        self._states._render_info = render_info
+        self._location_methods._render_info = render_info
+        self._aggregate_methods._render_info = render_info
+
     def render_with_possible_json_value(self, value, error_value=_SENTINEL):
         """Render template with value exposed.
 
@@ -118,13 +350,24 @@ class Template(object):
 
         This method must be run in the event loop.
         """
+        if self.is_static:
+            return self.template.strip()
+
+        if self._json_keys is _SENTINEL:
+            self._json_keys = _extract_json_keys(self.template)
+
+        if self._json_keys is not None:
+            result = self._async_lookup_json_keys(value)
+            if result is not _SENTINEL:
+                return result
+
         self._ensure_compiled()
 
         variables = {
             'value': value
         }
         try:
-            variables['value_json'] = json.loads(value)
+            variables['value_json'] = _decode_json(value)
         except ValueError:
             pass
 
@@ -135,6 +378,32 @@ class Template(object):
                           ex, value, self.template)
             return value if error_value is _SENTINEL else error_value
 
+    def _async_lookup_json_keys(self, value):
+        """Render a template that only looks up keys without Jinja.
+
+        Returns _SENTINEL if Jinja is needed to get the same result.
+        """
+        try:
+            result = _decode_json(value)
+        except ValueError:
+            return _SENTINEL
+
+        last_index = len(self._json_keys) - 1
+
+        for index, key in enumerate(self._json_keys):
+            # Jinja would return attributes like dict.items first
+            if not isinstance(result, dict) or hasattr(result, key):
+                return _SENTINEL
+
+            if key not in result:
+                # Undefined renders as an empty string, but looking up a key
+                # of undefined is an error that Jinja has to report
+                return '' if index == last_index else _SENTINEL
+
+            result = result[key]
+
+        return str(result).strip()
+
     def _ensure_compiled(self):
         """Bind a template to a specific hass instance."""
         if self._compiled is not None:
@@ -144,14 +413,38 @@ class Template(object):
 
         assert self.hass is not None, 'hass variable not set on template'
 
-        location_methods = LocationMethods(self.hass)
+        # pylint: disable=protected-access
+        states = self._states = AllStates(self.hass)
+        location_methods = self._location_methods = \
+            LocationMethods(self.hass)
+        aggregates = self._aggregate_methods = AggregateMethods(self.hass)
+
+        def is_state(entity_id, state):
+            """Test if entity exists and is specified state."""
+            if states._render_info is not None:
+                states._render_info.add_entity(entity_id)
+
+            return self.hass.states.is_state(entity_id, state)
+
+        def is_state_attr(entity_id, name, value):
+            """Test if entity exists and has a state attribute set to value."""
+            if states._render_info is not None:
+                states._render_info.add_entity(entity_id)
+
+            return self.hass.states.is_state_attr(entity_id, name, value)
 
         global_vars = ENV.make_globals({
             'closest': location_methods.closest,
+            'count_state': aggregates.count_state,
             'distance': location_methods.distance,
-            'is_state': self.hass.states.is_state,
-            'is_state_attr': self.hass.states.is_state_attr,
-            'states': AllStates(self.hass),
+            'is_state': is_state,
+            'is_state_attr': is_state_attr,
+            'states': states,
+            'states_max': aggregates.states_max,
+            'states_mean': aggregates.states_mean,
+            'states_min': aggregates.states_min,
+            'states_numeric': aggregates.states_numeric,
+            'states_sum': aggregates.states_sum,
         })
 
         self._compiled = jinja2.Template.from_code(
@@ -166,24 +459,46 @@ class Template(object):
                 self.hass == other.hass)
 
 
+def _extract_json_keys(template):
+    """Return the keys a template looks up in value_json.
+
+    Returns None if the template does more than looking up keys.
+    """
+    match = _RE_JSON_KEYS.match(template.strip())
+
+    if match is None:
+        return None
+
+    return [parts[0] or parts[1] or parts[2]
+            for parts in _RE_JSON_KEY.findall(match.group(1))]
+
+
 class AllStates(object):
     """Class to expose all HA states as attributes."""
 
     def __init__(self, hass):
         """Initialize all states."""
         self._hass = hass
+        # Set while rendering with Template.async_render_tracked
+        self._render_info = None
 
     def __getattr__(self, name):
         """Return the domain state."""
-        return DomainStates(self._hass, name)
+        return DomainStates(self._hass, name, self._render_info)
 
     def __iter__(self):
         """Return all states."""
+        if self._render_info is not None:
+            self._render_info.all_states = True
+
         return iter(sorted(self._hass.states.async_all(),
                            key=lambda state: state.entity_id))
 
     def __call__(self, entity_id):
         """Return the states."""
+        if self._render_info is not None:
+            self._render_info.add_entity(entity_id)
+
         state = self._hass.states.get(entity_id)
         return STATE_UNKNOWN if state is None else state.state
 
@@ -191,21 +506,27 @@ class AllStates(object):
 class DomainStates(object):
     """Class to expose a specific HA domain as attributes."""
 
-    def __init__(self, hass, domain):
+    def __init__(self, hass, domain, render_info=None):
         """Initialize the domain states."""
         self._hass = hass
         self._domain = domain
+        self._render_info = render_info
 
     def __getattr__(self, name):
         """Return the states."""
-        return self._hass.states.get('{}.{}'.format(self._domain, name))
+        entity_id = '{}.{}'.format(self._domain, name)
+
+        if self._render_info is not None:
+            self._render_info.add_entity(entity_id)
+
+        return self._hass.states.get(entity_id)
 
     def __iter__(self):
         """Return the iteration over all the states."""
-        return iter(sorted(
-            (state for state in self._hass.states.async_all()
-             if state.domain == self._domain),
-            key=lambda state: state.entity_id))
+        if self._render_info is not None:
+            self._render_info.domains.add(self._domain.lower())
+
+        return iter(self._hass.states.async_all(self._domain))
 
 
 class LocationMethods(object):
@@ -214,6 +535,8 @@ class LocationMethods(object):
     def __init__(self, hass):
         """Initialize the distance helpers."""
         self._hass = hass
+        # Set while rendering with Template.async_render_tracked
+        self._render_info = None
 
     def closest(self, *args):
         """Find closest entity.
@@ -272,9 +595,15 @@ class LocationMethods(object):
                 gr_entity_id = str(entities)
 
             group = get_component('group')
+            entity_ids = group.expand_entity_ids(self._hass, [gr_entity_id])
 
-            states = [self._hass.states.get(entity_id) for entity_id
-                      in group.expand_entity_ids(self._hass, [gr_entity_id])]
+            if self._render_info is not None:
+                self._render_info.add_entity(gr_entity_id)
+                for entity_id in entity_ids:
+                    self._render_info.add_entity(entity_id)
+
+            states = [self._hass.states.get(entity_id)
+                      for entity_id in entity_ids]
 
         return loc_helper.closest(latitude, longitude, states)
 
@@ -331,10 +660,106 @@ class LocationMethods(object):
         if isinstance(entity_id_or_state, State):
             return entity_id_or_state
         elif isinstance(entity_id_or_state, str):
+            if self._render_info is not None:
+                self._render_info.add_entity(entity_id_or_state)
+
             return self._hass.states.get(entity_id_or_state)
         return None
 
 
+class AggregateMethods(object):
+    """Aggregate the states of many entities without Jinja loops.
+
+    Entities are selected by domain ('sensor'), entity id glob
+    ('sensor.temperature_*') or entity id.
+    """
+
+    def __init__(self, hass):
+        """Initialize aggregate methods."""
+        self._hass = hass
+        # Set while rendering with Template.async_render_tracked
+        self._render_info = None
+
+    def states_numeric(self, selector, attribute=None):
+        """Return the numeric states or attributes of the entities.
+
+        Entities that are not a number are skipped.
+        """
+        values = []
+
+        for state in self._select(selector):
+            value = state.state if attribute is None else \
+                state.attributes.get(attribute)
+
+            try:
+                values.append(float(value))
+            except (ValueError, TypeError):
+                pass
+
+        return values
+
+    def states_sum(self, selector, attribute=None):
+        """Return the sum of the numeric states of the entities."""
+        return sum(self.states_numeric(selector, attribute))
+
+    def states_mean(self, selector, attribute=None):
+        """Return the mean of the numeric states, None if there are none."""
+        return mean(self.states_numeric(selector, attribute))
+
+    def states_min(self, selector, attribute=None):
+        """Return the lowest numeric state, None if there are none."""
+        return min(self.states_numeric(selector, attribute), default=None)
+
+    def states_max(self, selector, attribute=None):
+        """Return the highest numeric state, None if there are none."""
+        return max(self.states_numeric(selector, attribute), default=None)
+
+    def count_state(self, selector, state):
+        """Return how many of the entities have the state."""
+        state = str(state)
+        return sum(1 for entity in self._select(selector)
+                   if entity.state == state)
+
+    def _select(self, selector):
+        """Return the states of the selected entities."""
+        selector = str(selector).lower()
+        domain, _, object_id = selector.partition('.')
+
+        if object_id and not _RE_GLOB.search(selector):
+            if self._render_info is not None:
+                self._render_info.add_entity(selector)
+
+            state = self._hass.states.get(selector)
+            return () if state is None else (state,)
+
+        if _RE_GLOB.search(domain):
+            if self._render_info is not None:
+                self._render_info.all_states = True
+
+            states = self._hass.states.async_all()
+        else:
+            if self._render_info is not None:
+                self._render_info.domains.add(domain)
+
+            states = self._hass.states.async_all(domain)
+
+            if not object_id:
+                return states
+
+        return [state for state in states
+                if fnmatchcase(state.entity_id, selector)]
+
+
+def mean(values):
+    """Return the mean of the numbers, None if there are none."""
+    values = list(values)
+
+    if not values:
+        return None
+
+    return sum(values) / len(values)
+
+
 def forgiving_round(value, precision=0):
     """Rounding filter that accepts strings."""
     try:
@@ -435,6 +860,7 @@ ENV.filters['timestamp_utc'] = timestamp_utc
 ENV.filters['is_defined'] = fail_when_undefined
 ENV.filters['max'] = max
 ENV.filters['min'] = min
+ENV.filters['mean'] = mean
 ENV.globals['float'] = forgiving_float
 ENV.globals['now'] = dt_util.now
 ENV.globals['utcnow'] = dt_util.utcnow
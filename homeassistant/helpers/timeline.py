@@ -0,0 +1,221 @@
+"""Record where the time goes while components and platforms are set up."""
+from collections import OrderedDict
+from contextlib import contextmanager
+import json
+import logging
+from time import monotonic
+
+from typing import Any, Callable, Dict, List, Optional, Tuple  # NOQA
+
+from homeassistant import loader
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TIMELINE = 'bootstrap_timeline'
+TIMELINE_FILE = 'bootstrap_timeline.json'
+
+PHASE_IMPORT = 'import'
+PHASE_CONFIG = 'config'
+PHASE_REQUIREMENTS = 'requirements'
+PHASE_DEPENDENCIES = 'dependencies'
+PHASE_EXECUTOR_WAIT = 'executor_wait'
+PHASE_SETUP = 'setup'
+# Covers all other phases of a setup except the import
+PHASE_TOTAL = 'total'
+
+# Chrome trace timestamps are in microseconds
+TRACE_TIME_SCALE = 1000000
+
+
+class Timeline(object):
+    """Setup phases of components and platforms."""
+
+    def __init__(self):
+        """Initialize the timeline and start the clock."""
+        self.start = monotonic()
+        self.end = None  # type: Optional[float]
+        # Tuples of name, phase, start and end
+        self.spans = []  # type: List[Tuple[str, str, float, float]]
+        self.dependencies = {}  # type: Dict[str, List[str]]
+
+    def add_span(self, name: str, phase: str, start: float,
+                 end: float) -> None:
+        """Add a phase of the setup of name if still recording.
+
+        Thread safe.
+        """
+        if self.end is None:
+            self.spans.append((name, phase, start, end))
+
+    @contextmanager
+    def span(self, name: str, phase: str):
+        """Record the time spent in the block as phase of name."""
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(name, phase, start, monotonic())
+
+    def executor_job(self, name: str, target: Callable) -> Callable:
+        """Wrap target to record how long it waits for an executor thread."""
+        queued = monotonic()
+
+        def job(*args):
+            """Record the wait and run target."""
+            self.add_span(name, PHASE_EXECUTOR_WAIT, queued, monotonic())
+            return target(*args)
+
+        return job
+
+    def finish(self) -> None:
+        """Stop the clock and the recording.
+
+        Platforms keep being set up for as long as Home Assistant runs, so
+        spans added after this are dropped to keep the timeline bounded.
+        """
+        if self.end is None:
+            self.end = monotonic()
+
+    def all_spans(self) -> List[Tuple[str, str, float, float]]:
+        """Return all recorded spans including imports, sorted by start."""
+        spans = [(name, PHASE_IMPORT, start, end) for name, (start, end)
+                 in list(loader.IMPORT_TIMES.items())
+                 if start >= self.start and (
+                     self.end is None or end <= self.end)]
+        spans.extend(self.spans)
+        spans.sort(key=lambda span: span[2])
+        return spans
+
+    def critical_path(self) -> List[str]:
+        """Return the chain of setups that determined the startup time.
+
+        Starts at the setup that finished last and walks back to the
+        dependency or platform that finished last before it.
+        """
+        totals = {name: end for name, phase, _, end in self.spans
+                  if phase == PHASE_TOTAL}
+
+        if not totals:
+            return []
+
+        name = max(totals, key=totals.get)
+        path = [name]
+
+        while True:
+            candidates = [
+                dep for dep in self.dependencies.get(name, [])
+                if dep in totals and dep not in path]
+
+            if '.' not in name:
+                candidates.extend(
+                    platform for platform in totals
+                    if platform.startswith(name + '.'))
+
+            candidates = [cand for cand in candidates
+                          if totals[cand] <= totals[name]]
+
+            if not candidates:
+                break
+
+            name = max(candidates, key=totals.get)
+            path.append(name)
+
+        path.reverse()
+        return path
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return seconds spent per phase of each setup."""
+        end = self.end or monotonic()
+        setups = OrderedDict()  # type: Dict[str, Dict[str, float]]
+
+        for name, phase, start, span_end in self.all_spans():
+            setup = setups.get(name)
+
+            if setup is None:
+                setup = setups[name] = OrderedDict()
+                setup['start'] = round(start - self.start, 4)
+
+            setup[phase] = round(
+                setup.get(phase, 0) + span_end - start, 4)
+
+        return {
+            'duration': round(end - self.start, 4),
+            'finished': self.end is not None,
+            'critical_path': self.critical_path(),
+            'setups': setups,
+        }
+
+    def as_chrome_trace(self) -> Dict[str, Any]:
+        """Return the timeline in the Chrome trace event format.
+
+        Every component and platform gets its own row.
+        """
+        events = []
+        rows = {}  # type: Dict[str, int]
+
+        for name, phase, start, end in self.all_spans():
+            row = rows.get(name)
+
+            if row is None:
+                row = rows[name] = len(rows) + 1
+                events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': row,
+                    'args': {'name': name},
+                })
+
+            events.append({
+                'name': phase, 'cat': name, 'ph': 'X', 'pid': 1, 'tid': row,
+                'ts': round((start - self.start) * TRACE_TIME_SCALE),
+                'dur': round((end - start) * TRACE_TIME_SCALE),
+            })
+
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'critical_path': ' > '.join(self.critical_path()),
+            },
+        }
+
+    def save(self, path: str) -> None:
+        """Write the timeline as Chrome trace to path.
+
+        This method does I/O and should run in the executor.
+        """
+        try:
+            with open(path, 'w') as fil:
+                json.dump(self.as_chrome_trace(), fil)
+        except OSError as err:
+            _LOGGER.warning('Unable to write startup timeline to %s: %s',
+                            path, err)
+
+
+@contextmanager
+def span(hass, name: str, phase: str):
+    """Record the time spent in the block if a timeline is running."""
+    timeline = hass.data.get(DATA_TIMELINE)
+
+    if timeline is None or timeline.end is not None:
+        yield
+        return
+
+    with timeline.span(name, phase):
+        yield
+
+
+def executor_job(hass, name: str, target: Callable) -> Callable:
+    """Wrap target to record its executor wait if a timeline is running."""
+    timeline = hass.data.get(DATA_TIMELINE)
+
+    if timeline is None or timeline.end is not None:
+        return target
+
+    return timeline.executor_job(name, target)
+
+
+def set_dependencies(hass, name: str, dependencies: List[str]) -> None:
+    """Record what the setup of name waits for."""
+    timeline = hass.data.get(DATA_TIMELINE)
+
+    if timeline is not None and timeline.end is None:
+        timeline.dependencies[name] = list(dependencies)
@@ -15,10 +15,12 @@ import logging
 import os
 import pkgutil
 import sys
+from time import monotonic
 
 from types import ModuleType
 # pylint: disable=unused-import
-from typing import Optional, Sequence, Set, Dict  # NOQA
+from typing import (  # NOQA
+    Iterable, List, Optional, Sequence, Set, Dict, Tuple)
 
 from homeassistant.const import PLATFORM_FORMAT
 from homeassistant.util import OrderedSet
@@ -38,6 +40,9 @@ AVAILABLE_COMPONENTS = []  # type: List[str]
 # Dict of loaded components mapped name => module
 _COMPONENT_CACHE = {}  # type: Dict[str, ModuleType]
 
+# Start and end of the import of loaded components, for the startup timeline
+IMPORT_TIMES = {}  # type: Dict[str, Tuple[float, float]]
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -138,6 +143,7 @@ def get_component(comp_name) -> Optional[ModuleType]:
             continue
 
         try:
+            start = monotonic()
             module = importlib.import_module(path)
 
             # In Python 3 you can import files from directories that do not
@@ -154,6 +160,7 @@ def get_component(comp_name) -> Optional[ModuleType]:
             _LOGGER.info("Loaded %s from %s", comp_name, path)
 
             _COMPONENT_CACHE[comp_name] = module
+            IMPORT_TIMES[comp_name] = (start, monotonic())
 
             return module
 
@@ -222,6 +229,48 @@ def _load_order_component(comp_name: str, load_order: OrderedSet,
     return load_order
 
 
+def component_setup_waves(comp_names: Iterable[str]) -> List[List[str]]:
+    """Return components and all their dependencies grouped in waves.
+
+    Components only depend on components of earlier waves, so all components
+    of a wave can be set up at the same time. Components that are part of a
+    circular dependency end up together in the last wave.
+
+    Async friendly.
+    """
+    dependencies = {}  # type: Dict[str, Set[str]]
+    to_resolve = list(comp_names)
+
+    while to_resolve:
+        comp_name = to_resolve.pop()
+
+        if comp_name in dependencies:
+            continue
+
+        component = get_component(comp_name)
+        comp_deps = set(getattr(component, 'DEPENDENCIES', []))
+        dependencies[comp_name] = comp_deps
+        to_resolve.extend(comp_deps)
+
+    waves = []  # type: List[List[str]]
+    resolved = set()  # type: Set[str]
+
+    while len(resolved) < len(dependencies):
+        wave = sorted(comp_name for comp_name, comp_deps
+                      in dependencies.items()
+                      if comp_name not in resolved and comp_deps <= resolved)
+
+        if not wave:
+            wave = sorted(set(dependencies) - resolved)
+            _LOGGER.error('Circular dependency detected between: %s',
+                          ', '.join(wave))
+
+        waves.append(wave)
+        resolved.update(wave)
+
+    return waves
+
+
 def _check_prepared() -> None:
     """Issue a warning if loader.prepare() has never been called.
 
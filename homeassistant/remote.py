@@ -8,31 +8,50 @@ For more details about the Python API, please refer to the documentation at
 https://home-assistant.io/developers/python_api/
 """
 import asyncio
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import enum
 import json
 import logging
 import time
-import threading
 import urllib.parse
 
 from typing import Optional
 
+import aiohttp
+import async_timeout
 import requests
 
 from homeassistant import setup, core as ha
 from homeassistant.const import (
     HTTP_HEADER_HA_AUTH, SERVER_PORT, URL_API, URL_API_EVENT_FORWARD,
-    URL_API_EVENTS, URL_API_EVENTS_EVENT, URL_API_SERVICES, URL_API_CONFIG,
-    URL_API_SERVICES_SERVICE, URL_API_STATES, URL_API_STATES_ENTITY,
-    HTTP_HEADER_CONTENT_TYPE, CONTENT_TYPE_JSON)
+    URL_API_EVENT_FORWARD_BULK, URL_API_EVENTS, URL_API_EVENTS_EVENT,
+    URL_API_SERVICES, URL_API_CONFIG, URL_API_SERVICES_SERVICE, URL_API_STATES,
+    URL_API_STATES_ENTITY, URL_API_WEBSOCKET, HTTP_HEADER_CONTENT_TYPE,
+    CONTENT_TYPE_JSON)
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 METHOD_GET = "get"
 METHOD_POST = "post"
 METHOD_DELETE = "delete"
 
+# Maximum number of events sent to a target in one request
+FORWARD_BATCH_SIZE = 100
+# Maximum number of events waiting to be sent to a target
+FORWARD_QUEUE_SIZE = 10000
+FORWARD_TIMEOUT = 10  # seconds
+FORWARD_RETRIES = 5
+FORWARD_BACKOFF_MIN = 0.5  # seconds
+FORWARD_BACKOFF_MAX = 30  # seconds
+
+MIRROR_BACKOFF_MIN = 1  # seconds
+MIRROR_BACKOFF_MAX = 60  # seconds
+# Message identifiers used by the state mirror on each connection
+MIRROR_ID_SUBSCRIBE = 1
+MIRROR_ID_STATES = 2
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -78,6 +97,17 @@ class API(object):
         if api_password is not None:
             self._headers[HTTP_HEADER_HA_AUTH] = api_password
 
+        self._session = None
+
+    @property
+    def session(self):
+        """Return the requests session that pools our connections."""
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.headers.update(self._headers)
+
+        return self._session
+
     def validate_api(self, force_validate: bool=False) -> bool:
         """Test if we can communicate with the API."""
         if self.status is None or force_validate:
@@ -94,12 +124,10 @@ class API(object):
 
         try:
             if method == METHOD_GET:
-                return requests.get(
-                    url, params=data, timeout=timeout, headers=self._headers)
+                return self.session.get(url, params=data, timeout=timeout)
             else:
-                return requests.request(
-                    method, url, data=data, timeout=timeout,
-                    headers=self._headers)
+                return self.session.request(
+                    method, url, data=data, timeout=timeout)
 
         except requests.exceptions.ConnectionError:
             _LOGGER.exception("Error connecting to server")
@@ -110,12 +138,286 @@ class API(object):
             _LOGGER.exception(error)
             raise HomeAssistantError(error)
 
+    def close(self):
+        """Close the connections held by this API."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
     def __repr__(self) -> str:
         """Return the representation of the API."""
         return "<API({}, password: {})>".format(
             self.base_url, 'yes' if self.api_password is not None else 'no')
 
 
+class AsyncAPI(API):
+    """API that talks to a remote instance from within the event loop.
+
+    Requests are made with an aiohttp ClientSession that keeps connections
+    to the remote instance alive. All coroutines return the same results as
+    their synchronous counterparts at module level.
+    """
+
+    def __init__(self, host: str, api_password: Optional[str]=None,
+                 port: Optional[int]=SERVER_PORT, use_ssl: bool=False,
+                 loop=None, websession=None) -> None:
+        """Initalize the API."""
+        super().__init__(host, api_password, port, use_ssl)
+        self.loop = loop or asyncio.get_event_loop()
+        self._websession = websession
+        self._own_websession = websession is None
+
+    @property
+    def websession(self):
+        """Return the aiohttp session that pools our connections."""
+        if self._websession is None:
+            self._websession = aiohttp.ClientSession(loop=self.loop)
+
+        return self._websession
+
+    @asyncio.coroutine
+    def async_request(self, method, path, data=None, timeout=5):
+        """Make a call to the Home Assistant API.
+
+        Returns a tuple with the status code and the decoded JSON body. The
+        body is None if it could not be decoded.
+
+        This method is a coroutine.
+        """
+        url = urllib.parse.urljoin(self.base_url, path)
+        resp = None
+
+        if data is not None:
+            data = json.dumps(data, cls=JSONEncoder)
+
+        try:
+            with async_timeout.timeout(timeout, loop=self.loop):
+                resp = yield from self.websession.request(
+                    method, url, data=data, headers=self._headers)
+
+                try:
+                    result = yield from resp.json()
+                except ValueError:
+                    result = None
+
+            return resp.status, result
+
+        except (aiohttp.errors.ClientError,
+                aiohttp.errors.ClientDisconnectedError):
+            _LOGGER.exception("Error connecting to server")
+            raise HomeAssistantError("Error connecting to server")
+
+        except asyncio.TimeoutError:
+            error = "Timeout when talking to {}".format(self.host)
+            _LOGGER.exception(error)
+            raise HomeAssistantError(error)
+
+        finally:
+            if resp is not None:
+                yield from resp.release()
+
+    @asyncio.coroutine
+    def async_validate_api(self, force_validate: bool=False) -> bool:
+        """Test if we can communicate with the API.
+
+        This method is a coroutine.
+        """
+        if self.status is None or force_validate:
+            try:
+                status, _ = yield from self.async_request(METHOD_GET, URL_API)
+
+                if status == 200:
+                    self.status = APIStatus.OK
+                elif status == 401:
+                    self.status = APIStatus.INVALID_PASSWORD
+                else:
+                    self.status = APIStatus.UNKNOWN
+
+            except HomeAssistantError:
+                self.status = APIStatus.CANNOT_CONNECT
+
+        return self.status == APIStatus.OK
+
+    @asyncio.coroutine
+    def async_get_state(self, entity_id):
+        """Query the API for the state of entity_id.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_GET, URL_API_STATES_ENTITY.format(entity_id))
+
+            return ha.State.from_dict(result) if status == 200 else None
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error fetching state")
+
+            return None
+
+    @asyncio.coroutine
+    def async_get_states(self):
+        """Query the API for all states.
+
+        This method is a coroutine.
+        """
+        try:
+            _, result = yield from self.async_request(
+                METHOD_GET, URL_API_STATES)
+
+            return [ha.State.from_dict(item) for item in result]
+
+        except (HomeAssistantError, TypeError):
+            # TypeError if the result could not be decoded
+            _LOGGER.exception("Error fetching states")
+
+            return []
+
+    @asyncio.coroutine
+    def async_set_state(self, entity_id, new_state, attributes=None,
+                        force_update=False):
+        """Tell the API to update the state for entity_id.
+
+        This method is a coroutine.
+        """
+        data = {'state': new_state,
+                'attributes': attributes or {},
+                'force_update': force_update}
+
+        try:
+            status, result = yield from self.async_request(
+                METHOD_POST, URL_API_STATES_ENTITY.format(entity_id), data)
+
+            if status not in (200, 201):
+                _LOGGER.error("Error changing state: %d - %s",
+                              status, result)
+                return False
+
+            return True
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error setting state")
+
+            return False
+
+    @asyncio.coroutine
+    def async_set_states(self, states):
+        """Tell the API to update many states in one request.
+
+        States is a list of dicts with the keys entity_id, state and
+        optionally attributes and force_update.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_POST, URL_API_STATES, list(states))
+
+            if status != 200:
+                _LOGGER.error("Error changing states: %d - %s",
+                              status, result)
+                return False
+
+            return True
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error setting states")
+
+            return False
+
+    @asyncio.coroutine
+    def async_remove_state(self, entity_id):
+        """Call the API to remove the state for entity_id.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_DELETE, URL_API_STATES_ENTITY.format(entity_id))
+
+            if status in (200, 404):
+                return True
+
+            _LOGGER.error("Error removing state: %d - %s", status, result)
+            return False
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error removing state")
+
+            return False
+
+    @asyncio.coroutine
+    def async_fire_event(self, event_type, data=None):
+        """Fire an event at the API.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_POST, URL_API_EVENTS_EVENT.format(event_type), data)
+
+            if status != 200:
+                _LOGGER.error("Error firing event: %d - %s", status, result)
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error firing event")
+
+    @asyncio.coroutine
+    def async_call_service(self, domain, service, service_data=None,
+                           timeout=5):
+        """Call a service at the API.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_POST, URL_API_SERVICES_SERVICE.format(domain, service),
+                service_data, timeout=timeout)
+
+            if status != 200:
+                _LOGGER.error("Error calling service: %d - %s",
+                              status, result)
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error calling service")
+
+    @asyncio.coroutine
+    def async_call_services(self, service_calls, timeout=5):
+        """Call many services at the API in one request.
+
+        Service calls is a list of dicts with the keys domain, service and
+        optionally service_data.
+
+        This method is a coroutine.
+        """
+        try:
+            status, result = yield from self.async_request(
+                METHOD_POST, URL_API_SERVICES, list(service_calls),
+                timeout=timeout)
+
+            if status != 200:
+                _LOGGER.error("Error calling services: %d - %s",
+                              status, result)
+                return False
+
+            return True
+
+        except HomeAssistantError:
+            _LOGGER.exception("Error calling services")
+
+            return False
+
+    @ha.callback
+    def async_close(self):
+        """Close the connections held by this API.
+
+        This method must be run in the event loop.
+        """
+        if self._own_websession and self._websession is not None:
+            self._websession.close()
+            self._websession = None
+
+
 class HomeAssistant(ha.HomeAssistant):
     """Home Assistant that forwards work."""
 
@@ -211,7 +513,11 @@ class EventBus(ha.EventBus):
 
 
 class EventForwarder(object):
-    """Listens for events and forwards to specified APIs."""
+    """Listens for events and forwards to specified APIs.
+
+    Every target gets its own queue that is drained by a task on the event
+    loop, so a slow target does not hold up forwarding to the others.
+    """
 
     def __init__(self, hass, restrict_origin=None):
         """Initalize the event forwarder."""
@@ -222,7 +528,6 @@ class EventForwarder(object):
         # that we do not forward to the same host twice
         self._targets = {}
 
-        self._lock = threading.Lock()
         self._async_unsub_listener = None
 
     @ha.callback
@@ -237,32 +542,382 @@ class EventForwarder(object):
 
         key = (api.host, api.port)
 
-        self._targets[key] = api
+        old_target = self._targets.pop(key, None)
+        if old_target is not None:
+            old_target.async_stop()
+
+        target = EventForwardTarget(self.hass, api)
+        target.async_start()
+        self._targets[key] = target
 
     @ha.callback
     def async_disconnect(self, api):
         """Remove target from being forwarded to."""
         key = (api.host, api.port)
 
-        did_remove = self._targets.pop(key, None) is None
+        target = self._targets.pop(key, None)
+        did_remove = target is not None
+
+        if did_remove:
+            target.async_stop()
 
-        if len(self._targets) == 0:
+        if not self._targets and self._async_unsub_listener is not None:
             # Remove event listener if no forwarding targets present
             self._async_unsub_listener()
             self._async_unsub_listener = None
 
         return did_remove
 
+    @ha.callback
     def _event_listener(self, event):
-        """Listen and forward all events."""
-        with self._lock:
-            # We don't forward time events or, if enabled, non-local events
-            if event.event_type == ha.EVENT_TIME_CHANGED or \
-               (self.restrict_origin and event.origin != self.restrict_origin):
+        """Listen and queue all events for the targets."""
+        # We don't forward time events or, if enabled, non-local events
+        if event.event_type == ha.EVENT_TIME_CHANGED or \
+           (self.restrict_origin and event.origin != self.restrict_origin):
+            return
+
+        for target in self._targets.values():
+            target.async_put(event)
+
+
+class EventForwardTarget(object):
+    """Queue events for one API and send them in batches."""
+
+    def __init__(self, hass, api):
+        """Initialize the forward target."""
+        self.hass = hass
+        self.api = api
+        self._queue = deque(maxlen=FORWARD_QUEUE_SIZE)
+        self._task = None
+        self._unsub_close = None
+        self._use_bulk = True
+
+    @ha.callback
+    def async_start(self):
+        """Stop forwarding when Home Assistant closes."""
+        @ha.callback
+        def async_close(event):
+            """Stop the forward target."""
+            self._unsub_close = None
+            self.async_stop()
+
+        self._unsub_close = self.hass.bus.async_listen_once(
+            ha.EVENT_HOMEASSISTANT_CLOSE, async_close)
+
+    @ha.callback
+    def async_stop(self):
+        """Stop sending events and drop the queued ones."""
+        if self._unsub_close is not None:
+            self._unsub_close()
+            self._unsub_close = None
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        self._queue.clear()
+
+    @ha.callback
+    def async_put(self, event):
+        """Queue an event, dropping the oldest one if the queue is full."""
+        if len(self._queue) == self._queue.maxlen:
+            _LOGGER.warning("Event queue for %s is full, dropping event",
+                            self.api)
+
+        self._queue.append(event)
+
+        if self._task is None:
+            self._task = self.hass.async_add_job(self._async_forward())
+
+    @asyncio.coroutine
+    def _async_forward(self):
+        """Send queued events in batches until the queue is empty."""
+        websession = async_get_clientsession(self.hass)
+
+        try:
+            while self._queue:
+                events = []
+
+                while self._queue and len(events) < FORWARD_BATCH_SIZE:
+                    events.append(self._queue.popleft())
+
+                yield from self._async_send(websession, events)
+        finally:
+            self._task = None
+
+    @asyncio.coroutine
+    def _async_send(self, websession, events):
+        """Send a batch of events, retrying with an exponential backoff."""
+        delay = FORWARD_BACKOFF_MIN
+
+        for _ in range(FORWARD_RETRIES + 1):
+            try:
+                if self._use_bulk:
+                    status = yield from self._async_post(
+                        websession, URL_API_EVENT_FORWARD_BULK, events)
+
+                    if status == 404:
+                        # Target does not know the bulk endpoint
+                        _LOGGER.info("%s does not support bulk forwarding",
+                                     self.api)
+                        self._use_bulk = False
+
+                if not self._use_bulk:
+                    while events:
+                        status = yield from self._async_post(
+                            websession,
+                            URL_API_EVENTS_EVENT.format(events[0].event_type),
+                            events[0].data)
+
+                        if status != 200:
+                            break
+
+                        events.pop(0)
+
+                if status == 200:
+                    return
+
+                if status < 500:
+                    _LOGGER.error("Error forwarding events to %s: %d",
+                                  self.api, status)
+                    return
+
+            except (asyncio.TimeoutError, aiohttp.errors.ClientError,
+                    aiohttp.errors.ClientDisconnectedError) as err:
+                _LOGGER.debug("Error forwarding events to %s: %s",
+                              self.api, err)
+
+            yield from asyncio.sleep(delay, loop=self.hass.loop)
+            delay = min(delay * 2, FORWARD_BACKOFF_MAX)
+
+        _LOGGER.error("Unable to forward %d events to %s",
+                      len(events), self.api)
+
+    @asyncio.coroutine
+    def _async_post(self, websession, path, data):
+        """Post data to the target and return the status code."""
+        url = urllib.parse.urljoin(self.api.base_url, path)
+        resp = None
+
+        # pylint: disable=protected-access
+        try:
+            with async_timeout.timeout(FORWARD_TIMEOUT, loop=self.hass.loop):
+                resp = yield from websession.post(
+                    url, data=json.dumps(data, cls=JSONEncoder),
+                    headers=self.api._headers)
+            return resp.status
+
+        finally:
+            if resp is not None:
+                yield from resp.release()
+
+
+class StateMirror(object):
+    """Mirror the states of a remote instance into the local state machine.
+
+    A single websocket connection to the remote instance is kept open and
+    every state change is applied as it happens. After the connection is
+    lost, only the states that changed since the last seen update are
+    fetched again.
+    """
+
+    def __init__(self, hass, api):
+        """Initialize the state mirror."""
+        self.hass = hass
+        self.api = api
+        # Entity ids of the states that are written by this mirror
+        self._mirrored = set()
+        # Time of the last update of the remote states that we have seen
+        self._last_updated = None
+        self._task = None
+        self._unsub_stop = None
+
+    @ha.callback
+    def async_start(self):
+        """Start mirroring the remote states."""
+        @ha.callback
+        def async_stop_mirror(event):
+            """Stop mirroring when Home Assistant stops."""
+            self._unsub_stop = None
+            self.async_stop()
+
+        self._unsub_stop = self.hass.bus.async_listen_once(
+            ha.EVENT_HOMEASSISTANT_STOP, async_stop_mirror)
+        self._task = self.hass.loop.create_task(self._async_run())
+
+    @ha.callback
+    def async_stop(self):
+        """Stop mirroring the remote states."""
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @asyncio.coroutine
+    def _async_run(self):
+        """Keep the websocket connection open, reconnect with backoff."""
+        delay = MIRROR_BACKOFF_MIN
+
+        while True:
+            try:
+                connected = yield from self._async_mirror()
+
+                if connected:
+                    delay = MIRROR_BACKOFF_MIN
+
+                _LOGGER.warning("Connection to %s closed", self.api)
+
+            except asyncio.CancelledError:
+                raise
+
+            except (aiohttp.errors.ClientError,
+                    aiohttp.errors.ClientDisconnectedError,
+                    asyncio.TimeoutError, HomeAssistantError, KeyError,
+                    ValueError) as err:
+                _LOGGER.error("Error mirroring states of %s: %s",
+                              self.api, err)
+
+            except Exception:  # pylint: disable=broad-except
+                # Keep mirroring whatever goes wrong
+                _LOGGER.exception("Unexpected error mirroring states of %s",
+                                  self.api)
+
+            yield from asyncio.sleep(delay, loop=self.hass.loop)
+            delay = min(delay * 2, MIRROR_BACKOFF_MAX)
+
+    @asyncio.coroutine
+    def _async_mirror(self):
+        """Mirror the states until the connection closes.
+
+        Returns if the connection was established.
+        """
+        websession = async_get_clientsession(self.hass)
+        url = urllib.parse.urljoin(
+            self.api.base_url.replace('http', 'ws', 1), URL_API_WEBSOCKET)
+
+        wsock = yield from websession.ws_connect(url)
+
+        try:
+            msg = yield from self._async_receive(wsock)
+
+            if msg is not None and msg['type'] == 'auth_required':
+                self._send(wsock, {
+                    'type': 'auth',
+                    'api_password': self.api.api_password or '',
+                })
+                msg = yield from self._async_receive(wsock)
+
+            if msg is None or msg['type'] != 'auth_ok':
+                raise HomeAssistantError("Unable to authenticate")
+
+            self._send(wsock, {
+                'id': MIRROR_ID_SUBSCRIBE,
+                'type': 'subscribe_events',
+                'event_type': ha.EVENT_STATE_CHANGED,
+            })
+
+            if self._last_updated is None:
+                self._send(wsock, {
+                    'id': MIRROR_ID_STATES,
+                    'type': 'get_states',
+                })
+            else:
+                self._send(wsock, {
+                    'id': MIRROR_ID_STATES,
+                    'type': 'get_state_changes',
+                    'since': self._last_updated,
+                })
+
+            while True:
+                msg = yield from self._async_receive(wsock)
+
+                if msg is None:
+                    return True
+
+                if msg['type'] == 'event':
+                    data = msg['event']['data']
+                    self._async_apply(
+                        data['entity_id'],
+                        ha.State.from_dict(data.get('new_state')))
+
+                elif msg['type'] == 'result' and \
+                        msg['id'] == MIRROR_ID_STATES:
+                    if not msg['success']:
+                        raise HomeAssistantError(
+                            "Unable to fetch states: {}".format(
+                                msg['error']['message']))
+
+                    self._async_apply_snapshot(msg['result'])
+
+        finally:
+            yield from wsock.close()
+
+    @asyncio.coroutine
+    def _async_receive(self, wsock):
+        """Receive a JSON message or None if the connection is closed."""
+        msg = yield from wsock.receive()
+
+        if msg.type != aiohttp.WSMsgType.TEXT:
+            return None
+
+        return json.loads(msg.data)
+
+    @staticmethod
+    def _send(wsock, message):
+        """Send a JSON message."""
+        wsock.send_str(json.dumps(message, cls=JSONEncoder))
+
+    @ha.callback
+    def _async_apply_snapshot(self, result):
+        """Apply the result of get_states or get_state_changes."""
+        if isinstance(result, list):
+            states = result
+            entity_ids = set(item['entity_id'] for item in result)
+        else:
+            states = result['states']
+            entity_ids = set(result['entity_ids'])
+
+        for entity_id in self._mirrored - entity_ids:
+            self._async_apply(entity_id, None)
+
+        for item in states:
+            self._async_apply(item['entity_id'], ha.State.from_dict(item))
+
+    @ha.callback
+    def _async_apply(self, entity_id, new_state):
+        """Write a remote state into the local state machine."""
+        # pylint: disable=protected-access
+        states = self.hass.states
+        old_state = states.get(entity_id)
+
+        if new_state is None:
+            if entity_id not in self._mirrored:
                 return
 
-            for api in self._targets.values():
-                fire_event(api, event.event_type, event.data)
+            self._mirrored.discard(entity_id)
+            states._discard(entity_id)
+
+        else:
+            if (entity_id in self._mirrored and old_state is not None and
+                    old_state.last_updated >= new_state.last_updated):
+                # Already seen, i.e. both in an event and a catch-up result
+                return
+
+            self._mirrored.add(entity_id)
+            states._store(new_state)
+
+            if self._last_updated is None or \
+                    new_state.last_updated > self._last_updated:
+                self._last_updated = new_state.last_updated
+
+        self.hass.bus.async_fire(ha.EVENT_STATE_CHANGED, {
+            'entity_id': entity_id,
+            'old_state': old_state,
+            'new_state': new_state,
+        }, ha.EventOrigin.remote)
 
 
 class StateMachine(ha.StateMachine):
@@ -289,15 +944,15 @@ class StateMachine(ha.StateMachine):
 
     def mirror(self):
         """Discard current data and mirrors the remote state machine."""
-        self._states = {state.entity_id: state for state
-                        in get_states(self._api)}
+        self._replace(get_states(self._api))
+        self.generation += 1
 
     def _state_changed_listener(self, event):
         """Listen for state changed events and applies them."""
         if event.data['new_state'] is None:
-            self._states.pop(event.data['entity_id'], None)
+            self._discard(event.data['entity_id'])
         else:
-            self._states[event.data['entity_id']] = event.data['new_state']
+            self._store(event.data['new_state'])
 
 
 class JSONEncoder(json.JSONEncoder):
@@ -505,6 +1160,30 @@ def set_state(api, entity_id, new_state, attributes=None, force_update=False):
         return False
 
 
+def set_states(api, states):
+    """Tell API to update many states in one request.
+
+    States is a list of dicts with the keys entity_id, state and optionally
+    attributes and force_update.
+
+    Return True if success.
+    """
+    try:
+        req = api(METHOD_POST, URL_API_STATES, list(states))
+
+        if req.status_code != 200:
+            _LOGGER.error("Error changing states: %d - %s",
+                          req.status_code, req.text)
+            return False
+        else:
+            return True
+
+    except HomeAssistantError:
+        _LOGGER.exception("Error setting states")
+
+        return False
+
+
 def is_state(api, entity_id, state):
     """Query API to see if entity_id is specified state."""
     cur_state = get_state(api, entity_id)
@@ -544,6 +1223,31 @@ def call_service(api, domain, service, service_data=None, timeout=5):
         _LOGGER.exception("Error calling service")
 
 
+def call_services(api, service_calls, timeout=5):
+    """Call many services at the remote API in one request.
+
+    Service calls is a list of dicts with the keys domain, service and
+    optionally service_data.
+
+    Return True if success.
+    """
+    try:
+        req = api(METHOD_POST, URL_API_SERVICES, list(service_calls),
+                  timeout=timeout)
+
+        if req.status_code != 200:
+            _LOGGER.error("Error calling services: %d - %s",
+                          req.status_code, req.text)
+            return False
+        else:
+            return True
+
+    except HomeAssistantError:
+        _LOGGER.exception("Error calling services")
+
+        return False
+
+
 def get_config(api):
     """Return configuration."""
     try:
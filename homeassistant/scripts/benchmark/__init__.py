@@ -0,0 +1,597 @@
+"""Script to run benchmarks."""
+import argparse
+import asyncio
+import logging
+import socket
+import tempfile
+from timeit import default_timer as timer
+
+from typing import Callable, Dict  # NOQA
+
+from homeassistant import core, remote, setup
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_CLOSE, HTTP_HEADER_HA_AUTH, URL_API, URL_API_STATES)
+
+BENCHMARKS = {}  # type: Dict[str, Callable]
+
+API_PASSWORD = 'benchmark'
+
+
+def run(args):
+    """Handle benchmark commandline script."""
+    parser = argparse.ArgumentParser(
+        description=("Run a Home Assistant benchmark."))
+    parser.add_argument('name', choices=BENCHMARKS)
+    parser.add_argument('--script', choices=['benchmark'])
+
+    args = parser.parse_args(args)
+
+    # Disable the per event and per request logging
+    logging.getLogger('homeassistant').setLevel(logging.WARNING)
+    logging.getLogger('aiohttp.access').setLevel(logging.WARNING)
+
+    bench = BENCHMARKS[args.name]
+
+    print('Using event loop:', asyncio.get_event_loop_policy().__module__)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    hass = core.HomeAssistant(loop)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass.config.config_dir = config_dir
+        hass.config.skip_pip = True
+
+        try:
+            runtime = loop.run_until_complete(bench(hass))
+            print('Benchmark {} done in {:.3f}s'.format(
+                bench.__name__, runtime))
+        finally:
+            loop.run_until_complete(hass.async_stop())
+            loop.close()
+
+    return 0
+
+
+def benchmark(func):
+    """Decorator to mark a benchmark."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def _get_free_port():
+    """Return a port that is free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@asyncio.coroutine
+def async_setup_api_server(hass):
+    """Start a local HTTP server with the API and return its port."""
+    port = _get_free_port()
+
+    yield from setup.async_setup_component(hass, 'http', {
+        'http': {
+            'api_password': API_PASSWORD,
+            'server_host': '127.0.0.1',
+            'server_port': port,
+        }
+    })
+    yield from setup.async_setup_component(hass, 'api', {})
+
+    @core.callback
+    def noop_service(call):
+        """Service that does nothing."""
+        pass
+
+    hass.services.async_register('benchmark', 'noop', noop_service)
+
+    yield from hass.async_start()
+    yield from hass.async_block_till_done()
+
+    return port
+
+
+def _async_create_states(hass, count):
+    """Create a number of states to be served by the API."""
+    for index in range(count):
+        hass.states.async_set(
+            'sensor.benchmark_{}'.format(index), index,
+            {'unit_of_measurement': 'W'})
+
+
+@benchmark
+@asyncio.coroutine
+def remote_api(hass):
+    """Call the API with the connection pooling remote.API."""
+    port = yield from async_setup_api_server(hass)
+    _async_create_states(hass, 100)
+    api = remote.API('127.0.0.1', API_PASSWORD, port)
+
+    def run_calls():
+        """Do the API calls from a worker thread."""
+        for index in range(250):
+            remote.get_states(api)
+            remote.set_state(api, 'sensor.benchmark_0', index)
+            remote.call_service(api, 'benchmark', 'noop')
+            remote.fire_event(api, 'benchmark_event', {'index': index})
+
+    start = timer()
+    yield from hass.loop.run_in_executor(None, run_calls)
+    runtime = timer() - start
+    api.close()
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def remote_async_api(hass):
+    """Call the API with remote.AsyncAPI."""
+    port = yield from async_setup_api_server(hass)
+    _async_create_states(hass, 100)
+    api = remote.AsyncAPI('127.0.0.1', API_PASSWORD, port, loop=hass.loop)
+
+    start = timer()
+
+    for index in range(250):
+        yield from api.async_get_states()
+        yield from api.async_set_state('sensor.benchmark_0', index)
+        yield from api.async_call_service('benchmark', 'noop')
+        yield from api.async_fire_event('benchmark_event', {'index': index})
+
+    runtime = timer() - start
+    api.async_close()
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def remote_async_api_batched(hass):
+    """Set states and call services in batches with remote.AsyncAPI."""
+    port = yield from async_setup_api_server(hass)
+    _async_create_states(hass, 100)
+    api = remote.AsyncAPI('127.0.0.1', API_PASSWORD, port, loop=hass.loop)
+
+    start = timer()
+
+    for index in range(25):
+        yield from api.async_set_states([
+            {'entity_id': 'sensor.benchmark_{}'.format(sensor),
+             'state': index} for sensor in range(10)])
+        yield from api.async_call_services([
+            {'domain': 'benchmark', 'service': 'noop'}
+            for _ in range(10)])
+
+    runtime = timer() - start
+    api.async_close()
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def http_requests(hass):
+    """Serve API requests through the full HTTP request pipeline."""
+    from aiohttp.test_utils import TestClient
+
+    yield from async_setup_api_server(hass)
+    _async_create_states(hass, 100)
+
+    client = TestClient(hass.http.app, loop=hass.loop)
+    yield from client.start_server()
+    headers = {HTTP_HEADER_HA_AUTH: API_PASSWORD}
+
+    start = timer()
+
+    for _ in range(2000):
+        resp = yield from client.get(URL_API, headers=headers)
+        yield from resp.release()
+
+    for _ in range(500):
+        resp = yield from client.get(URL_API_STATES, headers=headers)
+        yield from resp.read()
+
+    runtime = timer() - start
+    yield from client.close()
+
+    return runtime
+
+
+class _MQTTStandIn(object):
+    """Stand-in for the MQTT client that does not talk to a broker."""
+
+    @asyncio.coroutine
+    def async_subscribe(self, topic, qos):
+        """Pretend to subscribe to a topic."""
+        pass
+
+
+@benchmark
+@asyncio.coroutine
+def mqtt_message_routing(hass):
+    """Route MQTT messages to 1000 subscriptions."""
+    from homeassistant.components import mqtt
+    from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+    hass.data[mqtt.DATA_MQTT] = _MQTTStandIn()
+    count = 0
+
+    @core.callback
+    def message_received(topic, payload, qos):
+        """Count the received messages."""
+        nonlocal count
+        count += 1
+
+    for index in range(800):
+        yield from mqtt.async_subscribe(
+            hass, 'zigbee2mqtt/device_{}'.format(index), message_received)
+
+    for index in range(100):
+        yield from mqtt.async_subscribe(
+            hass, 'home/+/sensor_{}'.format(index), message_received)
+        yield from mqtt.async_subscribe(
+            hass, 'home/room_{}/#'.format(index), message_received)
+
+    start = timer()
+
+    for index in range(20000):
+        async_dispatcher_send(
+            hass, mqtt.SIGNAL_MQTT_MESSAGE_RECEIVED,
+            'zigbee2mqtt/device_{}'.format(index % 1000), 'payload', 0)
+        async_dispatcher_send(
+            hass, mqtt.SIGNAL_MQTT_MESSAGE_RECEIVED,
+            'home/room_{}/sensor_{}'.format(index % 100, index % 200),
+            'payload', 0)
+
+    yield from hass.async_block_till_done()
+    runtime = timer() - start
+
+    # 4 out of 5 device topics are subscribed, room topics match the
+    # subtree wildcard and half of them also match the level wildcard
+    assert count == 16000 + 30000, count
+
+    return runtime
+
+
+class _MQTTBrokerStandIn(asyncio.Protocol):
+    """Minimal MQTT broker that acknowledges packets but routes nothing."""
+
+    def __init__(self):
+        """Initialize the protocol."""
+        self._transport = None
+        self._buffer = b''
+
+    def connection_made(self, transport):
+        """Store the transport of the new connection."""
+        self._transport = transport
+
+    def data_received(self, data):
+        """Handle all complete packets that have been received."""
+        self._buffer += data
+
+        while len(self._buffer) >= 2:
+            length, multiplier, pos = 0, 1, 1
+
+            while True:
+                if pos >= len(self._buffer):
+                    return
+                byte = self._buffer[pos]
+                length += (byte & 0x7f) * multiplier
+                multiplier *= 128
+                pos += 1
+                if not byte & 0x80:
+                    break
+
+            if len(self._buffer) < pos + length:
+                return
+
+            self._handle(self._buffer[0], self._buffer[pos:pos + length])
+            self._buffer = self._buffer[pos + length:]
+
+    def _handle(self, header, body):
+        """Acknowledge a single packet."""
+        packet_type = header >> 4
+
+        if packet_type == 1:  # CONNECT
+            self._transport.write(b'\x20\x02\x00\x00')
+        elif packet_type == 3:  # PUBLISH
+            qos = (header >> 1) & 3
+            if qos:
+                topic_end = 2 + int.from_bytes(body[:2], 'big')
+                packet_id = body[topic_end:topic_end + 2]
+                self._transport.write(
+                    (b'\x40\x02' if qos == 1 else b'\x50\x02') + packet_id)
+        elif packet_type == 6:  # PUBREL
+            self._transport.write(b'\x70\x02' + body[:2])
+        elif packet_type == 8:  # SUBSCRIBE
+            granted, pos = b'', 2
+            while pos < len(body):
+                pos += 2 + int.from_bytes(body[pos:pos + 2], 'big')
+                granted += body[pos:pos + 1]
+                pos += 1
+            self._transport.write(
+                bytes([0x90, 2 + len(granted)]) + body[:2] + granted)
+        elif packet_type == 10:  # UNSUBSCRIBE
+            self._transport.write(b'\xb0\x02' + body[:2])
+        elif packet_type == 12:  # PINGREQ
+            self._transport.write(b'\xd0\x00')
+        elif packet_type == 14:  # DISCONNECT
+            self._transport.close()
+
+
+@asyncio.coroutine
+def async_setup_mqtt_broker_stand_in(hass):
+    """Set up MQTT connected to a local broker stand-in.
+
+    Returns the MQTT client.
+    """
+    from homeassistant.components import mqtt
+
+    port = _get_free_port()
+    server = yield from hass.loop.create_server(
+        _MQTTBrokerStandIn, '127.0.0.1', port)
+
+    @asyncio.coroutine
+    def async_stop_server(event):
+        """Stop the broker stand-in."""
+        server.close()
+        yield from server.wait_closed()
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_stop_server)
+
+    yield from setup.async_setup_component(hass, mqtt.DOMAIN, {
+        mqtt.DOMAIN: {
+            mqtt.CONF_BROKER: '127.0.0.1',
+            mqtt.CONF_PORT: port,
+        }
+    })
+
+    return hass.data[mqtt.DATA_MQTT]
+
+
+@benchmark
+@asyncio.coroutine
+def mqtt_scene_activation(hass):
+    """Publish commands to 40 lights and wait for their PUBACK."""
+    client = yield from async_setup_mqtt_broker_stand_in(hass)
+    runs = 50
+
+    start = timer()
+
+    for _ in range(runs):
+        yield from asyncio.wait([
+            client.async_publish(
+                'home/light_{}/set'.format(index), '{"state": "ON"}', 1,
+                False)
+            for index in range(40)], loop=hass.loop)
+
+    runtime = timer() - start
+    print('Average scene activation: {:.1f}ms'.format(
+        runtime / runs * 1000))
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def mqtt_embedded_loopback(hass):
+    """Send messages to ourselves through the embedded MQTT broker."""
+    from homeassistant.components import mqtt
+
+    yield from setup.async_setup_component(hass, 'http', {
+        'http': {
+            'server_host': '127.0.0.1',
+            'server_port': _get_free_port(),
+        }
+    })
+    yield from setup.async_setup_component(hass, mqtt.DOMAIN, {
+        mqtt.DOMAIN: {
+            mqtt.CONF_EMBEDDED: {
+                'listeners': {
+                    'default': {
+                        'type': 'tcp',
+                        'bind': '127.0.0.1:{}'.format(_get_free_port()),
+                    },
+                },
+                'auth': {'allow-anonymous': True},
+                'plugins': ['auth_anonymous'],
+            }
+        }
+    })
+
+    client = hass.data[mqtt.DATA_MQTT]
+    received = None
+    count = 0
+
+    @core.callback
+    def message_received(topic, payload, qos):
+        """Count the messages and wake up the waiting round trip."""
+        nonlocal count
+        count += 1
+        if received is not None and not received.done():
+            received.set_result(None)
+
+    yield from mqtt.async_subscribe(
+        hass, 'benchmark/loopback', message_received)
+
+    runs = 1000
+    start = timer()
+
+    for _ in range(runs):
+        received = asyncio.Future(loop=hass.loop)
+        client.async_publish('benchmark/loopback', 'ping', 0, False)
+        yield from received
+
+    latency = timer() - start
+    print('Average round trip: {:.3f}ms'.format(latency / runs * 1000))
+
+    received = None
+    count = 0
+    messages = 10000
+    start = timer()
+
+    for _ in range(messages):
+        client.async_publish('benchmark/loopback', 'ping', 0, False)
+
+    while count < messages:
+        yield from asyncio.sleep(0, loop=hass.loop)
+
+    throughput = timer() - start
+    print('Throughput: {:.0f} messages/s'.format(messages / throughput))
+
+    return latency + throughput
+
+
+@benchmark
+@asyncio.coroutine
+def automation_dispatch(hass):
+    """Measure state change dispatch cost against the number of triggers."""
+    from homeassistant.components.automation import numeric_state, state
+
+    fired = 0
+
+    @core.callback
+    def action(variables):
+        """Count the triggered automations."""
+        nonlocal fired
+        fired += 1
+
+    changes = 1000
+    triggers = 0
+    runtime = 0
+
+    for count in (10, 100, 1000, 1500):
+        while triggers < count:
+            # Half state, half numeric_state triggers, each its own entity
+            if triggers % 2:
+                yield from state.async_trigger(hass, {
+                    'entity_id': ['sensor.benchmark_{}'.format(triggers)],
+                    'to': 'on',
+                }, action)
+            else:
+                yield from numeric_state.async_trigger(hass, {
+                    'entity_id': ['sensor.benchmark_{}'.format(triggers)],
+                    'above': 10,
+                }, action)
+            triggers += 1
+
+        fired = 0
+        start = timer()
+
+        for index in range(changes):
+            hass.states.async_set('sensor.benchmark_0', index % 20)
+            hass.states.async_set(
+                'sensor.benchmark_1', 'on' if index % 2 else 'off')
+            yield from hass.async_block_till_done()
+
+        elapsed = timer() - start
+        runtime += elapsed
+        print('{} triggers: {:.1f}us per state change, {} fired'.format(
+            count, elapsed / changes / 2 * 1000000, fired))
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def script_runs(hass):
+    """Run a motion to light style script as often as possible."""
+    from homeassistant.helpers import config_validation as cv, script
+
+    calls = 0
+
+    @core.callback
+    def light_on(call):
+        """Count the service calls."""
+        nonlocal calls
+        calls += 1
+
+    hass.services.async_register('light', 'turn_on', light_on)
+    hass.states.async_set('sun.sun', 'below_horizon')
+
+    script_obj = script.Script(hass, cv.SCRIPT_SCHEMA([
+        {
+            'condition': 'state',
+            'entity_id': 'sun.sun',
+            'state': 'below_horizon',
+        },
+        {
+            'service': 'light.turn_on',
+            'entity_id': 'light.hallway',
+            'data': {'brightness': 120},
+        },
+        {'event': 'benchmark_motion_handled'},
+    ]))
+
+    runs = 10000
+    start = timer()
+
+    for _ in range(runs):
+        yield from script_obj.async_run()
+
+    runtime = timer() - start
+    yield from hass.async_block_till_done()
+    print('{:.0f} script runs/s, {} service calls'.format(
+        runs / runtime, calls))
+
+    return runtime
+
+
+@benchmark
+@asyncio.coroutine
+def bootstrap_components(hass):
+    """Start with 100 components, chains of dependencies and a slow setup."""
+    from types import ModuleType
+    from homeassistant import bootstrap, loader
+
+    def mock_component(domain, dependencies, delay):
+        """Create a component with a setup that takes delay seconds."""
+        component = ModuleType(domain)
+        component.DOMAIN = domain
+        component.DEPENDENCIES = dependencies
+
+        @asyncio.coroutine
+        def async_setup(hass, config):
+            """Pretend to set up."""
+            yield from asyncio.sleep(delay, loop=hass.loop)
+            return True
+
+        component.async_setup = async_setup
+        loader.set_component(domain, component)
+
+    config = {
+        'homeassistant': {
+            'name': 'Benchmark',
+            'latitude': 32.87336,
+            'longitude': 117.22743,
+            'elevation': 0,
+            'unit_system': 'metric',
+            'time_zone': 'UTC',
+            'setup_timeout': {'bench_slow': 0.5},
+        },
+        'bench_slow': {},
+    }
+    mock_component('bench_slow', [], 10)
+
+    # 10 chains of 10 components that depend on the previous one
+    for index in range(100):
+        domain = 'bench_{}'.format(index)
+        mock_component(
+            domain, ['bench_{}'.format(index - 10)] if index >= 10 else [],
+            0.01)
+        config[domain] = {}
+
+    start = timer()
+
+    yield from bootstrap.async_from_config_dict(
+        config, hass, enable_log=False, skip_pip=True)
+
+    runtime = timer() - start
+    print('{} components set up, slow component set up: {}'.format(
+        len(hass.config.components),
+        'bench_slow' in hass.config.components))
+
+    return runtime
@@ -11,6 +11,7 @@ import homeassistant.config as conf_util
 from homeassistant.config import async_notify_setup_error
 import homeassistant.core as core
 import homeassistant.loader as loader
+from homeassistant.helpers import timeline
 import homeassistant.util.package as pkg_util
 from homeassistant.util.async import run_coroutine_threadsafe
 from homeassistant.const import (
@@ -57,7 +58,8 @@ def async_setup_component(hass: core.HomeAssistant, domain: str,
     task = setup_tasks[domain] = hass.async_add_job(
         _async_setup_component(hass, domain, config))
 
-    return (yield from task)
+    with timeline.span(hass, domain, timeline.PHASE_TOTAL):
+        return (yield from task)
 
 
 @asyncio.coroutine
@@ -155,23 +157,27 @@ def _async_setup_component(hass: core.HomeAssistant,
         log_error('Unable to resolve component or dependencies.')
         return False
 
-    processed_config = \
-        conf_util.async_process_component_config(hass, config, domain)
+    with timeline.span(hass, domain, timeline.PHASE_CONFIG):
+        processed_config = \
+            conf_util.async_process_component_config(hass, config, domain)
 
     if processed_config is None:
         log_error('Invalid config.')
         return False
 
     if not hass.config.skip_pip and hasattr(component, 'REQUIREMENTS'):
-        req_success = yield from _async_process_requirements(
-            hass, domain, component.REQUIREMENTS)
+        with timeline.span(hass, domain, timeline.PHASE_REQUIREMENTS):
+            req_success = yield from _async_process_requirements(
+                hass, domain, component.REQUIREMENTS)
         if not req_success:
             log_error('Could not install all requirements.')
             return False
 
     if hasattr(component, 'DEPENDENCIES'):
-        dep_success = yield from _async_process_dependencies(
-            hass, config, domain, component.DEPENDENCIES)
+        timeline.set_dependencies(hass, domain, component.DEPENDENCIES)
+        with timeline.span(hass, domain, timeline.PHASE_DEPENDENCIES):
+            dep_success = yield from _async_process_dependencies(
+                hass, config, domain, component.DEPENDENCIES)
 
         if not dep_success:
             log_error('Could not setup all dependencies.')
@@ -185,11 +191,14 @@ def _async_setup_component(hass: core.HomeAssistant,
         'Setup of %s is taking over %s seconds.', domain, SLOW_SETUP_WARNING)
 
     try:
-        if async_comp:
-            result = yield from component.async_setup(hass, processed_config)
-        else:
-            result = yield from hass.loop.run_in_executor(
-                None, component.setup, hass, processed_config)
+        with timeline.span(hass, domain, timeline.PHASE_SETUP):
+            if async_comp:
+                result = yield from component.async_setup(
+                    hass, processed_config)
+            else:
+                result = yield from hass.loop.run_in_executor(
+                    None, timeline.executor_job(hass, domain, component.setup),
+                    hass, processed_config)
     except Exception:  # pylint: disable=broad-except
         _LOGGER.exception('Error during setup of component %s', domain)
         async_notify_setup_error(hass, domain, True)
@@ -248,16 +257,20 @@ def async_prepare_setup_platform(hass: core.HomeAssistant, config, domain: str,
 
     # Load dependencies
     if hasattr(platform, 'DEPENDENCIES'):
-        dep_success = yield from _async_process_dependencies(
-            hass, config, platform_path, platform.DEPENDENCIES)
+        timeline.set_dependencies(
+            hass, platform_path, platform.DEPENDENCIES)
+        with timeline.span(hass, platform_path, timeline.PHASE_DEPENDENCIES):
+            dep_success = yield from _async_process_dependencies(
+                hass, config, platform_path, platform.DEPENDENCIES)
 
         if not dep_success:
             log_error('Could not setup all dependencies.')
             return False
 
     if not hass.config.skip_pip and hasattr(platform, 'REQUIREMENTS'):
-        req_success = yield from _async_process_requirements(
-            hass, platform_path, platform.REQUIREMENTS)
+        with timeline.span(hass, platform_path, timeline.PHASE_REQUIREMENTS):
+            req_success = yield from _async_process_requirements(
+                hass, platform_path, platform.REQUIREMENTS)
 
         if not req_success:
             log_error('Could not install all requirements.')
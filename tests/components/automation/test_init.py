@@ -4,10 +4,11 @@ from datetime import timedelta
 import unittest
 from unittest.mock import patch
 
-from homeassistant.core import State
+from homeassistant.core import State, callback
 from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.components.automation as automation
-from homeassistant.const import ATTR_ENTITY_ID, STATE_ON, STATE_OFF
+from homeassistant.const import (
+    ATTR_ENTITY_ID, EVENT_STATE_CHANGED, STATE_ON, STATE_OFF)
 from homeassistant.exceptions import HomeAssistantError
 import homeassistant.util.dt as dt_util
 
@@ -155,6 +156,100 @@ class TestAutomation(unittest.TestCase):
         self.assertEqual(['hello.world'],
                          self.calls[0].data.get(ATTR_ENTITY_ID))
 
+    def test_run_attributes(self):
+        """Test that runs of the action are exposed as attributes."""
+        assert setup_component(self.hass, automation.DOMAIN, {
+            automation.DOMAIN: {
+                'alias': 'hello',
+                'mode': 'queued',
+                'trigger': {
+                    'platform': 'event',
+                    'event_type': 'test_event',
+                },
+                'action': {
+                    'service': 'test.automation',
+                }
+            }
+        })
+
+        self.hass.bus.fire('test_event')
+        self.hass.block_till_done()
+        self.hass.bus.fire('test_event')
+        self.hass.block_till_done()
+
+        state = self.hass.states.get('automation.hello')
+        assert len(self.calls) == 2
+        assert state.attributes.get(automation.ATTR_RUN_COUNT) == 2
+        assert state.attributes.get(automation.ATTR_RUNS) == 0
+        assert state.attributes.get(
+            automation.ATTR_LAST_RUN_DURATION) is not None
+
+    def test_run_attributes_single_state_write(self):
+        """Test that a run ending within its trigger writes the state once."""
+        assert setup_component(self.hass, automation.DOMAIN, {
+            automation.DOMAIN: {
+                'alias': 'hello',
+                'mode': 'queued',
+                'trigger': {
+                    'platform': 'event',
+                    'event_type': 'test_event',
+                },
+                'action': {
+                    'service': 'test.automation',
+                }
+            }
+        })
+
+        writes = []
+
+        @callback
+        def record_write(event):
+            """Record a state write of the automation."""
+            if event.data['entity_id'] == 'automation.hello':
+                writes.append(event)
+
+        self.hass.bus.listen(EVENT_STATE_CHANGED, record_write)
+
+        self.hass.bus.fire('test_event')
+        self.hass.block_till_done()
+
+        assert len(self.calls) == 1
+        assert len(writes) == 1
+        assert writes[0].data['new_state'].attributes.get(
+            automation.ATTR_RUNS) == 0
+
+    def test_run_attributes_updated_after_delay(self):
+        """Test that the attributes are updated when a delayed run ends."""
+        assert setup_component(self.hass, automation.DOMAIN, {
+            automation.DOMAIN: {
+                'alias': 'hello',
+                'mode': 'parallel',
+                'trigger': {
+                    'platform': 'event',
+                    'event_type': 'test_event',
+                },
+                'action': [
+                    {'delay': {'seconds': 5}},
+                    {'service': 'test.automation'},
+                ]
+            }
+        })
+
+        self.hass.bus.fire('test_event')
+        self.hass.block_till_done()
+
+        state = self.hass.states.get('automation.hello')
+        assert state.attributes.get(automation.ATTR_RUNS) == 1
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.block_till_done()
+
+        state = self.hass.states.get('automation.hello')
+        assert len(self.calls) == 1
+        assert state.attributes.get(automation.ATTR_RUNS) == 0
+        assert state.attributes.get(
+            automation.ATTR_LAST_RUN_DURATION) is not None
+
     def test_service_initial_value_off(self):
         """Test initial value off."""
         entity_id = 'automation.hello'
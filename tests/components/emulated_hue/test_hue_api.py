@@ -149,6 +149,34 @@ def test_discover_lights(hue_client):
     assert 'fan.living_room_fan' in devices
 
 
+@asyncio.coroutine
+def test_discover_lights_conditional(hass_hue, hue_client):
+    """Test that listing lights supports conditional requests."""
+    result = yield from hue_client.get('/api/username/lights')
+    etag = result.headers['ETag']
+    yield from result.release()
+
+    result = yield from hue_client.get(
+        '/api/username/lights', headers={'If-None-Match': etag})
+
+    assert result.status == 304
+    yield from result.release()
+
+    yield from hass_hue.services.async_call(
+        light.DOMAIN, const.SERVICE_TURN_OFF,
+        {const.ATTR_ENTITY_ID: 'light.bed_light'}, blocking=True)
+
+    result = yield from hue_client.get(
+        '/api/username/lights', headers={'If-None-Match': etag})
+
+    assert result.status == 200
+    assert result.headers['ETag'] != etag
+
+    result_json = yield from result.json()
+
+    assert result_json['light.bed_light']['state'][HUE_API_STATE_ON] is False
+
+
 @asyncio.coroutine
 def test_get_light_state(hass_hue, hue_client):
     """Test the getting of light state."""
@@ -10,6 +10,7 @@ from homeassistant import setup, const
 import homeassistant.components.http as http
 from homeassistant.components.http.const import (
     KEY_TRUSTED_NETWORKS, KEY_USE_X_FORWARDED_FOR, HTTP_HEADER_X_FORWARDED_FOR)
+from homeassistant.components.http.util import TrustedNetworks
 
 from tests.common import get_test_instance_port, get_test_home_assistant
 
@@ -54,9 +55,9 @@ def setUpModule():
 
     setup.setup_component(hass, 'api')
 
-    hass.http.app[KEY_TRUSTED_NETWORKS] = [
+    hass.http.app[KEY_TRUSTED_NETWORKS] = TrustedNetworks(
         ip_network(trusted_network)
-        for trusted_network in TRUSTED_NETWORKS]
+        for trusted_network in TRUSTED_NETWORKS)
 
     hass.start()
 
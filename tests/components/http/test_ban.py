@@ -49,8 +49,8 @@ def setUpModule():
 
     setup.setup_component(hass, 'api')
 
-    hass.http.app[KEY_BANNED_IPS] = [IpBan(banned_ip) for banned_ip
-                                     in BANNED_IPS]
+    hass.http.app[KEY_BANNED_IPS] = {ip_address(banned_ip): IpBan(banned_ip)
+                                     for banned_ip in BANNED_IPS}
     hass.start()
 
 
@@ -201,3 +201,15 @@ def test_api_no_base_url(hass):
     })
     assert result
     assert hass.config.api.base_url == 'http://127.0.0.1:8123'
+
+
+def test_request_stats():
+    """Test the request latency histograms."""
+    requests.get(_url(const.URL_API), headers=HA_HEADERS)
+
+    req = requests.get(_url('/api/http_stats'), headers=HA_HEADERS)
+
+    assert req.status_code == 200
+    stats = req.json()['api:status']
+    assert stats['count'] >= 1
+    assert stats['buckets']['+Inf'] == stats['count']
@@ -0,0 +1,140 @@
+"""The tests for the static file handling of the HTTP component."""
+import asyncio
+import gzip
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from aiohttp import web
+import pytest
+
+from homeassistant.components.http import static
+from homeassistant.components.http.const import KEY_DEVELOPMENT
+
+CONTENT = 'body { color: red; }\n' * 100
+
+
+@pytest.fixture
+def static_client(loop, hass, test_client, tmpdir):
+    """Create a client serving a directory with a stylesheet."""
+    tmpdir.join('style.css').write(CONTENT)
+    tmpdir.join('small.txt').write('tiny')
+
+    app = web.Application(
+        middlewares=[static.staticresource_middleware], loop=loop)
+    app['hass'] = hass
+    app[KEY_DEVELOPMENT] = False
+    app.router.add_static('/static', str(tmpdir))
+
+    return loop.run_until_complete(test_client(app))
+
+
+@asyncio.coroutine
+def test_serves_gzipped_from_memory(static_client):
+    """Test that small files are compressed once and served from memory."""
+    sender = static.CACHING_FILE_SENDER
+    sender.cache = static.StaticFileCache()
+
+    resp = yield from static_client.get(
+        '/static/style.css', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert resp.headers['Vary'] == 'Accept-Encoding'
+    assert 'max-age' in resp.headers['Cache-Control']
+    assert (yield from resp.text()) == CONTENT
+    assert len(sender.cache) == 1
+
+    # Served from the cache, not read from disk again
+    with patch('homeassistant.components.http.static.load_file') as mock_load:
+        resp = yield from static_client.get(
+            '/static/style.css', headers={'Accept-Encoding': 'identity'})
+
+    assert not mock_load.called
+    assert resp.status == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert (yield from resp.text()) == CONTENT
+
+    resp = yield from static_client.get('/static/small.txt')
+
+    assert resp.status == 200
+    assert 'Content-Encoding' not in resp.headers
+    assert (yield from resp.text()) == 'tiny'
+
+
+@asyncio.coroutine
+def test_cache_invalidated_on_change(static_client, tmpdir):
+    """Test that a changed file is read again."""
+    static.CACHING_FILE_SENDER.cache = static.StaticFileCache()
+
+    resp = yield from static_client.get('/static/small.txt')
+    assert (yield from resp.text()) == 'tiny'
+
+    path = tmpdir.join('small.txt')
+    path.write('changed')
+    stat = os.stat(str(path))
+    os.utime(str(path), (stat.st_atime, stat.st_mtime + 10))
+
+    resp = yield from static_client.get('/static/small.txt')
+    assert (yield from resp.text()) == 'changed'
+
+
+@asyncio.coroutine
+def test_encoded_file_keeps_encoding(static_client, tmpdir):
+    """Test that compressed files are sent with their encoding."""
+    static.CACHING_FILE_SENDER.cache = static.StaticFileCache()
+    tmpdir.join('app.js.gz').write_binary(gzip.compress(b'alert(1);'))
+
+    resp = yield from static_client.get(
+        '/static/app.js.gz', headers={'Accept-Encoding': 'gzip'})
+
+    assert resp.status == 200
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert len(static.CACHING_FILE_SENDER.cache) == 0
+
+
+@asyncio.coroutine
+def test_if_modified_since(static_client):
+    """Test that unmodified files are not sent again."""
+    resp = yield from static_client.get('/static/style.css')
+    last_modified = resp.headers['Last-Modified']
+    yield from resp.release()
+
+    resp = yield from static_client.get(
+        '/static/style.css', headers={'If-Modified-Since': last_modified})
+
+    assert resp.status == 304
+
+
+def test_load_file_uses_precompressed(tmpdir):
+    """Test that an up to date gzip file next to the file is used."""
+    tmpdir.join('app.js').write(CONTENT)
+    tmpdir.join('app.js.gz').write_binary(gzip.compress(b'precompressed'))
+    path = Path(str(tmpdir.join('app.js')))
+
+    entry = static.load_file(path, path.stat())
+
+    assert entry.content_type == 'application/javascript'
+    assert gzip.decompress(entry.gzip_body) == b'precompressed'
+
+
+def test_cache_evicts_least_recently_used(tmpdir):
+    """Test that the cache stays within its size."""
+    cache = static.StaticFileCache(max_size=10)
+    stat = os.stat(str(tmpdir))
+
+    def entry(size):
+        """Create a cache entry."""
+        return static.CachedFile(
+            stat.st_mtime, stat.st_size, 'text/plain', b'x' * size, None)
+
+    cache.put('a', entry(4))
+    cache.put('b', entry(4))
+    assert cache.get('a', stat) is not None
+
+    cache.put('c', entry(4))
+
+    assert cache.get('a', stat) is not None
+    assert cache.get('b', stat) is None
+    assert cache.get('c', stat) is not None
+    assert cache.size == 8
@@ -0,0 +1,45 @@
+"""The tests for the Home Assistant HTTP utilities."""
+from ipaddress import ip_address
+
+from homeassistant.components.http.util import (
+    LatencyHistogram, TrustedNetworks)
+
+
+def test_trusted_networks():
+    """Test membership of addresses in trusted networks."""
+    networks = TrustedNetworks(['192.0.2.0/24', '100.64.0.1',
+                                '2001:DB8:ABCD::/48'])
+
+    assert networks
+    assert ip_address('192.0.2.100') in networks
+    assert ip_address('100.64.0.1') in networks
+    assert ip_address('2001:DB8:ABCD::1') in networks
+    assert ip_address('192.0.3.1') not in networks
+    assert ip_address('100.64.0.2') not in networks
+    assert ip_address('2001:DB8:FA1::1') not in networks
+    assert None not in networks
+
+
+def test_trusted_networks_empty():
+    """Test that an empty collection holds no address."""
+    networks = TrustedNetworks()
+
+    assert not networks
+    assert ip_address('127.0.0.1') not in networks
+
+
+def test_latency_histogram():
+    """Test recording request latencies."""
+    histogram = LatencyHistogram()
+    histogram.add(0.0005)
+    histogram.add(0.02)
+    histogram.add(60)
+
+    result = histogram.as_dict()
+
+    assert result['count'] == 3
+    assert abs(result['sum'] - 60.0205) < 1e-9
+    assert result['buckets']['0.001'] == 1
+    assert result['buckets']['0.025'] == 2
+    assert result['buckets']['10'] == 2
+    assert result['buckets']['+Inf'] == 3
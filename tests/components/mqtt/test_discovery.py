@@ -2,11 +2,21 @@
 import asyncio
 from unittest.mock import patch
 
+import pytest
+
 from homeassistant.components.mqtt.discovery import async_start
 
 from tests.common import async_fire_mqtt_message, mock_coro
 
 
+@pytest.fixture(autouse=True)
+def short_discovery_window():
+    """Keep the discovery window short so tests don't wait for it."""
+    with patch('homeassistant.components.mqtt.discovery.DISCOVERY_WINDOW',
+               0):
+        yield
+
+
 @asyncio.coroutine
 def test_subscribing_config_topic(hass, mqtt_mock):
     """Test setting up discovery."""
@@ -73,3 +83,70 @@ def test_correct_config_discovery(hass, mqtt_mock, caplog):
 
     assert state is not None
     assert state.name == 'Beer'
+
+
+@asyncio.coroutine
+@patch('homeassistant.components.mqtt.discovery.async_load_platform')
+def test_discovery_batches_per_platform(mock_load_platform, hass, mqtt_mock):
+    """Test that devices found in one window are loaded together."""
+    mock_load_platform.side_effect = lambda *args: mock_coro()
+    yield from async_start(hass, 'homeassistant', {})
+
+    async_fire_mqtt_message(hass, 'homeassistant/sensor/one/config',
+                            '{ "name": "One" }')
+    async_fire_mqtt_message(hass, 'homeassistant/sensor/two/config',
+                            '{ "name": "Two" }')
+    async_fire_mqtt_message(hass, 'homeassistant/light/three/config',
+                            '{ "name": "Three", "platform": "mqtt_json" }')
+    yield from hass.async_block_till_done()
+
+    assert len(mock_load_platform.mock_calls) == 2
+
+    _, component, platform, configs, _ = mock_load_platform.mock_calls[0][1]
+    assert (component, platform) == ('sensor', 'mqtt')
+    assert [conf['name'] for conf in configs] == ['One', 'Two']
+    assert configs[1]['state_topic'] == 'homeassistant/sensor/two/state'
+
+    _, component, platform, configs, _ = mock_load_platform.mock_calls[1][1]
+    assert (component, platform) == ('light', 'mqtt_json')
+    assert [conf['name'] for conf in configs] == ['Three']
+
+
+@asyncio.coroutine
+@patch('homeassistant.components.mqtt.discovery.async_load_platform')
+def test_unchanged_config_ignored(mock_load_platform, hass, mqtt_mock):
+    """Test that a config is only processed again when it changes."""
+    mock_load_platform.side_effect = lambda *args: mock_coro()
+    yield from async_start(hass, 'homeassistant', {})
+
+    async_fire_mqtt_message(hass, 'homeassistant/sensor/bla/config',
+                            '{ "name": "Beer" }')
+    yield from hass.async_block_till_done()
+    assert len(mock_load_platform.mock_calls) == 1
+
+    async_fire_mqtt_message(hass, 'homeassistant/sensor/bla/config',
+                            '{ "name": "Beer" }')
+    yield from hass.async_block_till_done()
+    assert len(mock_load_platform.mock_calls) == 1
+
+    async_fire_mqtt_message(hass, 'homeassistant/sensor/bla/config',
+                            '{ "name": "Wine" }')
+    yield from hass.async_block_till_done()
+    assert len(mock_load_platform.mock_calls) == 2
+    assert mock_load_platform.mock_calls[1][1][3][0]['name'] == 'Wine'
+
+
+@asyncio.coroutine
+def test_invalid_config_does_not_block_batch(hass, mqtt_mock, caplog):
+    """Test that one invalid config doesn't prevent the others."""
+    yield from async_start(hass, 'homeassistant', {})
+
+    async_fire_mqtt_message(hass, 'homeassistant/binary_sensor/bad/config',
+                            '{ "name": "Bad", "qos": 5 }')
+    async_fire_mqtt_message(hass, 'homeassistant/binary_sensor/bla/config',
+                            '{ "name": "Beer" }')
+    yield from hass.async_block_till_done()
+
+    assert 'Invalid discovered config' in caplog.text
+    assert hass.states.get('binary_sensor.bad') is None
+    assert hass.states.get('binary_sensor.beer') is not None
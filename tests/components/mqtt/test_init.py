@@ -10,6 +10,7 @@ import voluptuous as vol
 from homeassistant.core import callback
 from homeassistant.setup import setup_component, async_setup_component
 import homeassistant.components.mqtt as mqtt
+from homeassistant.components.mqtt.server import DATA_EMBEDDED_BROKER
 from homeassistant.const import (
     EVENT_CALL_SERVICE, ATTR_DOMAIN, ATTR_SERVICE, EVENT_HOMEASSISTANT_STOP)
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
@@ -209,6 +210,54 @@ class TestMQTT(unittest.TestCase):
         self.assertEqual(0, len(self.calls))
 
 
+    def test_subscribe_topic_level_and_subtree_wildcard(self):
+        """Test the subscription of combined wildcard topics."""
+        mqtt.subscribe(self.hass, 'test-topic/+/#', self.record_calls)
+
+        fire_mqtt_message(self.hass, 'test-topic/bier/on/off', 'payload')
+        fire_mqtt_message(self.hass, 'test-topic/bier', 'payload')
+        fire_mqtt_message(self.hass, 'another-topic/bier', 'payload')
+
+        self.hass.block_till_done()
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual('test-topic/bier/on/off', self.calls[0][0])
+        self.assertEqual('test-topic/bier', self.calls[1][0])
+
+    def test_subscribe_same_topic_twice(self):
+        """Test that removing one subscription keeps the other."""
+        unsub = mqtt.subscribe(self.hass, 'test-topic/+', self.record_calls)
+        mqtt.subscribe(self.hass, 'test-topic/+', self.record_calls)
+
+        fire_mqtt_message(self.hass, 'test-topic/bier', 'test-payload')
+        self.hass.block_till_done()
+        self.assertEqual(2, len(self.calls))
+
+        unsub()
+
+        fire_mqtt_message(self.hass, 'test-topic/bier', 'test-payload')
+        self.hass.block_till_done()
+        self.assertEqual(3, len(self.calls))
+
+
+def test_topic_router_prunes_removed_subscriptions():
+    """Test that the router removes empty topic levels."""
+    router = mqtt.TopicRouter()
+    remove_deep = router.add('a/b/c', 'deep')
+    remove_wildcard = router.add('a/#', 'wildcard')
+
+    assert router.match('a/b/c') == ['wildcard', 'deep']
+    assert router.match('a') == ['wildcard']
+    assert router.subscriptions == 2
+
+    remove_deep()
+    remove_wildcard()
+
+    assert router.match('a/b/c') == []
+    assert router.subscriptions == 0
+    # pylint: disable=protected-access
+    assert router._root.children == {}
+
+
 class TestMQTTCallbacks(unittest.TestCase):
     """Test the MQTT callbacks."""
 
@@ -269,29 +318,9 @@ class TestMQTTCallbacks(unittest.TestCase):
     def test_mqtt_disconnect_tries_no_reconnect_on_stop(self):
         """Test the disconnect tries."""
         self.hass.data['mqtt']._mqtt_on_disconnect(None, None, 0)
+        self.hass.block_till_done()
         self.assertFalse(self.hass.data['mqtt']._mqttc.reconnect.called)
 
-    @mock.patch('homeassistant.components.mqtt.time.sleep')
-    def test_mqtt_disconnect_tries_reconnect(self, mock_sleep):
-        """Test the re-connect tries."""
-        self.hass.data['mqtt'].topics = {
-            'test/topic': 1,
-            'test/progress': None
-        }
-        self.hass.data['mqtt'].progress = {
-            1: 'test/progress'
-        }
-        self.hass.data['mqtt']._mqttc.reconnect.side_effect = [1, 1, 1, 0]
-        self.hass.data['mqtt']._mqtt_on_disconnect(None, None, 1)
-        self.assertTrue(self.hass.data['mqtt']._mqttc.reconnect.called)
-        self.assertEqual(
-            4, len(self.hass.data['mqtt']._mqttc.reconnect.mock_calls))
-        self.assertEqual([1, 2, 4],
-                         [call[1][0] for call in mock_sleep.mock_calls])
-
-        self.assertEqual({'test/topic': 1}, self.hass.data['mqtt'].topics)
-        self.assertEqual({}, self.hass.data['mqtt'].progress)
-
     def test_invalid_mqtt_topics(self):
         """Test invalid topics."""
         self.assertRaises(vol.Invalid, mqtt.valid_publish_topic, 'bad+topic')
@@ -339,9 +368,12 @@ def test_setup_embedded_starts_with_no_config(hass):
                     return_value=mock_coro(
                         return_value=(True, client_config))
                     ) as _start:
+        hass.data[DATA_EMBEDDED_BROKER] = mock.MagicMock()
         yield from mock_mqtt_client(hass, {})
         assert _start.call_count == 1
 
+    assert isinstance(hass.data[mqtt.DATA_MQTT], mqtt.EmbeddedMQTT)
+
 
 @asyncio.coroutine
 def test_setup_embedded_with_embedded(hass):
@@ -353,9 +385,29 @@ def test_setup_embedded_with_embedded(hass):
                         return_value=(True, client_config))
                     ) as _start:
         _start.return_value = mock_coro(return_value=(True, client_config))
+        hass.data[DATA_EMBEDDED_BROKER] = mock.MagicMock()
         yield from mock_mqtt_client(hass, {'embedded': None})
         assert _start.call_count == 1
 
+    assert isinstance(hass.data[mqtt.DATA_MQTT], mqtt.EmbeddedMQTT)
+
+
+@asyncio.coroutine
+def test_setup_embedded_unsupported_broker(hass):
+    """Test connecting over the network if the broker isn't supported."""
+    client_config = ('localhost', 1883, 'user', 'pass', None, '3.1.1')
+
+    with mock.patch('homeassistant.components.mqtt.server.async_start',
+                    return_value=mock_coro(
+                        return_value=(True, client_config))):
+        hass.data[DATA_EMBEDDED_BROKER] = object()
+        yield from mock_mqtt_client(hass, {})
+
+    mqtt_obj = hass.data[mqtt.DATA_MQTT]
+    assert isinstance(mqtt_obj, mqtt.MQTT)
+    assert mqtt_obj.broker == 'localhost'
+    assert mqtt_obj.port == 1883
+
 
 @asyncio.coroutine
 def test_setup_fails_if_no_connect_broker(hass):
@@ -418,36 +470,202 @@ def test_birth_message(hass):
                                   mqtt.ATTR_PAYLOAD: 'birth'}
     })
     calls = []
-    mqtt_client.publish = lambda *args: calls.append(args)
+
+    def mock_publish(*args):
+        """Record the published message."""
+        calls.append(args)
+        return 0, 1
+
+    mqtt_client.publish = mock_publish
     hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
     yield from hass.async_block_till_done()
     assert calls[-1] == ('birth', 'birth', 0, False)
 
 
 @asyncio.coroutine
-def test_mqtt_subscribes_topics_on_connect(hass):
-    """Test subscription to topic on connect."""
+def test_publish_resolves_on_ack(hass):
+    """Test that publishing does not wait for the message to be sent."""
     mqtt_client = yield from mock_mqtt_client(hass)
+    mids = iter(range(1, 10))
+    mqtt_client.publish = lambda *args: (0, next(mids))
+    mqtt_obj = hass.data['mqtt']
 
-    prev_topics = OrderedDict()
-    prev_topics['topic/test'] = 1,
-    prev_topics['home/sensor'] = 2,
-    prev_topics['still/pending'] = None
+    sent = mqtt_obj.async_publish('topic', 'payload', 0, False)
+    acked = mqtt_obj.async_publish('topic', 'payload', 1, False)
 
-    hass.data['mqtt'].topics = prev_topics
-    hass.data['mqtt'].progress = {1: 'still/pending'}
+    assert mqtt_obj.publish_stats == {'queued': 1, 'in_flight': 1}
+    assert not sent.done()
+    assert not acked.done()
 
-    # Return values for subscribe calls (rc, mid)
-    mqtt_client.subscribe.side_effect = ((0, 2), (0, 3))
+    mqtt_obj._mqtt_on_publish(None, None, 1)
+    yield from hass.async_block_till_done()
 
-    hass.add_job = mock.MagicMock()
-    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
+    assert sent.result() is True
+    assert not acked.done()
 
+    mqtt_obj._mqtt_on_publish(None, None, 2)
+    yield from hass.async_block_till_done()
+
+    assert acked.result() is True
+    assert mqtt_obj.publish_stats == {'queued': 0, 'in_flight': 0}
+
+
+@asyncio.coroutine
+def test_publish_qos0_dropped_when_not_connected(hass):
+    """Test that a QoS 0 message that cannot be sent is reported."""
+    mqtt_client = yield from mock_mqtt_client(hass)
+    mqtt_client.publish = lambda *args: (4, 1)
+
+    result = yield from hass.data['mqtt'].async_publish(
+        'topic', 'payload', 0, False)
+
+    assert result is False
+
+
+@asyncio.coroutine
+def test_mqtt_subscribes_topics_on_connect(hass):
+    """Test subscription to topics in a single packet on connect."""
+    mqtt_client = yield from mock_mqtt_client(hass)
+    mqtt_client.subscribe.return_value = (0, 2)
+
+    topics = OrderedDict()
+    topics['topic/test'] = 1
+    topics['home/sensor'] = 2
+    topics['home/#'] = 0
+    topics['other/#'] = 2
+    topics['other/sensor'] = 1
+    hass.data['mqtt'].topics = topics
+    hass.data['mqtt']._received_retained = {'other/sensor'}
+
+    hass.data['mqtt']._mqtt_on_connect(None, None, 0, 0)
     yield from hass.async_block_till_done()
 
     assert not mqtt_client.disconnect.called
+    assert hass.data['mqtt'].connected
+
+    # other/sensor got its retained messages in an earlier session and is
+    # covered by other/# with a higher QoS
+    assert mqtt_client.subscribe.call_count == 1
+    assert mqtt_client.subscribe.call_args[0][0] == [
+        ('topic/test', 1), ('home/sensor', 2), ('home/#', 0), ('other/#', 2)]
+    assert hass.data['mqtt'].progress == {
+        2: ['topic/test', 'home/sensor', 'home/#', 'other/#']}
+
+
+@asyncio.coroutine
+def test_mqtt_coalesces_subscriptions(hass):
+    """Test that subscriptions made together share a packet."""
+    mqtt_client = yield from mock_mqtt_client(hass)
+    mqtt_client.subscribe.return_value = (0, 1)
+    mqtt_obj = hass.data['mqtt']
+
+    mqtt_obj._mqtt_on_connect(None, None, 0, 0)
+    yield from hass.async_block_till_done()
+
+    yield from asyncio.wait([
+        mqtt_obj.async_subscribe('light/{}'.format(index), 0)
+        for index in range(3)], loop=hass.loop)
+
+    assert mqtt_client.subscribe.call_count == 1
+    assert mqtt_client.subscribe.call_args[0][0] == [
+        ('light/0', 0), ('light/1', 0), ('light/2', 0)]
+
+    mqtt_obj._mqtt_on_subscribe(None, None, 1, (0, 128, 0))
+    yield from hass.async_block_till_done()
+
+    # The refused subscription is dropped
+    assert list(mqtt_obj.topics) == ['light/0', 'light/2']
 
-    expected = [(topic, qos) for topic, qos in prev_topics.items()
-                if qos is not None]
 
-    assert [call[1][1:] for call in hass.add_job.mock_calls] == expected
+@asyncio.coroutine
+def test_mqtt_subscribes_topics_covered_by_wildcard(hass):
+    """Test that a topic added after a covering wildcard gets retained."""
+    mqtt_client = yield from mock_mqtt_client(hass)
+    mqtt_client.subscribe.return_value = (0, 1)
+    mqtt_obj = hass.data['mqtt']
+
+    mqtt_obj._mqtt_on_connect(None, None, 0, 0)
+    yield from hass.async_block_till_done()
+
+    yield from mqtt_obj.async_subscribe('homeassistant/#', 0)
+    mqtt_obj._mqtt_on_subscribe(None, None, 1, (0,))
+    yield from hass.async_block_till_done()
+
+    mqtt_client.subscribe.return_value = (0, 2)
+    yield from mqtt_obj.async_subscribe('homeassistant/light/x/state', 0)
+
+    # The broker only sends the retained message in reply to a SUBSCRIBE
+    assert mqtt_client.subscribe.call_count == 2
+    assert mqtt_client.subscribe.call_args[0][0] == [
+        ('homeassistant/light/x/state', 0)]
+
+    mqtt_obj._mqtt_on_subscribe(None, None, 2, (0,))
+    yield from hass.async_block_till_done()
+
+    mqtt_client.subscribe.return_value = (0, 3)
+    mqtt_obj._mqtt_on_connect(None, None, 0, 0)
+    yield from hass.async_block_till_done()
+
+    # After a reconnect the wildcard alone covers it
+    assert mqtt_client.subscribe.call_count == 3
+    assert mqtt_client.subscribe.call_args[0][0] == [('homeassistant/#', 0)]
+
+
+@asyncio.coroutine
+def test_mqtt_disconnect_starts_reconnect(hass):
+    """Test that the session is forgotten and a reconnect is started."""
+    yield from mock_mqtt_client(hass)
+    mqtt_obj = hass.data['mqtt']
+    mqtt_obj.connected = True
+    mqtt_obj._subscribed = {'test/topic': 1}
+    mqtt_obj.progress = {1: ['test/progress']}
+
+    with mock.patch.object(mqtt_obj, '_async_reconnect',
+                           return_value=mock_coro()) as mock_reconnect:
+        mqtt_obj._mqtt_on_disconnect(None, None, 1)
+        yield from hass.async_block_till_done()
+
+    assert mock_reconnect.called
+    assert not mqtt_obj.connected
+    assert mqtt_obj._subscribed == {}
+    assert mqtt_obj.progress == {}
+
+
+@asyncio.coroutine
+def test_mqtt_reconnect_backoff(hass):
+    """Test the re-connect tries."""
+    mqtt_client = yield from mock_mqtt_client(hass)
+    mqtt_client.reconnect.side_effect = [1, 1, 1, 0]
+    mqtt_client.loop_start.reset_mock()
+    waits = []
+
+    @asyncio.coroutine
+    def mock_sleep(wait_time, loop=None):
+        """Record the time to wait."""
+        waits.append(wait_time)
+
+    with mock.patch('homeassistant.components.mqtt.asyncio.sleep',
+                    mock_sleep):
+        yield from hass.data['mqtt']._async_reconnect(1)
+
+    assert len(mqtt_client.reconnect.mock_calls) == 4
+    assert waits == [1, 2, 4]
+    # Paho doesn't reconnect by itself at the same time
+    assert mqtt_client.loop_stop.called
+    assert len(mqtt_client.loop_start.mock_calls) == 1
+
+
+def test_filter_covers():
+    """Test the detection of overlapping subscriptions."""
+    assert mqtt._filter_covers('#', 'a/b')
+    assert mqtt._filter_covers('a/#', 'a')
+    assert mqtt._filter_covers('a/#', 'a/+/c')
+    assert mqtt._filter_covers('a/+', 'a/b')
+    assert mqtt._filter_covers('a/+/#', 'a/b/c/d')
+    assert not mqtt._filter_covers('a/+', 'a/#')
+    assert not mqtt._filter_covers('a/b', 'a/+')
+    assert not mqtt._filter_covers('a/+', 'a/b/c')
+    assert not mqtt._filter_covers('a/b/#', 'a')
+    assert not mqtt._filter_covers('#', '$SYS/#')
+    assert not mqtt._filter_covers('+/broker', '$SYS/broker')
+    assert mqtt._filter_covers('$SYS/#', '$SYS/broker')
@@ -1,8 +1,12 @@
 """The tests for the MQTT component embedded server."""
+import asyncio
+from collections import namedtuple
 from unittest.mock import Mock, MagicMock, patch
 
+from homeassistant.core import callback
 from homeassistant.setup import setup_component
 import homeassistant.components.mqtt as mqtt
+from homeassistant.components.mqtt import server
 
 from tests.common import (
     get_test_home_assistant, mock_coro, mock_http_component)
@@ -24,7 +28,7 @@ class TestMQTT:
     @patch('tempfile.NamedTemporaryFile', Mock(return_value=MagicMock()))
     @patch('hbmqtt.broker.Broker', Mock(return_value=MagicMock()))
     @patch('hbmqtt.broker.Broker.start', Mock(return_value=mock_coro()))
-    @patch('homeassistant.components.mqtt.MQTT')
+    @patch('homeassistant.components.mqtt.EmbeddedMQTT')
     def test_creating_config_with_http_pass(self, mock_mqtt):
         """Test if the MQTT server gets started and subscribe/publish msg."""
         mock_mqtt().async_connect.return_value = mock_coro(True)
@@ -34,16 +38,18 @@ class TestMQTT:
         self.hass.config.api = MagicMock(api_password=password)
         assert setup_component(self.hass, mqtt.DOMAIN, {})
         assert mock_mqtt.called
-        from pprint import pprint
-        pprint(mock_mqtt.mock_calls)
-        assert mock_mqtt.mock_calls[1][1][5] == 'homeassistant'
-        assert mock_mqtt.mock_calls[1][1][6] == password
+        assert mock_mqtt.mock_calls[1][1][1] is \
+            self.hass.data[server.DATA_EMBEDDED_BROKER]
+
+        _, client_config = server.generate_config(self.hass, MagicMock())
+        assert client_config[2] == 'homeassistant'
+        assert client_config[3] == password
 
     @patch('passlib.apps.custom_app_context', Mock(return_value=''))
     @patch('tempfile.NamedTemporaryFile', Mock(return_value=MagicMock()))
     @patch('hbmqtt.broker.Broker', Mock(return_value=MagicMock()))
     @patch('hbmqtt.broker.Broker.start', Mock(return_value=mock_coro()))
-    @patch('homeassistant.components.mqtt.MQTT')
+    @patch('homeassistant.components.mqtt.EmbeddedMQTT')
     def test_creating_config_with_http_no_pass(self, mock_mqtt):
         """Test if the MQTT server gets started and subscribe/publish msg."""
         mock_mqtt().async_connect.return_value = mock_coro(True)
@@ -52,8 +58,10 @@ class TestMQTT:
         self.hass.config.api = MagicMock(api_password=None)
         assert setup_component(self.hass, mqtt.DOMAIN, {})
         assert mock_mqtt.called
-        assert mock_mqtt.mock_calls[1][1][5] is None
-        assert mock_mqtt.mock_calls[1][1][6] is None
+
+        _, client_config = server.generate_config(self.hass, MagicMock())
+        assert client_config[2] is None
+        assert client_config[3] is None
 
     @patch('tempfile.NamedTemporaryFile', Mock(return_value=MagicMock()))
     @patch('hbmqtt.broker.Broker.start', return_value=mock_coro())
@@ -68,3 +76,95 @@ class TestMQTT:
         assert not setup_component(self.hass, mqtt.DOMAIN, {
             mqtt.DOMAIN: {mqtt.CONF_EMBEDDED: {}}
         })
+
+
+class MockBroker(object):
+    """Stand-in for the parts of the hbmqtt broker used by the client."""
+
+    def __init__(self):
+        """Initialize the broker."""
+        self.broadcasts = []
+        self._retained_messages = {}
+
+    @asyncio.coroutine
+    def _broadcast_message(self, session, topic, data, force_qos=None):
+        """Record a message sent to the connected clients."""
+        self.broadcasts.append((session, topic, data))
+
+    @asyncio.coroutine
+    def internal_message_broadcast(self, topic, data, qos=None):
+        """Broadcast a message as the broker itself."""
+        yield from self._broadcast_message(None, topic, data)
+
+    def retain_message(self, source_session, topic_name, data, qos=None):
+        """Store or clear a retained message."""
+        if data:
+            self._retained_messages[topic_name] = RetainedMessage(
+                source_session, topic_name, data, qos)
+        else:
+            self._retained_messages.pop(topic_name, None)
+
+
+RetainedMessage = namedtuple(
+    'RetainedMessage', 'source_session, topic, data, qos')
+
+
+@asyncio.coroutine
+def test_embedded_client_publishes_to_broker(hass):
+    """Test that published messages reach the broker and subscribers."""
+    broker = MockBroker()
+    client = hass.data[mqtt.DATA_MQTT] = mqtt.EmbeddedMQTT(hass, broker, None)
+    yield from client.async_connect()
+    calls = []
+
+    @callback
+    def record(topic, payload, qos):
+        """Record a received message."""
+        calls.append((topic, payload))
+
+    yield from mqtt.async_subscribe(hass, 'home/+/state', record)
+
+    yield from client.async_publish('home/light/state', 'on', 0, True)
+    yield from client.async_publish('home/light/set', 5, 0, False)
+    yield from hass.async_block_till_done()
+
+    assert broker.broadcasts == [
+        (None, 'home/light/state', b'on'),
+        (None, 'home/light/set', b'5'),
+    ]
+    assert calls == [('home/light/state', 'on')]
+    assert broker._retained_messages['home/light/state'].data == b'on'
+
+
+@asyncio.coroutine
+def test_embedded_client_receives_from_network_clients(hass):
+    """Test that messages of other clients and retained ones are received."""
+    broker = MockBroker()
+    broker.retain_message(None, 'home/sensor/state', b'21', 1)
+    client = hass.data[mqtt.DATA_MQTT] = mqtt.EmbeddedMQTT(hass, broker, None)
+    yield from client.async_connect()
+    calls = []
+
+    @callback
+    def record(topic, payload, qos):
+        """Record a received message."""
+        calls.append((topic, payload, qos))
+
+    yield from mqtt.async_subscribe(hass, 'home/#', record)
+    yield from hass.async_block_till_done()
+    assert calls == [('home/sensor/state', '21', 0)]
+
+    session = object()
+    yield from broker._broadcast_message(session, 'home/sensor/state', b'22')
+    yield from broker._broadcast_message(session, 'other/topic', b'1')
+    yield from hass.async_block_till_done()
+
+    assert calls[1:] == [('home/sensor/state', '22', 0)]
+    # Still sent to the clients connected to the broker
+    assert [topic for _, topic, _ in broker.broadcasts] == \
+        ['home/sensor/state', 'other/topic']
+
+    yield from client.async_disconnect()
+    yield from broker._broadcast_message(session, 'home/sensor/state', b'23')
+    yield from hass.async_block_till_done()
+    assert len(calls) == 2
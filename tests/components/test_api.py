@@ -11,6 +11,10 @@ import requests
 
 from homeassistant import setup, const
 import homeassistant.core as ha
+from homeassistant.components import api
+from homeassistant.helpers import timeline
+from homeassistant.helpers.dispatcher import (
+    dispatcher_connect, dispatcher_send)
 import homeassistant.components.http as http
 
 from tests.common import get_test_instance_port, get_test_home_assistant
@@ -87,6 +91,28 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(state.last_changed, data.last_changed)
         self.assertEqual(state.attributes, data.attributes)
 
+    def test_api_list_states_conditional(self):
+        """Test that listing states supports conditional requests."""
+        req = requests.get(_url(const.URL_API_STATES), headers=HA_HEADERS)
+        etag = req.headers['ETag']
+
+        headers = dict(HA_HEADERS)
+        headers['If-None-Match'] = etag
+        req = requests.get(_url(const.URL_API_STATES), headers=headers)
+
+        self.assertEqual(304, req.status_code)
+        self.assertEqual(etag, req.headers['ETag'])
+        self.assertEqual(b'', req.content)
+
+        hass.states.set('test.etag', 'changed')
+
+        req = requests.get(_url(const.URL_API_STATES), headers=headers)
+
+        self.assertEqual(200, req.status_code)
+        self.assertNotEqual(etag, req.headers['ETag'])
+        self.assertIn('test.etag',
+                      [item['entity_id'] for item in req.json()])
+
     def test_api_get_non_existing_state(self):
         """Test if the debug interface allows us to get a state."""
         req = requests.get(
@@ -135,6 +161,41 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(400, req.status_code)
 
     # pylint: disable=invalid-name
+    def test_api_state_change_many(self):
+        """Test if we can change the state of many entities at once."""
+        req = requests.post(
+            _url(const.URL_API_STATES),
+            data=json.dumps([
+                {'entity_id': 'test.bulk_1', 'state': 'on'},
+                {'entity_id': 'test.bulk_2', 'state': 'off',
+                 'attributes': {'brightness': 100}},
+            ]),
+            headers=HA_HEADERS)
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual(['on', 'off'],
+                         [item['state'] for item in req.json()])
+        self.assertEqual('on', hass.states.get('test.bulk_1').state)
+        self.assertEqual(
+            100, hass.states.get('test.bulk_2').attributes['brightness'])
+
+        req = requests.post(
+            _url(const.URL_API_STATES),
+            data=json.dumps([{'entity_id': 'test.bulk_3'}]),
+            headers=HA_HEADERS)
+
+        self.assertEqual(400, req.status_code)
+        self.assertIsNone(hass.states.get('test.bulk_3'))
+
+        # Falsy states are valid states
+        req = requests.post(
+            _url(const.URL_API_STATES),
+            data=json.dumps([{'entity_id': 'test.bulk_4', 'state': 0}]),
+            headers=HA_HEADERS)
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual('0', hass.states.get('test.bulk_4').state)
+
     def test_api_state_change_push(self):
         """Test if we can push a change the state of an entity."""
         hass.states.set("test.test", "not_to_be_set")
@@ -247,6 +308,38 @@ class TestAPI(unittest.TestCase):
                            headers=HA_HEADERS)
         self.assertEqual(hass.config.components, set(req.json()))
 
+    def test_api_get_bootstrap_timeline(self):
+        """Test the return of the startup timeline."""
+        req = requests.get(_url(const.URL_API_BOOTSTRAP_TIMELINE),
+                           headers=HA_HEADERS)
+        self.assertEqual(404, req.status_code)
+
+        tline = timeline.Timeline()
+        tline.add_span('light', timeline.PHASE_TOTAL, tline.start,
+                       tline.start + 2)
+        tline.finish()
+
+        with patch.dict(hass.data, {timeline.DATA_TIMELINE: tline}):
+            req = requests.get(_url(const.URL_API_BOOTSTRAP_TIMELINE),
+                               headers=HA_HEADERS)
+
+        data = req.json()
+        self.assertEqual(['light'], data['critical_path'])
+        self.assertEqual(2, data['setups']['light'][timeline.PHASE_TOTAL])
+
+    def test_api_get_dispatcher_stats(self):
+        """Test the return of the dispatcher statistics."""
+        unsub = dispatcher_connect(hass, 'test_stats_signal', lambda: None)
+        dispatcher_send(hass, 'test_stats_signal')
+        hass.block_till_done()
+
+        req = requests.get(_url(const.URL_API_DISPATCHER_STATS),
+                           headers=HA_HEADERS)
+        unsub()
+
+        self.assertEqual({'connected': 1, 'sent': 1},
+                         req.json()['test_stats_signal'])
+
     def test_api_get_error_log(self):
         """Test the return of the error log."""
         test_string = 'Test String°'
@@ -288,6 +381,25 @@ class TestAPI(unittest.TestCase):
 
             self.assertEqual(local, serv_domain["services"])
 
+    def test_api_get_services_conditional(self):
+        """Test that registering a service invalidates the ETag."""
+        req = requests.get(_url(const.URL_API_SERVICES), headers=HA_HEADERS)
+
+        headers = dict(HA_HEADERS)
+        headers['If-None-Match'] = req.headers['ETag']
+        req = requests.get(_url(const.URL_API_SERVICES), headers=headers)
+
+        self.assertEqual(304, req.status_code)
+
+        hass.services.register('test_domain', 'etag', lambda call: None)
+
+        req = requests.get(_url(const.URL_API_SERVICES), headers=headers)
+
+        self.assertEqual(200, req.status_code)
+        self.assertIn('etag', [
+            service for item in req.json() if item['domain'] == 'test_domain'
+            for service in item['services']])
+
     def test_api_call_service_no_data(self):
         """Test if the API allows us to call a service."""
         test_value = []
@@ -333,6 +445,39 @@ class TestAPI(unittest.TestCase):
 
         self.assertEqual(1, len(test_value))
 
+    def test_api_call_many_services(self):
+        """Test if the API allows us to call many services at once."""
+        test_value = []
+
+        @ha.callback
+        def listener(service_call):
+            """Helper method that will verify that our service got called."""
+            test_value.append(service_call.data.get('index'))
+
+        hass.services.register("test_domain", "test_service_many", listener)
+
+        req = requests.post(
+            _url(const.URL_API_SERVICES),
+            data=json.dumps([
+                {'domain': 'test_domain', 'service': 'test_service_many',
+                 'service_data': {'index': 1}},
+                {'domain': 'test_domain', 'service': 'test_service_many',
+                 'service_data': {'index': 2}},
+            ]),
+            headers=HA_HEADERS)
+
+        hass.block_till_done()
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual([1, 2], sorted(test_value))
+
+        req = requests.post(
+            _url(const.URL_API_SERVICES),
+            data=json.dumps([{'domain': 'test_domain'}]),
+            headers=HA_HEADERS)
+
+        self.assertEqual(400, req.status_code)
+
     def test_api_template(self):
         """Test the template API."""
         hass.states.set('sensor.temperature', 10)
@@ -431,6 +576,50 @@ class TestAPI(unittest.TestCase):
             headers=HA_HEADERS)
         self.assertEqual(200, req.status_code)
 
+    def test_api_event_forward_bulk(self):
+        """Test firing a batch of forwarded events."""
+        test_value = []
+
+        @ha.callback
+        def listener(event):
+            """Helper method that will verify our events got called."""
+            test_value.append(event)
+
+        hass.bus.listen("test_event_bulk", listener)
+
+        req = requests.post(
+            _url(const.URL_API_EVENT_FORWARD_BULK),
+            data=json.dumps([
+                {'event_type': 'test_event_bulk', 'data': {'test': 1}},
+                {'event_type': 'test_event_bulk', 'data': {'test': 2}},
+            ]),
+            headers=HA_HEADERS)
+
+        hass.block_till_done()
+
+        self.assertEqual(200, req.status_code)
+        self.assertEqual(2, len(test_value))
+        self.assertEqual(1, test_value[0].data['test'])
+        self.assertEqual(2, test_value[1].data['test'])
+        self.assertEqual(ha.EventOrigin.remote, test_value[0].origin)
+
+        req = requests.post(
+            _url(const.URL_API_EVENT_FORWARD_BULK),
+            data=json.dumps({'event_type': 'test_event_bulk'}),
+            headers=HA_HEADERS)
+
+        self.assertEqual(400, req.status_code)
+
+        req = requests.post(
+            _url(const.URL_API_EVENT_FORWARD_BULK),
+            data=json.dumps([{'data': {}}]),
+            headers=HA_HEADERS)
+
+        hass.block_till_done()
+
+        self.assertEqual(400, req.status_code)
+        self.assertEqual(2, len(test_value))
+
     def test_stream(self):
         """Test the stream."""
         listen_count = self._listen_count()
@@ -465,6 +654,68 @@ class TestAPI(unittest.TestCase):
             data = self._stream_next_event(stream)
             self.assertEqual('test_event3', data['event_type'])
 
+    def test_stream_with_entity_filter(self):
+        """Test the stream with an entity_id filter."""
+        url = _url('{}?restrict={}&entity_id=test.stream_one'.format(
+            const.URL_API_STREAM, const.EVENT_STATE_CHANGED))
+        with closing(requests.get(url, stream=True, timeout=3,
+                                  headers=HA_HEADERS)) as req:
+            stream = req.iter_content(1)
+
+            hass.states.set('test.stream_two', 'on')
+            hass.states.set('test.stream_one', 'on')
+
+            data = self._stream_next_event(stream)
+            self.assertEqual('test.stream_one', data['data']['entity_id'])
+
+    def test_stream_with_empty_filters(self):
+        """Test that empty filters don't filter."""
+        url = _url('{}?restrict=&entity_id='.format(const.URL_API_STREAM))
+        with closing(requests.get(url, stream=True, timeout=3,
+                                  headers=HA_HEADERS)) as req:
+            stream = req.iter_content(1)
+
+            hass.bus.fire('test_event')
+
+            data = self._stream_next_event(stream)
+            self.assertEqual('test_event', data['event_type'])
+
+    def test_stream_client_drops_oldest(self):
+        """Test that a full client queue drops the oldest payloads."""
+        with patch.object(api, 'STREAM_QUEUE_SIZE', 2):
+            client = api.EventStreamClient(hass.loop)
+            client.async_put('one')
+            client.async_put('two')
+            client.async_put('three')
+
+        self.assertEqual(1, client.dropped)
+        self.assertEqual(['two', 'three'], list(client._queue))
+
+    def test_stream_client_matches(self):
+        """Test the event filters of a stream client."""
+        client = api.EventStreamClient(
+            hass.loop, {'test_event'}, {'test.one'})
+
+        self.assertTrue(client.matches(
+            ha.Event('test_event', {'entity_id': 'test.one'})))
+        self.assertFalse(client.matches(
+            ha.Event('test_event', {'entity_id': 'test.two'})))
+        self.assertFalse(client.matches(
+            ha.Event('other_event', {'entity_id': 'test.one'})))
+        self.assertTrue(api.EventStreamClient(hass.loop).matches(
+            ha.Event('other_event')))
+
+    def test_stream_client_matches_entity_id_list(self):
+        """Test the entity filter with a list of entity ids."""
+        client = api.EventStreamClient(hass.loop, None, {'test.one'})
+
+        self.assertTrue(client.matches(
+            ha.Event('test_event', {'entity_id': ['test.two', 'test.one']})))
+        self.assertFalse(client.matches(
+            ha.Event('test_event', {'entity_id': ['test.two']})))
+        self.assertFalse(client.matches(
+            ha.Event('test_event', {'entity_id': {'test': 'one'}})))
+
     def _stream_next_event(self, stream):
         """Read the stream for next event while ignoring ping."""
         while True:
@@ -1,4 +1,5 @@
 """The tests for the MQTT eventstream component."""
+from datetime import timedelta
 import json
 from unittest.mock import ANY, patch
 
@@ -30,9 +31,8 @@ class TestMqttEventStream(object):
         """Stop everything that was started."""
         self.hass.stop()
 
-    def add_eventstream(self, sub_topic=None, pub_topic=None):
+    def add_eventstream(self, sub_topic=None, pub_topic=None, **config):
         """Add a mqtt_eventstream component."""
-        config = {}
         if sub_topic:
             config['subscribe_topic'] = sub_topic
         if pub_topic:
@@ -144,3 +144,85 @@ class TestMqttEventStream(object):
         self.hass.block_till_done()
 
         assert 1 == len(calls)
+
+    @patch('homeassistant.components.mqtt.async_publish')
+    def test_old_state_not_sent(self, mock_pub):
+        """"Test that state changes are sent without the old state."""
+        assert self.add_eventstream(pub_topic='bar')
+        self.hass.block_till_done()
+        mock_pub.reset_mock()
+
+        mock_state_change_event(self.hass, State('fake.entity', 'on'),
+                                State('fake.entity', 'off'))
+        self.hass.block_till_done()
+
+        event = json.loads(mock_pub.call_args[0][2])
+        assert event['event_data']['new_state']['state'] == 'on'
+        assert 'old_state' not in event['event_data']
+
+    @patch('homeassistant.components.mqtt.async_publish')
+    def test_event_type_filter(self, mock_pub):
+        """"Test that only the included event types are sent."""
+        assert self.add_eventstream(
+            pub_topic='bar', include_events=['test_event', 'other_event'],
+            exclude_events='other_event')
+        self.hass.block_till_done()
+        mock_pub.reset_mock()
+
+        self.hass.bus.fire('ignored_event')
+        self.hass.bus.fire('other_event')
+        self.hass.bus.fire('test_event')
+        self.hass.block_till_done()
+
+        assert mock_pub.call_count == 1
+        event = json.loads(mock_pub.call_args[0][2])
+        assert event['event_type'] == 'test_event'
+
+    @patch('homeassistant.components.mqtt.async_publish')
+    def test_events_sent_in_batches(self, mock_pub):
+        """"Test that events within the batch interval are sent together."""
+        assert self.add_eventstream(pub_topic='bar', batch_interval=5)
+        self.hass.block_till_done()
+        mock_pub.reset_mock()
+
+        self.hass.bus.fire('test_event', {'number': 1})
+        self.hass.bus.fire('test_event', {'number': 2})
+        self.hass.block_till_done()
+        assert not mock_pub.called
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=6))
+        self.hass.block_till_done()
+
+        assert mock_pub.call_count == 1
+        msg = json.loads(mock_pub.call_args[0][2])
+        assert [event['event_data']['number'] for event in msg['events']] \
+            == [1, 2]
+
+    def test_receiving_batch_restores_old_state(self):
+        """"Test that a batch is fired with the old states restored."""
+        sub_topic = 'foo'
+        assert self.add_eventstream(sub_topic=sub_topic)
+        self.hass.block_till_done()
+
+        calls = []
+
+        @callback
+        def listener(event):
+            calls.append(event)
+
+        self.hass.bus.listen(EVENT_STATE_CHANGED, listener)
+
+        events = [{
+            'event_type': EVENT_STATE_CHANGED,
+            'event_data': {'entity_id': 'light.remote', 'new_state': state}
+        } for state in (State('light.remote', 'off'),
+                        State('light.remote', 'on'))]
+        payload = json.dumps({'events': events}, cls=JSONEncoder)
+        fire_mqtt_message(self.hass, sub_topic, payload)
+        self.hass.block_till_done()
+
+        assert len(calls) == 2
+        assert calls[0].data['old_state'] is None
+        assert calls[0].data['new_state'].state == 'off'
+        assert calls[1].data['old_state'].state == 'off'
+        assert calls[1].data['new_state'].state == 'on'
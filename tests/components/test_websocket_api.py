@@ -1,5 +1,6 @@
 """Tests for the Home Assistant Websocket API."""
 import asyncio
+from datetime import timedelta
 from unittest.mock import patch
 
 from aiohttp import WSMsgType
@@ -241,6 +242,32 @@ def test_get_states(hass, websocket_client):
     assert msg['result'] == states
 
 
+@asyncio.coroutine
+def test_get_state_changes(hass, websocket_client):
+    """Test get_state_changes command."""
+    hass.states.async_set('greeting.hello', 'world')
+    since = hass.states.get('greeting.hello').last_updated
+
+    with patch('homeassistant.core.dt_util.utcnow',
+               return_value=since + timedelta(seconds=5)):
+        hass.states.async_set('greeting.bye', 'universe')
+
+    websocket_client.send_json({
+        'id': 5,
+        'type': wapi.TYPE_GET_STATE_CHANGES,
+        'since': since.isoformat(),
+    })
+
+    msg = yield from websocket_client.receive_json()
+    assert msg['id'] == 5
+    assert msg['type'] == wapi.TYPE_RESULT
+    assert msg['success']
+    assert [state['entity_id'] for state in msg['result']['states']] == \
+        ['greeting.bye']
+    assert sorted(msg['result']['entity_ids']) == \
+        ['greeting.bye', 'greeting.hello']
+
+
 @asyncio.coroutine
 def test_get_services(hass, websocket_client):
     """Test get_services command."""
@@ -146,3 +146,43 @@ class TestConditionHelper:
                    return_value=dt.now().replace(hour=21)):
             assert not condition.time(after=sixam, before=sixpm)
             assert condition.time(after=sixpm, before=sixam)
+
+    def test_sort_by_cost(self):
+        """Test that cheap conditions are ordered first."""
+        configs = [
+            {'condition': 'zone', 'entity_id': 'device_tracker.paulus',
+             'zone': 'zone.home'},
+            {'condition': 'template', 'value_template': '{{ true }}'},
+            {'condition': 'or', 'conditions': [
+                {'condition': 'state', 'entity_id': 'light.a',
+                 'state': 'on'},
+                {'condition': 'time', 'after': '08:00'},
+            ]},
+            {'condition': 'state', 'entity_id': 'light.b', 'state': 'on'},
+        ]
+
+        assert condition.sort_by_cost(configs) == [
+            configs[3], configs[2], configs[1], configs[0]]
+
+    def test_state_conditions_share_result(self):
+        """Test that equal state conditions are tested once per change."""
+        config = {
+            'condition': 'and',
+            'conditions': [{
+                'condition': 'state',
+                'entity_id': 'alarm_control_panel.home',
+                'state': 'armed_away',
+            }]
+        }
+        checks = [condition.from_config(config) for _ in range(3)]
+
+        self.hass.states.set('alarm_control_panel.home', 'armed_away')
+
+        with patch('homeassistant.helpers.condition.state',
+                   wraps=condition.state) as mock_state:
+            assert all(check(self.hass) for check in checks)
+            assert mock_state.call_count == 1
+
+            self.hass.states.set('alarm_control_panel.home', 'disarmed')
+            assert not any(check(self.hass) for check in checks)
+            assert mock_state.call_count == 2
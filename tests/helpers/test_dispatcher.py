@@ -3,7 +3,10 @@ import asyncio
 
 from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import (
-    dispatcher_send, dispatcher_connect)
+    dispatcher_send, dispatcher_connect, async_dispatcher_send,
+    async_dispatcher_connect, async_dispatcher_stats, DATA_DISPATCHER,
+    DATA_DISPATCHER_SENT)
+from homeassistant.util.async import run_callback_threadsafe
 
 from tests.common import get_test_home_assistant
 
@@ -134,3 +137,104 @@ class TestHelpersDispatcher(object):
         self.hass.block_till_done()
 
         assert calls == [3, 2, 'bla']
+
+    def test_callback_called_inline(self):
+        """Test that callbacks run while the signal is sent."""
+        calls = []
+
+        @callback
+        def test_funct(data):
+            """Test function."""
+            calls.append(data)
+
+        @callback
+        def send_and_check():
+            """Send the signal from within the event loop."""
+            async_dispatcher_send(self.hass, 'test', 3)
+            return list(calls)
+
+        dispatcher_connect(self.hass, 'test', test_funct)
+
+        assert run_callback_threadsafe(
+            self.hass.loop, send_and_check).result() == [3]
+
+    def test_failing_callback_does_not_stop_others(self):
+        """Test that an exception in one callback is contained."""
+        calls = []
+
+        @callback
+        def failing_funct(data):
+            """Test function."""
+            raise ValueError()
+
+        @callback
+        def test_funct(data):
+            """Test function."""
+            calls.append(data)
+
+        dispatcher_connect(self.hass, 'test', failing_funct)
+        dispatcher_connect(self.hass, 'test', test_funct)
+        dispatcher_send(self.hass, 'test', 3)
+        self.hass.block_till_done()
+
+        assert calls == [3]
+
+    def test_multiple_functions(self):
+        """Test that all functions of a signal are called."""
+        calls = []
+
+        def test_funct1(data):
+            """Test function."""
+            calls.append((1, data))
+
+        def test_funct2(data):
+            """Test function."""
+            calls.append((2, data))
+
+        dispatcher_connect(self.hass, 'test', test_funct1)
+        dispatcher_connect(self.hass, 'test', test_funct2)
+        dispatcher_send(self.hass, 'test', 3)
+        self.hass.block_till_done()
+
+        assert calls == [(1, 3), (2, 3)]
+
+    def test_stats_and_cleanup(self):
+        """Test the diagnostic counters and removal of unused signals."""
+        @callback
+        def test_funct(data):
+            """Test function."""
+            pass
+
+        unsub = dispatcher_connect(self.hass, 'test_1', test_funct)
+        dispatcher_send(self.hass, 'test_1', 3)
+        dispatcher_send(self.hass, 'test_1', 4)
+        dispatcher_send(self.hass, 'test_2', 5)
+        self.hass.block_till_done()
+
+        stats = run_callback_threadsafe(
+            self.hass.loop, async_dispatcher_stats, self.hass).result()
+
+        # Signals without targets are not counted
+        assert stats == {
+            'test_1': {'connected': 1, 'sent': 2},
+        }
+
+        unsub()
+
+        assert 'test_1' not in self.hass.data[DATA_DISPATCHER]
+        assert 'test_1' not in self.hass.data[DATA_DISPATCHER_SENT]
+
+
+@asyncio.coroutine
+def test_keyed_signal_reaches_single_target(hass):
+    """Test that a signal per entity only reaches that entity."""
+    calls = []
+
+    for entity_id in ('light.kitchen', 'light.living_room'):
+        async_dispatcher_connect(
+            hass, 'refresh_{}'.format(entity_id),
+            callback(lambda entity_id=entity_id: calls.append(entity_id)))
+
+    async_dispatcher_send(hass, 'refresh_light.kitchen')
+
+    assert calls == ['light.kitchen']
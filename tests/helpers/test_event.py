@@ -3,6 +3,7 @@
 import asyncio
 import unittest
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from astral import Astral
 
@@ -261,6 +262,35 @@ class TestEventHelpers(unittest.TestCase):
         self.assertEqual(2, len(wildcard_runs))
         self.assertEqual(2, len(wildercard_runs))
 
+    def test_track_template_follows_accessed_states(self):
+        """Test that only states accessed by the template render it."""
+        runs = []
+        template = Template(
+            "{{ states.sensor | selectattr('state', 'equalto', 'on') | list "
+            "| count > 1 }}", self.hass)
+
+        self.hass.states.set('sensor.one', 'on')
+
+        def run_callback(entity_id, old_state, new_state):
+            runs.append(entity_id)
+
+        with patch.object(template, 'async_render_tracked',
+                          wraps=template.async_render_tracked) as mock_render:
+            track_template(self.hass, template, run_callback)
+            self.hass.block_till_done()
+            assert mock_render.call_count == 1
+
+            self.hass.states.set('light.unrelated', 'on')
+            self.hass.block_till_done()
+            assert mock_render.call_count == 1
+
+            # New entities of the domain are picked up
+            self.hass.states.set('sensor.two', 'on')
+            self.hass.block_till_done()
+            assert mock_render.call_count == 2
+
+        self.assertEqual(['sensor.two'], runs)
+
     def test_track_time_interval(self):
         """Test tracking time interval."""
         specific_runs = []
@@ -522,3 +552,99 @@ class TestEventHelpers(unittest.TestCase):
         self._send_time_changed(datetime(2014, 5, 2, 0, 0, 0))
         self.hass.block_till_done()
         self.assertEqual(0, len(specific_runs))
+
+
+@asyncio.coroutine
+def test_async_track_entity_state_change(hass):
+    """Test tracking state changes through the entity index."""
+    from homeassistant.helpers.event import (
+        async_track_entity_state_change, DATA_STATE_CHANGE_INDEX)
+
+    calls = []
+    init_count = hass.bus.async_listeners().get('state_changed', 0)
+
+    @ha.callback
+    def listener(entity_id, old_state, new_state):
+        """Record the call."""
+        calls.append((entity_id, new_state.state))
+
+    unsub_on = async_track_entity_state_change(
+        hass, ['light.Kitchen', 'light.hall'], listener, to_state='on')
+    unsub_all = async_track_entity_state_change(
+        hass, 'light.kitchen', listener)
+
+    # All listeners share a single bus listener
+    assert hass.bus.async_listeners()['state_changed'] == init_count + 1
+
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.bedroom', 'on')
+    hass.states.async_set('light.hall', 'off')
+    yield from hass.async_block_till_done()
+
+    assert calls == [('light.kitchen', 'on'), ('light.kitchen', 'on')]
+
+    unsub_on()
+    unsub_on()
+    hass.states.async_set('light.kitchen', 'off')
+    hass.states.async_set('light.hall', 'on')
+    yield from hass.async_block_till_done()
+
+    assert calls[2:] == [('light.kitchen', 'off')]
+
+    unsub_all()
+    assert not hass.data[DATA_STATE_CHANGE_INDEX]._listeners
+    assert hass.bus.async_listeners().get('state_changed', 0) == init_count
+
+
+@asyncio.coroutine
+def test_async_track_render_info_indexed(hass):
+    """Test that tracked templates listen only to the states they use."""
+    from homeassistant.helpers.event import async_track_template
+
+    runs = []
+    init_count = hass.bus.async_listeners().get('state_changed', 0)
+
+    @ha.callback
+    def run_callback(entity_id, old_state, new_state):
+        """Record the call."""
+        runs.append(entity_id)
+
+    hass.states.async_set('input_boolean.use_x', 'on')
+    template = Template(
+        "{% if is_state('input_boolean.use_x', 'on') %}"
+        "{{ is_state('sensor.x', 'on') }}{% else %}"
+        "{{ is_state('sensor.y', 'on') }}{% endif %}", hass)
+
+    for _ in range(3):
+        async_track_template(hass, template, run_callback)
+    async_track_template(
+        hass, Template('{{ states.light | list | count > 1 }}', hass),
+        run_callback)
+
+    # Entity and domain dependencies share the indexes' bus listeners
+    assert hass.bus.async_listeners()['state_changed'] == init_count + 2
+
+    hass.states.async_set('sensor.y', 'on')
+    hass.states.async_set('sensor.x', 'on')
+    yield from hass.async_block_till_done()
+    assert runs == ['sensor.x'] * 3
+
+    # The tracked states follow the last render
+    hass.states.async_set('sensor.y', 'off')
+    hass.states.async_set('input_boolean.use_x', 'off')
+    yield from hass.async_block_till_done()
+    hass.states.async_set('sensor.x', 'off')
+    hass.states.async_set('sensor.y', 'on')
+    yield from hass.async_block_till_done()
+    assert runs[3:] == ['sensor.y'] * 3
+
+    hass.states.async_set('light.one', 'on')
+    hass.states.async_set('light.two', 'on')
+    yield from hass.async_block_till_done()
+    assert runs[6:] == ['light.two']
+
+    # Templates using all states still listen to everything
+    async_track_template(
+        hass, Template('{{ states | list | count > 100 }}', hass),
+        run_callback)
+    assert hass.bus.async_listeners()['state_changed'] == init_count + 3
@@ -1,5 +1,6 @@
 """The tests for the Script component."""
 # pylint: disable=protected-access
+import asyncio
 from datetime import timedelta
 from unittest import mock
 import unittest
@@ -79,6 +80,33 @@ class TestScriptHelper(unittest.TestCase):
         assert len(calls) == 1
         assert calls[0].data.get('hello') == 'world'
 
+    def test_calling_static_service_prepared(self):
+        """Test that calls without templates are resolved once."""
+        calls = []
+
+        @callback
+        def record_call(service):
+            """Add recorded event to set."""
+            calls.append(dict(service.data))
+
+        self.hass.services.register('test', 'script', record_call)
+
+        with mock.patch('homeassistant.helpers.script.service.'
+                        'async_call_from_config') as mock_call:
+            script_obj = script.Script(self.hass, cv.SCRIPT_SCHEMA({
+                'service': 'test.script',
+                'entity_id': 'light.kitchen',
+                'data': {'hello': 'world'},
+            }))
+
+            script_obj.run()
+            script_obj.run()
+            self.hass.block_till_done()
+
+        assert not mock_call.called
+        assert calls == [
+            {'hello': 'world', 'entity_id': ['light.kitchen']}] * 2
+
     def test_calling_service_template(self):
         """Test the calling of a service."""
         calls = []
@@ -503,3 +531,110 @@ class TestScriptHelper(unittest.TestCase):
             self.hass.block_till_done()
 
         assert script_obj.last_triggered == time
+
+    def test_parallel_block(self):
+        """Test that the service calls of a parallel block overlap."""
+        calls = []
+
+        @asyncio.coroutine
+        def record_call(service):
+            """Record start and end of the call."""
+            calls.append('start')
+            yield from asyncio.sleep(0, loop=self.hass.loop)
+            calls.append('end')
+
+        self.hass.services.register('test', 'one', record_call)
+        self.hass.services.register('test', 'two', record_call)
+
+        script_obj = script.Script(self.hass, cv.SCRIPT_SCHEMA([{
+            'parallel': [{'service': 'test.one'}, {'service': 'test.two'}],
+        }]))
+
+        script_obj.run()
+        self.hass.block_till_done()
+
+        assert calls == ['start', 'start', 'end', 'end']
+
+    def _mode_script(self, events, mode, max_runs=script.DEFAULT_MAX_RUNS):
+        """Create a script firing an event before and after a delay."""
+        @callback
+        def record_event(event):
+            """Add recorded event to set."""
+            events.append(event)
+
+        self.hass.bus.listen('test_event', record_event)
+
+        return script.Script(self.hass, cv.SCRIPT_SCHEMA([
+            {'event': 'test_event'},
+            {'delay': {'seconds': 5}},
+            {'event': 'test_event'}]), mode=mode, max_runs=max_runs)
+
+    def test_mode_queued(self):
+        """Test that queued runs start when the previous one is done."""
+        events = []
+        script_obj = self._mode_script(events, script.MODE_QUEUED, 2)
+
+        for _ in range(3):
+            script_obj.run()
+        self.hass.block_till_done()
+
+        assert script_obj.is_running
+        assert script_obj.runs == 2
+        assert len(events) == 1
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=5))
+        self.hass.block_till_done()
+
+        assert script_obj.runs == 1
+        assert len(events) == 3
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=10))
+        self.hass.block_till_done()
+
+        assert not script_obj.is_running
+        assert len(events) == 4
+        assert script_obj.run_count == 2
+        assert script_obj.last_run_duration is not None
+
+    def test_mode_parallel(self):
+        """Test that runs run alongside each other up to the maximum."""
+        events = []
+        script_obj = self._mode_script(events, script.MODE_PARALLEL, 2)
+
+        for _ in range(3):
+            script_obj.run()
+        self.hass.block_till_done()
+
+        assert script_obj.runs == 2
+        assert len(events) == 2
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=5))
+        self.hass.block_till_done()
+
+        assert not script_obj.is_running
+        assert len(events) == 4
+
+    def test_mode_restart(self):
+        """Test that running again stops the running run."""
+        events = []
+        script_obj = self._mode_script(events, script.MODE_RESTART)
+
+        script_obj.run()
+        script_obj.run()
+        self.hass.block_till_done()
+
+        assert script_obj.runs == 1
+        assert len(events) == 2
+
+        fire_time_changed(self.hass, dt_util.utcnow() + timedelta(seconds=5))
+        self.hass.block_till_done()
+
+        assert not script_obj.is_running
+        assert len(events) == 3
+
+        script_obj.run()
+        script_obj.stop()
+        self.hass.block_till_done()
+
+        assert not script_obj.is_running
+        assert script_obj.run_count == 3
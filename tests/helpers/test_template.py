@@ -3,6 +3,8 @@ from datetime import datetime
 import unittest
 from unittest.mock import patch
 
+import pytest
+
 from homeassistant.components import group
 from homeassistant.exceptions import TemplateError
 from homeassistant.helpers import template
@@ -291,6 +293,64 @@ class TestHelpersTemplate(unittest.TestCase):
             '',
             tpl.render_with_possible_json_value('{"hello": "world"}', ''))
 
+    def test_render_with_possible_json_value_key_lookup(self):
+        """Render key lookups in JSON values without Jinja."""
+        value = '{"a": {"b c": 21.5, "items": 1}, "on": true, "s": " x "}'
+        tpl = template.Template("{{ value_json.a['b c'] }}", self.hass)
+
+        with patch.object(tpl, '_ensure_compiled') as mock_compile:
+            self.assertEqual(
+                '21.5', tpl.render_with_possible_json_value(value))
+            self.assertEqual('', template.Template(
+                '{{ value_json.missing }}',
+                self.hass).render_with_possible_json_value(value))
+            self.assertEqual('True', template.Template(
+                '{{ value_json.on }}',
+                self.hass).render_with_possible_json_value(value))
+            self.assertEqual('x', template.Template(
+                '{{ value_json["s"] }}',
+                self.hass).render_with_possible_json_value(value))
+
+        self.assertFalse(mock_compile.called)
+
+        # Attributes of dict come before keys in Jinja
+        self.assertNotEqual('1', template.Template(
+            '{{ value_json.a.items }}',
+            self.hass).render_with_possible_json_value(value))
+
+    def test_render_with_possible_json_value_missing_nested_key(self):
+        """Render a lookup in a missing key like Jinja does."""
+        tpl = template.Template('{{ value_json.a.b }}', self.hass)
+
+        self.assertEqual(
+            '{"c": 1}', tpl.render_with_possible_json_value('{"c": 1}'))
+        self.assertEqual(
+            'err', tpl.render_with_possible_json_value('{"c": 1}', 'err'))
+        self.assertEqual(
+            '', tpl.render_with_possible_json_value('{"a": {"c": 1}}'))
+
+    def test_json_value_decoded_once(self):
+        """Test that a JsonValue is decoded once for all templates."""
+        value = template.JsonValue('{"hello": "world", "count": 2}')
+        hello = template.Template('{{ value_json.hello }}', self.hass)
+        count = template.Template('{{ value_json.count + 1 }}', self.hass)
+
+        with patch('homeassistant.helpers.template.json.loads',
+                   wraps=template.json.loads) as mock_loads:
+            self.assertEqual(
+                'world', hello.render_with_possible_json_value(value))
+            self.assertEqual(
+                '3', count.render_with_possible_json_value(value))
+
+        self.assertEqual(1, mock_loads.call_count)
+
+        invalid = template.JsonValue('{ I AM NOT JSON }')
+        self.assertEqual('', template.Template(
+            '{{ value_json }}',
+            self.hass).render_with_possible_json_value(invalid))
+        with self.assertRaises(ValueError):
+            invalid.json()
+
     def test_raise_exception_on_error(self):
         """Test raising an exception on error."""
         with self.assertRaises(TemplateError):
@@ -728,3 +788,168 @@ is_state_attr('device_tracker.phone_2', 'battery', 40)
                 " > (states('input_slider.luftfeuchtigkeit') | int +1.5)"
                 " %}true{% endif %}"
             )))
+
+
+def test_render_info_records_accessed_states(hass):
+    """Test that rendering records the entities and domains accessed."""
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('sensor.one', '1')
+    hass.states.async_set('sensor.two', '2')
+    info = template.RenderInfo()
+
+    tpl = template.Template(
+        "{{ is_state('light.Kitchen', 'on') }} {{ states('switch.x') }}"
+        "{% for state in states.sensor %}{{ state.state }}{% endfor %}"
+        "{{ states.cover.garage }}", hass)
+
+    assert tpl.async_render_tracked(info) == 'True unknown12None'
+    assert info.entities == {'light.kitchen', 'switch.x', 'cover.garage'}
+    assert info.domains == {'sensor'}
+    assert not info.all_states
+
+    assert info.matches('light.kitchen')
+    assert info.matches('sensor.new')
+    assert not info.matches('light.bedroom')
+
+    # Rendering without tracking does not record anything
+    info.clear()
+    tpl.async_render()
+    assert not info.entities and not info.domains
+
+
+def test_render_info_all_states(hass):
+    """Test that iterating all states or accessing none matches all."""
+    info = template.RenderInfo()
+    assert info.matches('light.kitchen')
+
+    template.Template(
+        "{{ states.light.kitchen }}", hass).async_render_tracked(info)
+    assert not info.matches('sensor.one')
+
+    template.Template(
+        "{% for state in states %}{% endfor %}", hass
+    ).async_render_tracked(info)
+    assert info.all_states
+    assert info.matches('sensor.one')
+
+
+def test_render_info_recorded_on_error(hass):
+    """Test that the states accessed are recorded when rendering fails."""
+    info = template.RenderInfo()
+    tpl = template.Template("{{ states.sensor.missing.state }}", hass)
+
+    with pytest.raises(TemplateError):
+        tpl.async_render_tracked(info)
+
+    assert info.entities == {'sensor.missing'}
+
+
+def test_compiled_code_shared(hass):
+    """Test that templates with the same source are compiled once."""
+    source = "{{ states('sensor.shared_cache') }}"
+    template.Template(source, hass).ensure_valid()
+
+    with patch.object(template.ENV, 'compile') as mock_compile:
+        tpl = template.Template(source, hass)
+        tpl.ensure_valid()
+
+    assert not mock_compile.called
+    assert tpl.async_render() == 'unknown'
+
+
+def test_compiled_cache_bounded(hass):
+    """Test that the least recently used compiled template is dropped."""
+    with patch.object(template, 'COMPILED_CACHE_SIZE', 2), \
+            patch.object(template, '_COMPILED_CACHE',
+                         template.OrderedDict()) as cache:
+        for source in ('{{ 1 }}', '{{ 2 }}', '{{ 1 }}', '{{ 3 }}'):
+            template.Template(source, hass).ensure_valid()
+
+        assert list(cache) == ['{{ 1 }}', '{{ 3 }}']
+
+
+def test_static_template_not_rendered():
+    """Test that templates without Jinja syntax render without hass."""
+    tpl = template.Template(' Hello world ')
+
+    assert tpl.is_static
+    tpl.ensure_valid()
+    assert tpl.async_render() == 'Hello world'
+    assert tpl.async_render_with_possible_json_value('{}') == 'Hello world'
+    assert not template.Template('{{ value }}').is_static
+
+
+def test_render_memoized_until_dependency_changes(hass):
+    """Test that the result is reused while the states it read are equal."""
+    hass.states.async_set('sensor.memo', '1')
+    tpl = template.Template("{{ states('sensor.memo') }}", hass)
+
+    assert tpl.async_render() == '1'
+
+    with patch.object(tpl, '_async_render_compiled') as mock_render:
+        hass.states.async_set('sensor.other', '2')
+        assert tpl.async_render() == '1'
+
+        info = template.RenderInfo()
+        assert tpl.async_render_tracked(info) == '1'
+
+    assert not mock_render.called
+    assert info.entities == {'sensor.memo'}
+
+    hass.states.async_set('sensor.memo', '3')
+    assert tpl.async_render() == '3'
+    assert tpl.async_render(number=5) == '3'
+
+
+@patch('homeassistant.helpers.template.TemplateEnvironment.'
+       'is_safe_callable', return_value=True)
+def test_render_volatile_not_memoized(mock_is_safe, hass):
+    """Test that templates depending on the time are always rendered."""
+    times = iter([dt_util.utc_from_timestamp(0),
+                  dt_util.utc_from_timestamp(1)])
+
+    with patch.dict(template.ENV.globals, {'now': lambda: next(times)}):
+        tpl = template.Template("{{ now().isoformat() }}", hass)
+
+        assert tpl.async_render() == '1970-01-01T00:00:00+00:00'
+        assert tpl.async_render() == '1970-01-01T00:00:01+00:00'
+
+
+def test_aggregate_states(hass):
+    """Test the aggregate helpers over a domain and entity globs."""
+    hass.states.async_set('sensor.temperature_kitchen', '20')
+    hass.states.async_set('sensor.temperature_hall', '23', {'battery': 50})
+    hass.states.async_set('sensor.temperature_attic', 'unknown')
+    hass.states.async_set('sensor.humidity', '60', {'battery': 70})
+    hass.states.async_set('light.kitchen', 'on')
+    hass.states.async_set('light.hall', 'off')
+
+    def render(source):
+        """Render a template."""
+        return template.Template(source, hass).async_render()
+
+    assert render("{{ states_numeric('sensor.temperature_*') }}") == \
+        '[23.0, 20.0]'
+    assert render("{{ states_sum('sensor') }}") == '103.0'
+    assert render("{{ states_mean('sensor.temperature_*') }}") == '21.5'
+    assert render("{{ states_min('sensor', 'battery') }}") == '50.0'
+    assert render("{{ states_max('sensor', 'battery') }}") == '70.0'
+    assert render("{{ states_max('switch') }}") == 'None'
+    assert render("{{ count_state('light', 'on') }}") == '1'
+    assert render("{{ count_state('light.kitchen', 'on') }}") == '1'
+    assert render("{{ [1, 2, 6] | mean }}") == '3.0'
+
+
+def test_aggregate_states_render_info(hass):
+    """Test that aggregates record the domains or entities they read."""
+    info = template.RenderInfo()
+
+    template.Template(
+        "{{ states_sum('sensor.power_*') }}"
+        "{{ count_state('light.kitchen', 'on') }}", hass
+    ).async_render_tracked(info)
+
+    assert info.domains == {'sensor'}
+    assert info.entities == {'light.kitchen'}
+    assert info.matches('sensor.power_new')
+    assert not info.matches('light.hall')
@@ -0,0 +1,89 @@
+"""Test the startup timeline helper."""
+import asyncio
+import json
+
+from homeassistant import loader, setup
+from homeassistant.helpers import timeline
+
+from tests.common import MockModule
+
+
+def test_critical_path():
+    """Test that the critical path follows what finished last."""
+    tline = timeline.Timeline()
+    start = tline.start
+    tline.dependencies['comp_c'] = ['comp_a', 'comp_b']
+
+    tline.add_span('comp_a', timeline.PHASE_TOTAL, start, start + 1)
+    tline.add_span('comp_b', timeline.PHASE_TOTAL, start, start + 3)
+    tline.add_span('comp_b.platform', timeline.PHASE_TOTAL, start, start + 2)
+    tline.add_span('comp_c', timeline.PHASE_TOTAL, start, start + 4)
+    tline.add_span('comp_d', timeline.PHASE_TOTAL, start, start + 2)
+
+    assert tline.critical_path() == ['comp_b.platform', 'comp_b', 'comp_c']
+
+
+@asyncio.coroutine
+def test_records_setup_phases(hass, tmpdir):
+    """Test that the phases of a setup are recorded."""
+    tline = hass.data[timeline.DATA_TIMELINE] = timeline.Timeline()
+
+    loader.set_component('comp_a', MockModule('comp_a'))
+    loader.set_component('comp_b', MockModule('comp_b', ['comp_a']))
+
+    assert (yield from setup.async_setup_component(hass, 'comp_b', {}))
+
+    tline.finish()
+    data = tline.as_dict()
+
+    assert data['finished']
+    assert data['critical_path'] == ['comp_a', 'comp_b']
+
+    for phase in (timeline.PHASE_TOTAL, timeline.PHASE_CONFIG,
+                  timeline.PHASE_SETUP, timeline.PHASE_EXECUTOR_WAIT):
+        assert phase in data['setups']['comp_a']
+
+    assert timeline.PHASE_DEPENDENCIES in data['setups']['comp_b']
+
+    path = str(tmpdir.join(timeline.TIMELINE_FILE))
+    yield from hass.loop.run_in_executor(None, tline.save, path)
+
+    with open(path) as fil:
+        trace = json.load(fil)
+
+    assert trace['otherData']['critical_path'] == 'comp_a > comp_b'
+    assert any(event['name'] == timeline.PHASE_SETUP and
+               event['cat'] == 'comp_b' for event in trace['traceEvents'])
+
+
+def test_no_timeline(hass):
+    """Test that nothing is recorded without a timeline."""
+    def target():
+        """Do nothing."""
+
+    assert timeline.executor_job(hass, 'comp_a', target) is target
+
+    with timeline.span(hass, 'comp_a', timeline.PHASE_SETUP):
+        pass
+
+    assert timeline.DATA_TIMELINE not in hass.data
+
+
+def test_no_recording_after_finish(hass):
+    """Test that setups after the end of the startup are not recorded."""
+    tline = hass.data[timeline.DATA_TIMELINE] = timeline.Timeline()
+    tline.finish()
+
+    def target():
+        """Do nothing."""
+
+    assert timeline.executor_job(hass, 'comp_a', target) is target
+
+    with timeline.span(hass, 'comp_a', timeline.PHASE_SETUP):
+        pass
+
+    timeline.set_dependencies(hass, 'comp_a', ['comp_b'])
+    tline.add_span('comp_b', timeline.PHASE_TOTAL, tline.end, tline.end + 1)
+
+    assert tline.spans == []
+    assert tline.dependencies == {}
@@ -6,10 +6,12 @@ from unittest.mock import Mock, patch
 import logging
 
 import homeassistant.config as config_util
-from homeassistant import bootstrap
+from homeassistant import bootstrap, loader
+from homeassistant.helpers import timeline
 import homeassistant.util.dt as dt_util
 
-from tests.common import patch_yaml_files, get_test_config_dir
+from tests.common import (
+    patch_yaml_files, get_test_config_dir, MockModule)
 
 ORIG_TIMEZONE = dt_util.DEFAULT_TIME_ZONE
 VERSION_PATH = os.path.join(get_test_config_dir(), config_util.VERSION_FILE)
@@ -27,6 +29,7 @@ _LOGGER = logging.getLogger(__name__)
 @patch('os.access', Mock(return_value=True))
 @patch('homeassistant.bootstrap.async_enable_logging',
        Mock(return_value=True))
+@patch('homeassistant.helpers.timeline.Timeline.save', Mock())
 def test_from_config_file(hass):
     """Test with configuration file."""
     components = set(['browser', 'conversation', 'script'])
@@ -52,3 +55,72 @@ def test_home_assistant_core_config_validation(hass):
         }
     }, hass)
     assert result is None
+
+
+@asyncio.coroutine
+@patch('homeassistant.bootstrap.async_enable_logging', Mock())
+@patch('homeassistant.bootstrap.async_register_signal_handling', Mock())
+@patch('homeassistant.bootstrap.conf_util.process_ha_config_upgrade', Mock())
+@patch('homeassistant.util.location.detect_location_info',
+       Mock(return_value=None))
+@patch('homeassistant.helpers.timeline.Timeline.save', Mock())
+def test_slow_setup_does_not_block_startup(hass):
+    """Test that startup continues after the setup timeout."""
+    setup_done = asyncio.Event(loop=hass.loop)
+    setup_started = []
+
+    @asyncio.coroutine
+    def async_setup_slow(hass, config):
+        """Slow setup."""
+        yield from setup_done.wait()
+        return True
+
+    @asyncio.coroutine
+    def async_setup_dependent(hass, config):
+        """Record that setup started after the dependency was done."""
+        setup_started.append('comp_c' in hass.config.components)
+        return True
+
+    loader.set_component('comp_a', MockModule(
+        'comp_a', async_setup=async_setup_slow))
+    loader.set_component('comp_b', MockModule('comp_b'))
+    loader.set_component('comp_c', MockModule('comp_c'))
+    loader.set_component('comp_d', MockModule(
+        'comp_d', ['comp_c'], async_setup=async_setup_dependent))
+
+    result = yield from bootstrap.async_from_config_dict({
+        'homeassistant': {'setup_timeout': {'comp_a': 0.01}},
+        'comp_a': {},
+        'comp_b': {},
+        'comp_d': {},
+    }, hass, enable_log=False, skip_pip=True)
+
+    assert result is hass
+    assert 'comp_a' not in hass.config.components
+    assert set(['comp_b', 'comp_c', 'comp_d']) <= hass.config.components
+    assert setup_started == [True]
+
+    setup_done.set()
+    yield from hass.async_block_till_done()
+    assert 'comp_a' in hass.config.components
+
+
+@asyncio.coroutine
+@patch('homeassistant.bootstrap.async_enable_logging', Mock())
+@patch('homeassistant.bootstrap.async_register_signal_handling', Mock())
+@patch('homeassistant.bootstrap.conf_util.process_ha_config_upgrade', Mock())
+@patch('homeassistant.util.location.detect_location_info',
+       Mock(return_value=None))
+def test_startup_timeline_saved(hass):
+    """Test that the startup timeline is written next to the config."""
+    loader.set_component('comp_a', MockModule('comp_a'))
+
+    with patch('homeassistant.helpers.timeline.Timeline.save') as mock_save:
+        yield from bootstrap.async_from_config_dict(
+            {'comp_a': {}}, hass, enable_log=False, skip_pip=True)
+
+    assert mock_save.call_args[0] == (
+        hass.config.path(timeline.TIMELINE_FILE),)
+    tline = hass.data[timeline.DATA_TIMELINE]
+    assert tline.end is not None
+    assert 'comp_a' in tline.as_dict()['setups']
@@ -516,6 +516,25 @@ class TestStateMachine(unittest.TestCase):
         states = sorted(state.entity_id for state in self.states.all())
         self.assertEqual(['light.bowl', 'switch.ac'], states)
 
+    def test_domain_index(self):
+        """Test that domain lookups follow added and removed entities."""
+        self.states.set('light.Alpha', 'off')
+        self.states.set('light.zeta', 'off')
+
+        self.assertEqual(['light.alpha', 'light.bowl', 'light.zeta'],
+                         self.states.entity_ids('Light'))
+
+        self.states.set('light.zeta', 'on')
+        self.assertEqual(['off', 'on', 'on'],
+                         [state.state for state in self.states.all('light')])
+
+        self.states.remove('light.bowl')
+        self.states.remove('switch.ac')
+        self.assertEqual(['light.alpha', 'light.zeta'],
+                         self.states.entity_ids('light'))
+        self.assertEqual([], self.states.entity_ids('switch'))
+        self.assertEqual([], self.states.all('switch'))
+
     def test_remove(self):
         """Test remove method."""
         events = []
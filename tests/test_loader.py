@@ -54,3 +54,22 @@ class TestLoader(unittest.TestCase):
 
         # Try to get load order for non-existing component
         self.assertEqual([], loader.load_order_component('mod1'))
+
+    def test_component_setup_waves(self):
+        """Test grouping components in waves by their dependencies."""
+        loader.set_component('mod1', MockModule('mod1'))
+        loader.set_component('mod2', MockModule('mod2', ['mod1']))
+        loader.set_component('mod3', MockModule('mod3', ['mod2', 'mod4']))
+        loader.set_component('mod4', MockModule('mod4', ['mod1']))
+        loader.set_component('mod5', MockModule('mod5'))
+
+        self.assertEqual(
+            [['mod1', 'mod5'], ['mod2', 'mod4'], ['mod3']],
+            loader.component_setup_waves(['mod3', 'mod5']))
+
+        # Create circular dependency
+        loader.set_component('mod1', MockModule('mod1', ['mod3']))
+
+        self.assertEqual(
+            [['mod5'], ['mod1', 'mod2', 'mod3', 'mod4']],
+            loader.component_setup_waves(['mod3', 'mod5']))
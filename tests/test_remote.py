@@ -8,6 +8,8 @@ from unittest.mock import patch
 from homeassistant import remote, setup, core as ha
 import homeassistant.components.http as http
 from homeassistant.const import HTTP_HEADER_HA_AUTH, EVENT_STATE_CHANGED
+from homeassistant.util.async import (
+    run_callback_threadsafe, run_coroutine_threadsafe)
 import homeassistant.util.dt as dt_util
 
 from tests.common import (
@@ -160,6 +162,31 @@ class TestRemoteMethods(unittest.TestCase):
 
         self.assertFalse(remote.set_state(broken_api, 'test.test', 'set_test'))
 
+    def test_set_states(self):
+        """Test Python API set_states."""
+        self.assertTrue(remote.set_states(master_api, [
+            {'entity_id': 'test.many_1', 'state': 'on'},
+            {'entity_id': 'test.many_2', 'state': 'off'},
+        ]))
+
+        self.assertEqual('on', hass.states.get('test.many_1').state)
+        self.assertEqual('off', hass.states.get('test.many_2').state)
+
+        self.assertFalse(remote.set_states(
+            broken_api, [{'entity_id': 'test.many_1', 'state': 'off'}]))
+
+    def test_api_keeps_session(self):
+        """Test that the API reuses its requests session."""
+        api = remote.API('127.0.0.1', API_PASSWORD, MASTER_PORT)
+        session = api.session
+
+        self.assertEqual(remote.APIStatus.OK, remote.validate_api(api))
+        self.assertIs(session, api.session)
+        self.assertEqual(API_PASSWORD, session.headers[HTTP_HEADER_HA_AUTH])
+
+        api.close()
+        self.assertIsNot(session, api.session)
+
     def test_set_state_with_push(self):
         """Test Python API set_state with push option."""
         events = []
@@ -216,6 +243,63 @@ class TestRemoteMethods(unittest.TestCase):
         # Should not raise an exception
         remote.call_service(broken_api, "test_domain", "test_service")
 
+    def test_call_services(self):
+        """Test Python API call_services."""
+        test_value = []
+
+        @ha.callback
+        def listener(service_call):
+            """Helper method that will verify that our service got called."""
+            test_value.append(1)
+
+        hass.services.register("test_domain", "test_services", listener)
+
+        self.assertTrue(remote.call_services(master_api, [
+            {'domain': 'test_domain', 'service': 'test_services'},
+            {'domain': 'test_domain', 'service': 'test_services'},
+        ]))
+
+        hass.block_till_done()
+
+        self.assertEqual(2, len(test_value))
+
+        self.assertFalse(remote.call_services(
+            broken_api,
+            [{'domain': 'test_domain', 'service': 'test_services'}]))
+
+    def test_async_api(self):
+        """Test the AsyncAPI against the master."""
+        api = remote.AsyncAPI(
+            '127.0.0.1', API_PASSWORD, MASTER_PORT, loop=slave.loop)
+
+        def run(coro):
+            """Run a coroutine of the API in the slave loop."""
+            return run_coroutine_threadsafe(coro, slave.loop).result()
+
+        self.assertTrue(run(api.async_validate_api()))
+
+        self.assertTrue(run(api.async_set_state('test.async', 'on')))
+        self.assertEqual('on', hass.states.get('test.async').state)
+        self.assertEqual(hass.states.get('test.async'),
+                         run(api.async_get_state('test.async')))
+        self.assertEqual(hass.states.all(), run(api.async_get_states()))
+
+        self.assertTrue(run(api.async_set_states([
+            {'entity_id': 'test.async', 'state': 'off'}])))
+        self.assertEqual('off', hass.states.get('test.async').state)
+
+        self.assertTrue(run(api.async_remove_state('test.async')))
+        self.assertIsNone(hass.states.get('test.async'))
+
+        slave.loop.call_soon_threadsafe(api.async_close)
+
+        broken = remote.AsyncAPI(
+            '127.0.0.1', API_PASSWORD, broken_api.port, loop=slave.loop)
+        self.assertFalse(run(broken.async_validate_api()))
+        self.assertEqual(remote.APIStatus.CANNOT_CONNECT, broken.status)
+        self.assertEqual([], run(broken.async_get_states()))
+        slave.loop.call_soon_threadsafe(broken.async_close)
+
     def test_json_encoder(self):
         """Test the JSON Encoder."""
         ha_json_enc = remote.JSONEncoder()
@@ -311,6 +395,120 @@ class TestRemoteClasses(unittest.TestCase):
         self.assertEqual(1, len(hass_call))
         self.assertEqual(1, len(slave_call))
 
+    def test_event_forwarding_keeps_order(self):
+        """Test that a burst of master events reaches the slave in order."""
+        slave_call = []
+
+        slave.bus.listen("test.event_burst",
+                         lambda event: slave_call.append(event.data['index']))
+
+        for index in range(25):
+            hass.bus.fire("test.event_burst", {'index': index})
+
+        # Wait till master forwarded the events
+        hass.block_till_done()
+        # Wait till slave handled them
+        slave.block_till_done()
+
+        self.assertEqual(list(range(25)), slave_call)
+
     def test_get_config(self):
         """Test the return of the configuration."""
         self.assertEqual(hass.config.as_dict(), remote.get_config(master_api))
+
+
+class TestStateMirror(unittest.TestCase):
+    """Test the remote.StateMirror class."""
+
+    def setUp(self):
+        """Setup the mirror and track the fired events."""
+        self.mirror = remote.StateMirror(slave, master_api)
+        self.events = []
+        self.unsub = slave.bus.listen(
+            EVENT_STATE_CHANGED, lambda event: self.events.append(event))
+
+    def tearDown(self):
+        """Stop everything that was started."""
+        self.unsub()
+        slave.block_till_done()
+
+    def _apply_snapshot(self, result):
+        """Apply a get_states or get_state_changes result."""
+        run_callback_threadsafe(
+            slave.loop, self.mirror._async_apply_snapshot, result).result()
+        slave.block_till_done()
+
+    def _state(self, entity_id, state, seconds):
+        """Return a state dict as sent by the websocket API."""
+        updated = dt_util.utc_from_timestamp(1000 + seconds)
+        return ha.State(entity_id, state, last_updated=updated).as_dict()
+
+    def test_apply_full_and_catch_up(self):
+        """Test applying all states and a catch-up afterwards."""
+        self._apply_snapshot([
+            self._state('mirror.one', 'on', 0),
+            self._state('mirror.two', 'off', 0),
+        ])
+
+        self.assertEqual('on', slave.states.get('mirror.one').state)
+        self.assertEqual('off', slave.states.get('mirror.two').state)
+        self.assertEqual(2, len(self.events))
+        self.assertEqual(ha.EventOrigin.remote, self.events[0].origin)
+        self.assertEqual(dt_util.utc_from_timestamp(1000),
+                         self.mirror._last_updated)
+
+        self._apply_snapshot({
+            'states': [self._state('mirror.one', 'off', 5)],
+            'entity_ids': ['mirror.one'],
+        })
+
+        self.assertEqual('off', slave.states.get('mirror.one').state)
+        self.assertIsNone(slave.states.get('mirror.two'))
+        self.assertEqual(4, len(self.events))
+        self.assertEqual(dt_util.utc_from_timestamp(1005),
+                         self.mirror._last_updated)
+
+    def test_ignore_seen_updates(self):
+        """Test that updates that were already applied are ignored."""
+        self._apply_snapshot([self._state('mirror.three', 'on', 10)])
+        self._apply_snapshot({
+            'states': [self._state('mirror.three', 'off', 5)],
+            'entity_ids': ['mirror.three'],
+        })
+
+        self.assertEqual('on', slave.states.get('mirror.three').state)
+        self.assertEqual(1, len(self.events))
+
+    def test_only_remove_mirrored_states(self):
+        """Test that local states are not removed by a catch-up."""
+        slave.states._states['local.state'] = ha.State('local.state', 'on')
+
+        self._apply_snapshot({'states': [], 'entity_ids': []})
+
+        self.assertIsNotNone(slave.states.get('local.state'))
+        slave.states._states.pop('local.state')
+
+    def test_keeps_mirroring_after_errors(self):
+        """Test that unexpected errors don't stop the mirror."""
+        errors = [KeyError('type'), asyncio.TimeoutError(), RuntimeError()]
+        delays = []
+
+        @asyncio.coroutine
+        def mock_mirror():
+            """Fail like a broken connection or message would."""
+            raise errors[len(delays)]
+
+        @asyncio.coroutine
+        def mock_sleep(delay, loop=None):
+            """Record the delay and stop after all errors."""
+            delays.append(delay)
+            if len(delays) == len(errors):
+                raise asyncio.CancelledError()
+
+        with patch.object(self.mirror, '_async_mirror', mock_mirror), \
+                patch('homeassistant.remote.asyncio.sleep', mock_sleep):
+            with self.assertRaises(asyncio.CancelledError):
+                run_coroutine_threadsafe(
+                    self.mirror._async_run(), slave.loop).result()
+
+        self.assertEqual(3, len(delays))